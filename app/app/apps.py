@@ -1,22 +1,40 @@
 # app/apps.py
+import atexit
 import os
 import sys
 from django.apps import AppConfig as DjangoAppConfig
 
+# ustawiane przez app/wsgi.py i app/asgi.py przed django.setup(),
+# więc działa dla gunicorna/uvicorna/daphne niezależnie od argv
+SERVER_ENV = "DJANGO_SERVER"
+
 def _should_start_mqtt() -> bool:
     # pozwól wyłączyć przez ENV (np. w testach/komendach)
     if os.environ.get("MQTT_DISABLED") == "1":
         return False
 
-    # odpalaj tylko przy serwerach www, nie przy migrate/shell
+    if os.environ.get(SERVER_ENV):
+        return True
+
+    # odpalaj tylko przy serwerze www, nie przy migrate/shell
     cmd = sys.argv[1] if len(sys.argv) > 1 else ""
-    return cmd in {"runserver", "gunicorn", "uvicorn", "daphne"}
+    return cmd == "runserver"
+
+# MQTT_INGEST – kto subskrybuje i zapisuje telemetrię:
+#   "leader" – jeden worker wybrany advisory lockiem w Postgresie (domyślnie)
+#   "always" – każdy proces (tylko dla pojedynczego procesu, np. dev)
+#   "off"    – żaden proces www (ingest w osobnym procesie)
+MQTT_INGEST = os.environ.get("MQTT_INGEST", "leader")
+MQTT_LEADER_RETRY = float(os.environ.get("MQTT_LEADER_RETRY", "15"))
+
+_leader = None
 
 class AppConfig(DjangoAppConfig):
     name = "app"
     verbose_name = "App"
 
     def ready(self):
+        global _leader
         if not _should_start_mqtt():
             return
 
@@ -26,7 +44,20 @@ class AppConfig(DjangoAppConfig):
 
         try:
             from . import mqtt_client
-            mqtt_client.start()  # idempotentne (patrz pkt 2)
+            # publikacja na wyświetlacze i ACK – w każdym procesie www
+            mqtt_client.start(ingest=MQTT_INGEST == "always")
             print("[MQTT] client loop started in Django process")
+
+            if MQTT_INGEST == "leader":
+                from .leader import AdvisoryLeader
+                _leader = AdvisoryLeader(
+                    "mqtt-ingest",
+                    on_elected=mqtt_client.start_ingest,
+                    on_lost=mqtt_client.stop_ingest,
+                    retry=MQTT_LEADER_RETRY,
+                )
+                _leader.start()
+                # zamknięcie workera: zwolnij lock od razu, nie po retry
+                atexit.register(_leader.stop)
         except Exception as e:
             print("[MQTT] start error:", e)
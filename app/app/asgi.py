@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# proces serwera www – app/apps.py startuje w nim klienta MQTT
+os.environ.setdefault('DJANGO_SERVER', 'asgi')
 
 application = get_asgi_application()
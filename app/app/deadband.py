@@ -0,0 +1,84 @@
+# app/deadband.py
+import threading
+import time
+
+# pole -> jednostka progu (mm dla czujników odległości, g dla wagi)
+FIELD_UNITS = {"d1_mm": "mm", "d2_mm": "mm", "weight_g": "g"}
+
+
+def exceeds(name, value, last, deadbands) -> bool:
+    """Czy zmiana last -> value przekracza próg dla pola name."""
+    if last is None:
+        return True
+    return abs(value - last) >= deadbands.get(FIELD_UNITS.get(name), 0.0)
+
+
+class PersistFilter:
+    """
+    Cache ostatnio zapisanych wartości per półka. Odczyt idzie do bazy
+    tylko, gdy któreś pole zmieniło się o co najmniej próg (deadband) albo
+    od ostatniego zapisu minęło max_staleness s – drgania czujnika
+    o kilka mm nie generują zapisów ShelfState ani ShelfReading.
+    Cache jest per proces; po restarcie pierwszy odczyt zawsze się zapisuje.
+    """
+
+    def __init__(self, deadbands=None, max_staleness=300.0):
+        self.deadbands = deadbands or {"mm": 2.0, "g": 5.0}
+        self.max_staleness = max_staleness
+        self._last = {}  # shelf -> ({pole: wartość}, monotonic zapisu)
+        self._lock = threading.Lock()
+        self._stats = {"persisted": 0, "suppressed": 0, "stale": 0}
+
+    def should_persist(self, shelf: int, fields: dict, now=None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            values, written_at = self._last.get(shelf, ({}, None))
+            changed = any(
+                exceeds(name, value, values.get(name), self.deadbands)
+                for name, value in fields.items()
+            )
+            stale = (
+                written_at is not None
+                and now - written_at >= self.max_staleness
+            )
+            if not (changed or stale):
+                self._stats["suppressed"] += 1
+                return False
+            self._last[shelf] = ({**values, **fields}, now)
+            self._stats["persisted"] += 1
+            if stale and not changed:
+                self._stats["stale"] += 1
+            return True
+
+    def forget(self, shelf=None):
+        """Czyści cache (np. po błędzie zapisu), wszystko albo jedną półkę."""
+        with self._lock:
+            if shelf is None:
+                self._last.clear()
+            else:
+                self._last.pop(shelf, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_filter = None
+_init_lock = threading.Lock()
+
+
+def get_persist_filter() -> PersistFilter:
+    """Wspólny dla procesu filtr zapisu skonfigurowany z settings."""
+    global _filter
+    if _filter is None:
+        from django.conf import settings
+        with _init_lock:
+            if _filter is None:
+                _filter = PersistFilter(
+                    {
+                        "mm": settings.TELEMETRY_DEADBAND_MM,
+                        "g": settings.TELEMETRY_DEADBAND_G,
+                    },
+                    max_staleness=settings.TELEMETRY_MAX_STALENESS,
+                )
+    return _filter
@@ -0,0 +1,116 @@
+# app/leader.py
+import threading
+import zlib
+
+from django.db import connections
+
+
+class AdvisoryLeader:
+    """
+    Wybór jednego procesu-właściciela spośród workerów gunicorna/uvicorna
+    przez pg_try_advisory_lock na osobnym połączeniu, trzymanym przez cały
+    czas życia procesu. Gdy właściciel zginie, Postgres zwalnia lock razem
+    z sesją, a pozostałe workery (próbujące co `retry` s) go przejmują.
+    Połączenie jest zawsze spoza puli (DB_POOL=1): close() na połączeniu
+    z puli oddałoby do niej sesję razem z lockiem.
+    Poza Postgresem (np. SQLite w dev) zawsze wygrywa bieżący proces.
+    """
+
+    def __init__(self, name, on_elected, on_lost=None, retry=15.0,
+                 alias="default"):
+        self.name = name
+        self.key = zlib.crc32(name.encode("utf-8"))
+        self.on_elected = on_elected
+        self.on_lost = on_lost
+        self.retry = retry
+        self.alias = alias
+        self._conn = None
+        self._stop_evt = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=f"leader-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+        self._release()
+
+    # ---------- wnętrze ----------
+    def _run(self):
+        while not self._stop_evt.is_set():
+            if self._conn is None:
+                if self._try_acquire():
+                    print(f"[LEADER] {self.name}: elected")
+                    self.on_elected()
+            elif not self._alive():
+                # połączenie z lockiem padło -> ktoś inny mógł go przejąć
+                print(f"[LEADER] {self.name}: lock lost")
+                self._release()
+                if self.on_lost is not None:
+                    self.on_lost()
+            self._stop_evt.wait(self.retry)
+
+    def _connect(self):
+        conn = connections.create_connection(self.alias)
+        options = conn.settings_dict.get("OPTIONS", {})
+        if "pool" in options:
+            # settings_dict jest współdzielony z connections – tylko kopia
+            conn.settings_dict = {
+                **conn.settings_dict,
+                "OPTIONS": {k: v for k, v in options.items() if k != "pool"},
+            }
+        return conn
+
+    def _try_acquire(self) -> bool:
+        conn = self._connect()
+        # stop() może zamknąć połączenie z innego wątku
+        conn.inc_thread_sharing()
+        if conn.vendor != "postgresql":
+            self._conn = conn
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s)", [self.key])
+                ok = cur.fetchone()[0]
+        except Exception as e:
+            print(f"[LEADER] {self.name}: lock error:", e)
+            ok = False
+        if ok:
+            self._conn = conn
+        else:
+            conn.close()
+        return ok
+
+    def _alive(self) -> bool:
+        if self._conn.vendor != "postgresql":
+            return True
+        try:
+            with self._conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def _release(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            if conn.vendor == "postgresql":
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_unlock(%s)", [self.key])
+        except Exception:
+            pass  # zerwane połączenie: lock zniknął razem z sesją
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -1,139 +1,201 @@
 # app/mqtt_client.py
-import os, json, threading, time, queue, re
+import os, json, threading, time, atexit
 from uuid import uuid4
 import paho.mqtt.client as mqtt
 
+from .deadband import get_persist_filter
+from .shelf_stream import get_broadcaster
+from .telemetry_codec import decode
+from .telemetry_writer import TelemetryWriter
+
 # ================== KONFIG ==================
 MQTT_HOST = os.getenv("MQTT_HOST", "mqtt")
 MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
 MQTT_USER = os.getenv("MQTT_USER", "backend")
 MQTT_PASS = os.getenv("MQTT_PASS", "backendpass")
 BASE = os.getenv("MQTT_BASE", "store")
+# prefiksy topiców wszystkich obsługiwanych sklepów (po przecinku);
+# mapowanie urządzeń na półki: db.SensorChannel
+STORES = [s.strip() for s in os.getenv("MQTT_STORES", BASE).split(",") if s.strip()]
+
+# zapis telemetrii w tle (patrz telemetry_writer.py)
+TELEM_FLUSH_INTERVAL = float(os.getenv("TELEM_FLUSH_INTERVAL", "1.0"))
+TELEM_BATCH_SIZE = int(os.getenv("TELEM_BATCH_SIZE", "500"))
+TELEM_QUEUE_SIZE = int(os.getenv("TELEM_QUEUE_SIZE", "10000"))
+TELEM_WRITERS = int(os.getenv("TELEM_WRITERS", "1"))
+# log każdej wiadomości telemetrii (przy dużym ruchu wyłączyć: 0)
+TELEM_LOG = os.getenv("TELEM_LOG", "1") == "1"
+# strumień SSE (products/stream.py): właściciel ingestu i widok HTTP
+# publikują zmiany półek (po progu) na STREAM_TOPIC, a każdy proces www
+# subskrybuje tylko ten topic – surową telemetrię czyta jeden proces
+SHELF_STREAM = os.getenv("SHELF_STREAM", "1") == "1"
+STREAM_PREFIX = f"{BASE}/stream/shelf/"
+STREAM_TOPIC = STREAM_PREFIX + "+"
+
+# po ilu sekundach brak ACK od wyświetlacza = timeout,
+# i jak długo trzymamy status dostarczenia w rejestrze
+ACK_TIMEOUT = float(os.getenv("MQTT_ACK_TIMEOUT", "10"))
+ACK_RETENTION = float(os.getenv("MQTT_ACK_RETENTION", "300"))
+# long-poll sprawdza cache co tyle s (ACK mógł trafić do innego procesu)
+ACK_POLL_INTERVAL = float(os.getenv("MQTT_ACK_POLL_INTERVAL", "0.5"))
 # ============================================
 
-_ack_waiters = {}
-_ack_lock = threading.Lock()
+# rejestr statusów dostarczenia: wpisy "display-ack:<msg_id>" ->
+# {status, shelf, sent_at, ...} we wspólnym cache (DISPLAY_ACK_CACHE_ALIAS),
+# wygasają po ACK_RETENTION; warunek budzi long-poll w tym procesie
+ACK_KEY_PREFIX = "display-ack:"
+_ack_cond = threading.Condition()
 _started_evt = threading.Event()
 _connected_evt = threading.Event()
+# czy ten proces subskrybuje i zapisuje telemetrię (jeden na wdrożenie)
+_ingest_evt = threading.Event()
 
-def _num(v):
-    if v is None:
-        return None
-    if isinstance(v, (int, float)):
-        return float(v)
-    s = str(v).replace(",", ".")
-    m = re.search(r"-?\d+(\.\d+)?", s)
-    return float(m.group(0)) if m else None
-
-def _shelf_from_topic(topic: str):
-    parts = topic.split("/")
-    try:
-        i = parts.index("shelf")
-        return int(parts[i+1])
-    except Exception:
-        return None
-
-def _save_single_shelf(data: dict, shelf: int):
-    """Zapis dla jednej półki wg reguł: 1->d1_mm, 2->d2_mm, 3->weight_g."""
-    from django.db import transaction, close_old_connections
-    from db.models import ShelfState
-
-    d1 = _num(data.get("d1_mm") or data.get("d1"))
-    d2 = _num(data.get("d2_mm") or data.get("d2"))
-    wg = _num(data.get("weight_g"))
-    if wg is None and data.get("weight_kg") is not None:
-        wk = _num(data.get("weight_kg"))
-        wg = wk * 1000.0 if wk is not None else None
-
-    defaults = {}
-    if shelf == 1 and d1 is not None:
-        defaults["d1_mm"] = d1
-    elif shelf == 2 and d2 is not None:
-        defaults["d2_mm"] = d2
-    elif shelf == 3 and wg is not None:
-        defaults["weight_g"] = wg
-
-    if not defaults:
-        print("[TELEM] brak wartości dla wybranej półki -> skip")
+_writer = TelemetryWriter(
+    flush_interval=TELEM_FLUSH_INTERVAL,
+    batch_size=TELEM_BATCH_SIZE,
+    max_queue=TELEM_QUEUE_SIZE,
+    concurrency=TELEM_WRITERS,
+)
+# liczba odebranych wiadomości telemetrii (raport mqtt_worker)
+_telemetry_msgs = 0
+# próg zmian dla publikacji na STREAM_TOPIC (bez subskrybentów); tworzony
+# leniwie z wątku paho albo wątku żądania, stąd lock
+_stream_source = None
+_stream_lock = threading.Lock()
+
+def configure_writer(**options):
+    """Podmienia konfigurację writera (np. z mqtt_worker), przed startem."""
+    global _writer
+    if _ingest_evt.is_set():
+        raise RuntimeError("telemetry ingest already started")
+    params = {
+        "flush_interval": TELEM_FLUSH_INTERVAL,
+        "batch_size": TELEM_BATCH_SIZE,
+        "max_queue": TELEM_QUEUE_SIZE,
+        "concurrency": TELEM_WRITERS,
+    }
+    params.update({k: v for k, v in options.items() if v is not None})
+    _writer = TelemetryWriter(**params)
+
+def publish_shelf_delta(shelf: int, fields: dict):
+    """
+    Zmiana stanu półki dla strumieni SSE wszystkich procesów: przez broker
+    (STREAM_TOPIC), a bez działającego klienta (MQTT_DISABLED, testy)
+    wprost do broadcastera tego procesu.
+    """
+    if not SHELF_STREAM:
+        return
+    if not _started_evt.is_set():
+        get_broadcaster().publish(shelf, fields)
         return
+    # drgania w granicach progu nie trafiają do brokera
+    event = _get_stream_source().publish(shelf, fields)
+    if event is None:
+        return
+    changed = {k: v for k, v in event.items() if k not in ("seq", "ts")}
+    _client.publish(
+        f"{STREAM_PREFIX}{shelf}", json.dumps(changed), qos=0, retain=False
+    )
+
+def _get_stream_source():
+    global _stream_source
+    if _stream_source is None:
+        from .shelf_stream import ShelfBroadcaster
+        with _stream_lock:
+            if _stream_source is None:
+                _stream_source = ShelfBroadcaster(get_broadcaster().deadbands)
+    return _stream_source
 
-    close_old_connections()
-    with transaction.atomic():
-        ShelfState.objects.update_or_create(shelf=shelf, defaults=defaults)
-
-def _save_batch_3_shelves(data: dict):
-    from django.db import transaction, close_old_connections
-    from db.models import ShelfState
-
-    d1 = _num(data.get("d1_mm") or data.get("d1"))
-    d2 = _num(data.get("d2_mm") or data.get("d2"))
-    wg = _num(data.get("weight_g"))
-    if wg is None and data.get("weight_kg") is not None:
-        wk = _num(data.get("weight_kg"))
-        wg = wk * 1000.0 if wk is not None else None
-
-    ops = []
-    if d1 is not None:
-        ops.append((1, {"d1_mm": d1}))
-    if d2 is not None:
-        ops.append((2, {"d2_mm": d2}))
-    if wg is not None:
-        ops.append((3, {"weight_g": wg}))
-
-    if not ops:
-        print("[TELEM] batch: brak danych do zapisu -> skip")
+def _enqueue(shelf: int, defaults: dict):
+    publish_shelf_delta(shelf, defaults)
+    if not _ingest_evt.is_set():
         return
+    # drgania czujnika w granicach progu nie idą do bazy (app/deadband.py)
+    persist_filter = get_persist_filter()
+    if not persist_filter.should_persist(shelf, defaults):
+        return
+    if not _writer.submit(shelf, defaults):
+        print(f"[TELEM] kolejka pełna -> drop shelf={shelf}")
+        # odczyt nie trafi do bazy: następny nie może zostać wycięty progiem
+        persist_filter.forget(shelf)
 
-    close_old_connections()
-    with transaction.atomic():
-        for shelf, defaults in ops:
-            ShelfState.objects.update_or_create(shelf=shelf, defaults=defaults)
+def _save_telemetry(topic: str, reading):
+    """
+    Kanały z rejestru (db/channels.py) wg topicu: .../shelf/<n>/telemetry
+    -> tylko półka n, .../device/<id>/telemetry -> wszystkie półki
+    urządzenia (albo tylko "shelf" z payloadu, jeśli podany).
+    """
+    from django.db import close_old_connections
+    from db.channels import get_registry
 
-def _save_telemetry(topic: str, data: dict):
-    shelf = _shelf_from_topic(topic)
+    registry = get_registry()
+    if registry.is_stale():
+        # wątek sieciowy paho nie ma granic żądań (jak wątek zapisu):
+        # zepsute/przeterminowane połączenie zamykamy przed przeładowaniem
+        close_old_connections()
+    channels, shelf = registry.for_topic(topic)
     if shelf is None:
-        s = data.get("shelf")
-        try:
-            shelf = int(float(str(s))) if s is not None else None
-        except Exception:
-            shelf = None
+        shelf = reading.shelf
+
+    values = registry.decode(channels, reading.values, shelf=shelf)
+    if not values:
+        print(f"[TELEM] brak wartości dla znanych kanałów -> skip ({topic})")
+        return
+
+    for shelf, defaults in values.items():
+        _enqueue(shelf, defaults)
 
-    if shelf in (1, 2, 3):
-        _save_single_shelf(data, shelf)
-    else:
-        _save_batch_3_shelves(data)
+TELEMETRY_TOPICS = [
+    topic
+    for store in STORES
+    for topic in (
+        (f"{store}/device/+/telemetry", 0),  # obecny ESP topic
+        (f"{store}/shelf/+/telemetry", 0),   # ewentualnie docelowy topic
+    )
+]
 
 def _on_connect(client, userdata, flags, reason_code, properties=None):
     print("[MQTT] Connected:", reason_code)
-    client.subscribe(f"{BASE}/shelf/+/display/ack", qos=1)
-    client.subscribe(f"{BASE}/device/+/telemetry", qos=0)  # obecny ESP topic
-    client.subscribe(f"{BASE}/shelf/+/telemetry", qos=0)   # ewentualnie docelowy topic
+    client.subscribe([(f"{store}/shelf/+/display/ack", 1) for store in STORES])
+    if _ingest_evt.is_set():
+        client.subscribe(TELEMETRY_TOPICS)
+    if SHELF_STREAM:
+        client.subscribe(STREAM_TOPIC, 0)
     _connected_evt.set()
 
 def _on_message(client, userdata, msg):
+    global _telemetry_msgs
     topic = msg.topic
     try:
-        data = json.loads(msg.payload.decode("utf-8"))
-    except Exception as e:
-        print("[MQTT] Bad JSON:", e, "topic:", topic)
+        reading = decode(msg.payload)  # JSON albo binarny (telemetry_codec)
+    except ValueError as e:
+        print("[MQTT] Bad payload:", e, "topic:", topic)
+        return
+
+    # STRUMIEŃ SSE: zmiany już po progu, od właściciela ingestu lub widoku
+    if topic.startswith(STREAM_PREFIX):
+        if reading.shelf is not None and SHELF_STREAM:
+            get_broadcaster().publish(reading.shelf, reading.values)
         return
 
     # ACK
-    mid = data.get("msg_id")
+    mid = reading.msg_id
     if mid:
-        with _ack_lock:
-            q = _ack_waiters.get(mid)
-        if q:
-            q.put(data)
+        try:
+            _record_ack(mid, reading)
+        except Exception as e:
+            print("[MQTT] ack store error:", e)
 
     # TELEMETRIA
-    if topic.endswith("/telemetry"):
-        print(
-            f"[TELEM] topic={topic} device={data.get('device','?')} ts={data.get('ts')}"
-            f" d1={data.get('d1_mm')} d2={data.get('d2_mm')} weight={data.get('weight_g')}"
-        )
+    if topic.endswith("/telemetry") and _ingest_evt.is_set():
+        _telemetry_msgs += 1  # tylko z wątku sieciowego paho
+        if TELEM_LOG:
+            print(
+                f"[TELEM] topic={topic} device={reading.device or '?'}"
+                f" ts={reading.ts} values={reading.values}"
+            )
         try:
-            _save_telemetry(topic, data)
+            _save_telemetry(topic, reading)
         except Exception as e:
             print("[TELEM] save error:", e)
 
@@ -142,21 +204,118 @@ _client.username_pw_set(MQTT_USER, MQTT_PASS)
 _client.on_connect = _on_connect
 _client.on_message = _on_message
 
-def start():
+def start(ingest=True):
+    """
+    Startuje klienta MQTT (publikacja na wyświetlacze + ACK).
+    ingest=False: bez subskrypcji telemetrii – tak działają workery www,
+    które nie są właścicielem zapisu (patrz app/apps.py).
+    """
+    if ingest:
+        start_ingest()
     if _started_evt.is_set():
         return
     _started_evt.set()
+    atexit.register(stop)
     _client.reconnect_delay_set(min_delay=1, max_delay=30)
     _client.connect_async(MQTT_HOST, MQTT_PORT, keepalive=30)
     _client.loop_start()
     print("[MQTT] client loop started")
 
-def _wait_connected(timeout=5.0):
-    _connected_evt.wait(timeout=timeout)
-    return _connected_evt.is_set()
+def start_ingest():
+    """Ten proces przejmuje subskrypcję i zapis telemetrii."""
+    if _ingest_evt.is_set():
+        return
+    _writer.start()
+    _ingest_evt.set()
+    if _connected_evt.is_set():
+        _client.subscribe(TELEMETRY_TOPICS)
+    print("[MQTT] telemetry ingest started")
+
+def stop_ingest():
+    if not _ingest_evt.is_set():
+        return
+    _ingest_evt.clear()
+    _client.unsubscribe([t for t, _ in TELEMETRY_TOPICS])
+    _writer.stop(drain=True)
+    print("[MQTT] telemetry ingest stopped, writer stats:", _writer.stats())
+
+def stop():
+    """Zatrzymuje pętlę MQTT i dopisuje do bazy to, co zostało w kolejce."""
+    if not _started_evt.is_set():
+        return
+    _started_evt.clear()
+    _client.disconnect()
+    _client.loop_stop()
+    stop_ingest()
+    print("[MQTT] stopped")
+
+def telemetry_stats() -> dict:
+    stats = _writer.stats()
+    stats["messages"] = _telemetry_msgs
+    for key, value in get_persist_filter().stats().items():
+        stats[f"deadband_{key}"] = value
+    return stats
+
+def flush_latencies(reset=True) -> list:
+    return _writer.flush_latencies(reset=reset)
+
+def _ack_cache():
+    from django.conf import settings
+    from django.core.cache import caches
+    return caches[settings.DISPLAY_ACK_CACHE_ALIAS]
+
+def _save_ack_entry(msg_id: str, entry: dict):
+    _ack_cache().set(ACK_KEY_PREFIX + msg_id, entry, timeout=ACK_RETENTION)
+    with _ack_cond:
+        _ack_cond.notify_all()
 
-def publish_product_to_shelf(product, shelf: int, retain=True, timeout=10.0):
-    _wait_connected(3.0)
+def _record_ack(msg_id: str, reading):
+    # ACK odbierają wszystkie procesy; komendę mógł wysłać inny worker,
+    # więc wpis może jeszcze nie istnieć
+    entry = _ack_cache().get(ACK_KEY_PREFIX + msg_id) or {
+        "shelf": reading.shelf,
+        "sent_at": time.time(),
+        "sent": None,
+    }
+    entry["status"] = "acked"
+    entry["ack"] = reading.raw
+    _save_ack_entry(msg_id, entry)
+
+def _ack_snapshot(msg_id: str, entry: dict, now: float) -> dict:
+    status = entry["status"]
+    if status == "pending" and now - entry["sent_at"] > ACK_TIMEOUT:
+        status = "timeout"
+    out = {"msg_id": msg_id, "status": status, "shelf": entry["shelf"],
+           "sent": entry["sent"]}
+    if entry.get("ack") is not None:
+        out["ack"] = entry["ack"]
+    return out
+
+def delivery_status(msg_id: str, wait: float = 0.0):
+    """
+    Status dostarczenia komendy na wyświetlacz (pending/acked/timeout/error),
+    None gdy msg_id nieznany lub wygasł. wait > 0 = long-poll: czekamy
+    maksymalnie tyle sekund na zmianę statusu z pending.
+    """
+    deadline = time.time() + max(0.0, wait)
+    while True:
+        entry = _ack_cache().get(ACK_KEY_PREFIX + msg_id)
+        if entry is None:
+            return None
+        now = time.time()
+        snap = _ack_snapshot(msg_id, entry, now)
+        left = min(deadline, entry["sent_at"] + ACK_TIMEOUT) - now
+        if snap["status"] != "pending" or left <= 0:
+            return snap
+        with _ack_cond:
+            _ack_cond.wait(timeout=min(left, ACK_POLL_INTERVAL))
+
+def publish_product_to_shelf(product, shelf: int):
+    """
+    Wysyła komendę na wyświetlacz półki i od razu zwraca
+    {"status": "pending", "msg_id": ...}. ACK z ESP trafia do rejestru,
+    skąd odczytuje go delivery_status().
+    """
     msg_id = str(uuid4())
     payload = {
         "msg_id": msg_id,
@@ -167,17 +326,29 @@ def publish_product_to_shelf(product, shelf: int, retain=True, timeout=10.0):
         "currency": "PLN",
         "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
     }
-    topic = f"{BASE}/shelf/{shelf}/display/cmd"
+    # price2 bez promo_active to poprzednia cena regularna, nie promocja
+    if product.promo_active and product.price2 is not None:
+        payload["promo_price"] = float(product.price2)
+    from db.channels import get_registry
+
+    store = get_registry().store_for_shelf(shelf) or BASE
+    topic = f"{store}/shelf/{shelf}/display/cmd"
     print(f"[MQTT] publish -> {topic} {json.dumps(payload, ensure_ascii=False)}")
 
-    q = queue.Queue()
-    with _ack_lock:
-        _ack_waiters[msg_id] = q
-    try:
-        _client.publish(topic, json.dumps(payload), qos=1, retain=False)
-        return q.get(timeout=timeout)
-    except queue.Empty:
-        return {"status": "timeout", "msg_id": msg_id}
-    finally:
-        with _ack_lock:
-            _ack_waiters.pop(msg_id, None)
+    entry = {
+        "status": "pending",
+        "shelf": shelf,
+        "sent_at": time.time(),
+        "sent": payload["ts"],
+    }
+    _save_ack_entry(msg_id, entry)
+
+    # bez połączenia paho i tak kolejkuje wiadomość QoS1 do wysłania
+    # po reconnect, więc NO_CONN nie jest błędem; bez retain – komenda ma
+    # własny msg_id/ACK, broker nie powinien jej odtwarzać po restarcie ESP
+    info = _client.publish(topic, json.dumps(payload), qos=1, retain=False)
+    if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN):
+        entry["status"] = "error"
+        _save_ack_entry(msg_id, entry)
+        return {"status": "error", "msg_id": msg_id}
+    return {"status": "pending", "msg_id": msg_id}
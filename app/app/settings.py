@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'db',
     'products',
     'users',
@@ -69,13 +70,77 @@ CORS_ALLOWED_ORIGINS = [
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
 }
 
+# Sposób doklejania telemetrii do listy produktów (products.views.with_telemetry):
+#   "map"      – jedno zapytanie o wszystkie ShelfState + mapa w Pythonie
+#   "subquery" – skorelowane podzapytania per wiersz
+PRODUCT_TELEMETRY_STRATEGY = os.environ.get("PRODUCT_TELEMETRY_STRATEGY", "map")
+
+
+# Wyszukiwarka produktów (products/filters.py::ProductSearchFilter):
+#   "fts"   – pełnotekstowe po Product.search_vector (GIN), z rankingiem
+#   "ilike" – stare ILIKE '%term%' po trzech kolumnach
+PRODUCT_SEARCH_BACKEND = os.environ.get("PRODUCT_SEARCH_BACKEND", "fts")
+# czy publiczny /api/products/product_view/ przyjmuje ?search=
+PRODUCT_PUBLIC_SEARCH = os.environ.get("PRODUCT_PUBLIC_SEARCH") == "1"
+
+
+# Cache (domyślnie lokalna pamięć procesu; dla wielu procesów ustaw np.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache + CACHE_LOCATION)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# publiczny katalog produktów (products/cache.py)
+CATALOGUE_CACHE_ALIAS = os.environ.get("CATALOGUE_CACHE_ALIAS", "default")
+CATALOGUE_CACHE_TIMEOUT = int(os.environ.get("CATALOGUE_CACHE_TIMEOUT", "300"))
+
+# jak długo kalibracje półek żyją w pamięci procesu (products/availability.py)
+SHELF_CALIBRATION_TTL = float(os.environ.get("SHELF_CALIBRATION_TTL", "60"))
+
+# jak długo rejestr kanałów czujników (db/channels.py) żyje w pamięci procesu
+SENSOR_REGISTRY_TTL = float(os.environ.get("SENSOR_REGISTRY_TTL", "60"))
+
+# zapis telemetrii (app/deadband.py): odczyt trafia do bazy, gdy zmieni się
+# o co najmniej próg albo od ostatniego zapisu minie TELEMETRY_MAX_STALENESS s
+TELEMETRY_DEADBAND_MM = float(os.environ.get("TELEMETRY_DEADBAND_MM", "2"))
+TELEMETRY_DEADBAND_G = float(os.environ.get("TELEMETRY_DEADBAND_G", "5"))
+TELEMETRY_MAX_STALENESS = float(os.environ.get("TELEMETRY_MAX_STALENESS", "300"))
+
+# strumień SSE stanu półek (products/stream.py, app/shelf_stream.py):
+# minimalna zmiana wartości, która generuje zdarzenie, bufor na klienta
+# (zdarzenia ponad limit wypadają od najstarszych) i co ile s keep-alive
+SHELF_STREAM_DEADBAND_MM = float(os.environ.get("SHELF_STREAM_DEADBAND_MM", "2"))
+SHELF_STREAM_DEADBAND_G = float(os.environ.get("SHELF_STREAM_DEADBAND_G", "5"))
+SHELF_STREAM_BUFFER = int(os.environ.get("SHELF_STREAM_BUFFER", "100"))
+SHELF_STREAM_KEEPALIVE = float(os.environ.get("SHELF_STREAM_KEEPALIVE", "15"))
+# pod WSGI każdy klient trzyma wątek workera: limit strumieni na proces
+# (0 = strumień tylko przez ASGI); pod ASGI bez limitu
+SHELF_STREAM_WSGI_MAX = int(os.environ.get("SHELF_STREAM_WSGI_MAX", "2"))
+
+# statusy dostarczenia komend na wyświetlacze (app/mqtt_client.py) –
+# wspólne dla workerów, jeśli cache jest wspólny (Redis/Memcached)
+DISPLAY_ACK_CACHE_ALIAS = os.environ.get("DISPLAY_ACK_CACHE_ALIAS", "default")
+
+# cache tokenów API (users.authentication); 0 wyłącza. Działa tylko ze
+# wspólnym cache (CACHE_BACKEND=Redis/Memcached, profil prod); na LocMem –
+# tylko gdy AUTH_TOKEN_CACHE_ALLOW_LOCAL=1 (pojedynczy proces, runserver
+# w docker-compose.yml)
+AUTH_TOKEN_CACHE_ALIAS = os.environ.get("AUTH_TOKEN_CACHE_ALIAS", "default")
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("AUTH_TOKEN_CACHE_TTL", "60"))
+AUTH_TOKEN_CACHE_ALLOW_LOCAL = os.environ.get("AUTH_TOKEN_CACHE_ALLOW_LOCAL") == "1"
+
 
 from corsheaders.defaults import default_headers
 
@@ -83,6 +148,8 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
     'Authorization',
 ]
 
+CORS_EXPOSE_HEADERS = ['ETag', 'X-Display-Msg-Id']
+
 
 ROOT_URLCONF = 'app.urls'
 
@@ -115,13 +182,43 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # połączenia trwałe: jedno na wątek, zamykane po DB_CONN_MAX_AGE s
+        # (0 = nowe połączenie na każde żądanie, jak dawniej); health check
+        # sprawdza je na początku żądania, więc restart bazy nie kończy się
+        # błędem pierwszego zapytania. Dotyczy też wątków zapisu MQTT.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {},
     }
 }
 
+# DB_POOL=1: pula psycopg 3 po stronie Django (Django >= 5.1, pakiet
+# psycopg[pool]); wyklucza CONN_MAX_AGE. Przy psycopg2 zostają połączenia
+# trwałe albo zewnętrzny PgBouncer (DB_HOST wskazuje wtedy na niego).
+if os.environ.get('DB_POOL') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
+# Koszt hashowania haseł per środowisko: PASSWORD_HASH_ITERATIONS
+# (puste = domyślna liczba iteracji PBKDF2 Django). W testach i benchmarkach
+# można ustawić np. 1000; w produkcji zostawić domyślną lub wyższą.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", "0"))
+PASSWORD_HASHERS = [
+    "users.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
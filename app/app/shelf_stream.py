@@ -0,0 +1,116 @@
+# app/shelf_stream.py
+import threading
+import time
+from collections import deque
+
+from .deadband import exceeds
+
+
+class Subscriber:
+    """
+    Klient strumienia: ograniczony bufor zdarzeń (najstarsze wypadają,
+    gdy klient nie nadąża) i callback budzący wątek/pętlę, która go czyta.
+    """
+
+    def __init__(self, maxlen, shelves=None, wake=None):
+        self.buffer = deque(maxlen=maxlen)
+        self.shelves = set(shelves) if shelves else None
+        self.dropped = 0
+        self._wake = wake
+        self._lock = threading.Lock()
+
+    def push(self, event):
+        with self._lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(event)
+        if self._wake is not None:
+            self._wake()
+
+    def pop_all(self):
+        """(zdarzenia, ile wypadło od ostatniego odczytu)."""
+        with self._lock:
+            events = list(self.buffer)
+            self.buffer.clear()
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+
+class ShelfBroadcaster:
+    """
+    Rozsyła zmiany stanu półek do subskrybentów (SSE). Zdarzenie powstaje
+    tylko, gdy wartość zmieniła się o co najmniej próg (deadband) względem
+    ostatnio wysłanej; drobny szum czujników nie generuje ruchu.
+    """
+
+    def __init__(self, deadbands=None):
+        self.deadbands = deadbands or {"mm": 2.0, "g": 5.0}
+        self._subs = set()
+        self._last = {}  # (shelf, pole) -> ostatnio wysłana wartość
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "suppressed": 0, "events": 0,
+                       "delivered": 0}
+
+    def subscribe(self, maxlen=100, shelves=None, wake=None) -> Subscriber:
+        sub = Subscriber(maxlen, shelves=shelves, wake=wake)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, shelf: int, fields: dict):
+        """Odczyt z MQTT/HTTP; zwraca wysłane zdarzenie albo None."""
+        with self._lock:
+            self._stats["published"] += 1
+            changed = {}
+            for name, value in fields.items():
+                if value is None:
+                    continue
+                last = self._last.get((shelf, name))
+                if exceeds(name, value, last, self.deadbands):
+                    changed[name] = value
+                    self._last[(shelf, name)] = value
+            if not changed:
+                self._stats["suppressed"] += 1
+                return None
+            self._seq += 1
+            event = {"seq": self._seq, "shelf": shelf, "ts": time.time(),
+                     **changed}
+            targets = [
+                s for s in self._subs
+                if s.shelves is None or shelf in s.shelves
+            ]
+            self._stats["events"] += 1
+            self._stats["delivered"] += len(targets)
+
+        for sub in targets:
+            sub.push(event)
+        return event
+
+    def stats(self) -> dict:
+        with self._lock:
+            snap = dict(self._stats)
+            snap["subscribers"] = len(self._subs)
+        return snap
+
+
+_broadcaster = None
+_init_lock = threading.Lock()
+
+
+def get_broadcaster() -> ShelfBroadcaster:
+    """Wspólny dla procesu broadcaster skonfigurowany z settings."""
+    global _broadcaster
+    if _broadcaster is None:
+        from django.conf import settings
+        with _init_lock:
+            if _broadcaster is None:
+                _broadcaster = ShelfBroadcaster({
+                    "mm": settings.SHELF_STREAM_DEADBAND_MM,
+                    "g": settings.SHELF_STREAM_DEADBAND_G,
+                })
+    return _broadcaster
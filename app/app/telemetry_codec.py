@@ -0,0 +1,175 @@
+# app/telemetry_codec.py
+"""
+Dekodowanie telemetrii półek: payload MQTT/HTTP -> Reading w jednym
+przejściu. Obsługiwane formaty:
+
+- JSON: {"device": "esp32-1", "ts": ..., "shelf": 1, "d1_mm": "571 mm", ...};
+  wartości mogą być liczbami albo napisami z jednostką / przecinkiem,
+- binarny (dla urządzeń z małym łączem), little-endian:
+    B   0xB1 (znacznik formatu)
+    H   półka (0 = brak, półki urządzenia wg db.SensorChannel)
+    I   ts, sekundy epoki (0 = brak)
+    powtarzane do końca: B długość klucza, klucz ASCII, f wartość (float32)
+  np. encode_binary({"d1_mm": 571, "weight_g": 1600}, ts=...) = 30 B
+  zamiast 50 B JSON-a.
+"""
+import json
+import math
+import re
+import struct
+
+BINARY_MAGIC = 0xB1
+_MAGIC_BYTE = bytes([BINARY_MAGIC])
+_HEADER = struct.Struct("<BHI")
+_KEY_LEN = struct.Struct("<B")
+_VALUE = struct.Struct("<f")
+
+# jedyna akceptowana postać liczby: bez wykładnika, "_", nan/inf
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+# pola payloadu, które nie są odczytami czujników
+META_KEYS = frozenset({"msg_id", "device", "ts", "shelf"})
+
+
+class Reading:
+    """Zdekodowana wiadomość: values = {klucz: float} (tylko liczby)."""
+    __slots__ = ("shelf", "device", "ts", "msg_id", "values", "raw")
+
+    def __init__(self, values, shelf=None, device=None, ts=None,
+                 msg_id=None, raw=None):
+        self.values = values
+        self.shelf = shelf
+        self.device = device
+        self.ts = ts
+        self.msg_id = msg_id
+        self.raw = raw
+
+    def __repr__(self):
+        return f"Reading(shelf={self.shelf}, values={self.values})"
+
+
+def parse_number(v):
+    """
+    '571 mm' / '3,6 g' / 42 -> float; None, jeśli nie ma skończonej liczby.
+    Z napisu bierzemy pierwsze dopasowanie _NUMBER ("1e5" -> 1.0).
+    """
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return _finite(v)
+    return _parse_text(v if isinstance(v, str) else str(v))
+
+
+def _parse_text(s):
+    if "," in s:
+        s = s.replace(",", ".")
+    # "571", "571 mm", "-3.6 g": same cyfry (z '-' i jedną kropką w środku)
+    # przed spacją -> wprost float(); "1e5", "1_000", "nan", ".5" czy "+5"
+    # przyjąłby float(), ale gramatyka _NUMBER daje co innego -> regex
+    head = s.partition(" ")[0]
+    digits = head[1:] if head[:1] == "-" else head
+    if digits[:1] != "." and digits.replace(".", "", 1).isdigit():
+        try:
+            return _finite(float(head))
+        except ValueError:  # cyfry spoza ASCII, np. "²"
+            pass
+    m = _NUMBER.search(s)
+    return float(m.group(0)) if m else None
+
+
+def _finite(v):
+    try:
+        v = float(v)
+    except OverflowError:  # int spoza zakresu float
+        return None
+    return v if math.isfinite(v) else None
+
+
+def parse_shelf(v):
+    n = parse_number(v)
+    return int(n) if n is not None else None
+
+
+def parse_values(data) -> dict:
+    """{klucz: float} dla pól odczytów (bez META_KEYS i nieliczbowych)."""
+    out = {}
+    for key, raw in data.items():
+        t = type(raw)
+        if t is float:
+            # json.loads przyjmuje NaN/Infinity
+            if key not in META_KEYS and math.isfinite(raw):
+                out[key] = raw
+            continue
+        if t is str:
+            if key not in META_KEYS:
+                value = _parse_text(raw)
+                if value is not None:
+                    out[key] = value
+            continue
+        if t is int:
+            if key not in META_KEYS:
+                value = _finite(raw)
+                if value is not None:
+                    out[key] = value
+            continue
+        if raw is None or t is dict or t is list or key in META_KEYS:
+            continue
+        value = parse_number(raw)
+        if value is not None:
+            out[key] = value
+    return out
+
+
+def decode_json(payload) -> Reading:
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode("utf-8")  # json.loads nie zgaduje kodowania
+    data = json.loads(payload)
+    if not isinstance(data, dict):
+        raise ValueError("payload is not a JSON object")
+    shelf = data.get("shelf")
+    return Reading(
+        parse_values(data),
+        None if shelf is None else parse_shelf(shelf),
+        data.get("device"),
+        data.get("ts"),
+        data.get("msg_id"),
+        data,
+    )
+
+
+def decode_binary(payload) -> Reading:
+    try:
+        _, shelf, ts = _HEADER.unpack_from(payload, 0)
+        pos, end = _HEADER.size, len(payload)
+        values = {}
+        while pos < end:
+            n = payload[pos]
+            key = payload[pos + 1:pos + 1 + n].decode("ascii")
+            (value,) = _VALUE.unpack_from(payload, pos + 1 + n)
+            pos += 1 + n + _VALUE.size
+            if math.isfinite(value):
+                # float32 -> 2 miejsca po przecinku (470.3, nie 470.2999...)
+                values[key] = round(value, 2)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"bad binary payload: {e}") from None
+
+    shelf = shelf or None
+    ts = ts or None
+    return Reading(
+        values, shelf, None, ts, None, {"shelf": shelf, "ts": ts, **values}
+    )
+
+
+def decode(payload) -> Reading:
+    """Format po pierwszym bajcie; ValueError dla niepoprawnego payloadu."""
+    if payload[:1] == _MAGIC_BYTE:
+        return decode_binary(payload)
+    return decode_json(payload)
+
+
+def encode_binary(values: dict, shelf=None, ts=None) -> bytes:
+    parts = [_HEADER.pack(BINARY_MAGIC, shelf or 0, int(ts or 0))]
+    for key, value in values.items():
+        k = key.encode("ascii")
+        parts.append(_KEY_LEN.pack(len(k)) + k + _VALUE.pack(value))
+    return b"".join(parts)
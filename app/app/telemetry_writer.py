@@ -0,0 +1,200 @@
+# app/telemetry_writer.py
+import queue
+import threading
+import time
+from collections import deque
+
+from django.utils import timezone
+
+
+class TelemetryWriter:
+    """
+    Zapis telemetrii w tle, poza wątkiem sieciowym paho.
+
+    Odczyty trafiają do ograniczonej kolejki, w obrębie okna flush są
+    scalane per półka (ostatnia wartość wygrywa), a potem zapisywane
+    jednym wielowierszowym upsertem na ShelfState. Historia (ShelfReading)
+    dostaje wszystkie odczyty z okna, bez scalania.
+
+    concurrency > 1: tyle wątków zapisujących, każdy z własną kolejką
+    i połączeniem z bazą; półka trafia zawsze do tej samej kolejki
+    (shelf % concurrency), więc kolejność zapisów per półka jest zachowana.
+    """
+
+    def __init__(self, flush_interval=1.0, batch_size=500, max_queue=10000,
+                 concurrency=1):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self._queues = [
+            queue.Queue(maxsize=max_queue) for _ in range(self.concurrency)
+        ]
+        self._stop_evt = threading.Event()
+        self._threads = []
+        # czasy ostatnich flushy (s) do raportu opóźnienia zapisu
+        self._flush_times = deque(maxlen=1024)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "dropped": 0,      # kolejka pełna -> odczyt odrzucony
+            "coalesced": 0,    # odczyt nadpisany nowszym w tym samym oknie
+            "flushes": 0,
+            "flushed_rows": 0,
+            "errors": 0,       # nieudane próby zapisu (też ponowione)
+            "lost_rows": 0,    # półki z okna, którego nie udało się zapisać
+        }
+
+    # ---------- API ----------
+    def submit(self, shelf: int, fields: dict) -> bool:
+        """Nieblokujące dodanie odczytu; False gdy kolejka jest pełna."""
+        try:
+            self._queues[shelf % self.concurrency].put_nowait(
+                (shelf, fields, timezone.now())
+            )
+        except queue.Full:
+            self._incr("dropped")
+            return False
+        self._incr("enqueued")
+        return True
+
+    def start(self):
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop_evt.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._run, args=(q,),
+                name=f"telemetry-writer-{i}", daemon=True,
+            )
+            for i, q in enumerate(self._queues)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, drain=True, timeout=5.0):
+        self._stop_evt.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+        if drain:
+            self.drain()
+
+    def drain(self):
+        """Synchronicznie zapisuje wszystko, co zostało w kolejkach."""
+        for q in self._queues:
+            while True:
+                pending, readings = self._collect(q, block=False)
+                if not pending:
+                    break
+                self._flush(pending, readings)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            snap = dict(self._stats)
+        snap["queue_size"] = sum(q.qsize() for q in self._queues)
+        return snap
+
+    def flush_latencies(self, reset=True) -> list:
+        """Czasy flushy (s) od ostatniego wywołania (reset=True)."""
+        with self._stats_lock:
+            out = list(self._flush_times)
+            if reset:
+                self._flush_times.clear()
+        return out
+
+    # ---------- wnętrze ----------
+    def _incr(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _run(self, q):
+        while not self._stop_evt.is_set():
+            pending, readings = self._collect(q, block=True)
+            if pending:
+                self._flush(pending, readings)
+
+    def _collect(self, q, block: bool):
+        pending = {}
+        readings = []
+        deadline = time.monotonic() + self.flush_interval
+        n = 0
+        while n < self.batch_size:
+            try:
+                if block:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    shelf, fields, ts = q.get(timeout=left)
+                else:
+                    shelf, fields, ts = q.get_nowait()
+            except queue.Empty:
+                break
+            n += 1
+            for field, value in fields.items():
+                readings.append((shelf, field, ts, value))
+            if shelf in pending:
+                pending[shelf].update(fields)
+                self._incr("coalesced")
+            else:
+                pending[shelf] = dict(fields)
+        return pending, readings
+
+    def _flush(self, pending: dict, readings: list):
+        from django.db import transaction, close_old_connections
+        from db.models import ShelfState
+        from db.telemetry import record_readings
+        from products.cache import bump_catalogue_version
+
+        # upsert nadpisuje tylko kolumny z update_fields, więc wiersze
+        # grupujemy po zestawie pól, żeby nie wyzerować pozostałych kolumn
+        groups = {}
+        for shelf, fields in pending.items():
+            key = tuple(sorted(fields))
+            obj = ShelfState(shelf=shelf, **fields)
+            groups.setdefault(key, []).append(obj)
+
+        # granica "żądania" dla wątku zapisu, jak request_started w www:
+        # przy CONN_MAX_AGE > 0 połączenie jest używane ponownie (z health
+        # checkiem), przy 0 lub puli – zamykane/oddawane
+        close_old_connections()
+        started = time.monotonic()
+        for attempt in (1, 2):
+            try:
+                with transaction.atomic():
+                    for names, objs in groups.items():
+                        ShelfState.objects.bulk_create(
+                            objs,
+                            update_conflicts=True,
+                            unique_fields=["shelf"],
+                            update_fields=[*names, "updated_at"],
+                        )
+                    record_readings(readings)
+                break
+            except Exception as e:
+                self._incr("errors")
+                print(f"[TELEM] flush error (attempt {attempt}):", e)
+                # najczęściej zerwane połączenie (restart bazy, failover):
+                # niezdatne do użytku zamykamy, druga próba idzie na nowym
+                close_old_connections()
+        else:
+            self._lost(pending, readings)
+            return
+
+        bump_catalogue_version()
+        with self._stats_lock:
+            self._flush_times.append(time.monotonic() - started)
+        self._incr("flushes")
+        self._incr("flushed_rows", len(pending))
+
+    def _lost(self, pending: dict, readings: list):
+        """Okno nie zapisało się też za drugim razem: ślad w logu."""
+        self._incr("lost_rows", len(pending))
+        stamps = [ts.isoformat() for _, _, ts, _ in readings] or ["-"]
+        print(
+            f"[TELEM] flush failed, lost shelves={sorted(pending)} "
+            f"readings={len(readings)} from={min(stamps)} to={max(stamps)}"
+        )
+        # te wartości nie trafiły do bazy – następny odczyt ma się zapisać
+        from .deadband import get_persist_filter
+        for shelf in pending:
+            get_persist_filter().forget(shelf)
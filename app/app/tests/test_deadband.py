@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from app.deadband import PersistFilter
+
+
+class PersistFilterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.filter = PersistFilter({"mm": 2.0, "g": 5.0}, max_staleness=60)
+
+    def test_jitter_within_deadband_is_suppressed(self):
+        self.assertTrue(self.filter.should_persist(1, {"d1_mm": 400.0}, 0))
+        for value in (401.0, 399.5, 401.9):
+            self.assertFalse(
+                self.filter.should_persist(1, {"d1_mm": value}, 1)
+            )
+        self.assertTrue(self.filter.should_persist(1, {"d1_mm": 402.0}, 2))
+
+        self.assertEqual(
+            self.filter.stats(),
+            {"persisted": 2, "suppressed": 3, "stale": 0},
+        )
+
+    def test_max_staleness_forces_write(self):
+        reading = {"weight_g": 1501.0}
+        self.filter.should_persist(3, {"weight_g": 1500.0}, 0)
+        self.assertFalse(self.filter.should_persist(3, reading, 59))
+        self.assertTrue(self.filter.should_persist(3, reading, 60))
+        self.assertEqual(self.filter.stats()["stale"], 1)
+
+    def test_shelves_are_independent_and_forget_resets(self):
+        self.filter.should_persist(1, {"d1_mm": 400.0}, 0)
+        self.assertTrue(self.filter.should_persist(2, {"d2_mm": 400.0}, 0))
+
+        self.filter.forget(1)
+        self.assertTrue(self.filter.should_persist(1, {"d1_mm": 400.0}, 1))
@@ -0,0 +1,104 @@
+import json
+import threading
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+import paho.mqtt.client as mqtt
+from django.core.cache import cache
+from django.test import TestCase
+
+from app import mqtt_client
+from db.models import Product
+from products.serializers import shift_price1
+
+ACK_TOPIC = "store/shelf/1/display/ack"
+
+
+def _ack(msg_id):
+    payload = json.dumps({"msg_id": msg_id, "shelf": 1, "ok": True})
+    return SimpleNamespace(topic=ACK_TOPIC, payload=payload.encode())
+
+
+class DisplayAckTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        product = SimpleNamespace(
+            name="Mleko", country_of_origin="PL", price1=3.99, price2=None,
+            promo_active=False,
+        )
+        publish = mock.patch.object(
+            mqtt_client._client, "publish",
+            return_value=SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS),
+        )
+        self.publish = publish.start()
+        self.addCleanup(publish.stop)
+        self.msg_id = mqtt_client.publish_product_to_shelf(
+            product, shelf=1
+        )["msg_id"]
+
+    def test_display_command_is_not_retained(self):
+        _, kwargs = self.publish.call_args
+        self.assertEqual((kwargs["qos"], kwargs["retain"]), (1, False))
+
+    def test_status_lives_in_shared_cache(self):
+        self.assertEqual(
+            mqtt_client.delivery_status(self.msg_id)["status"], "pending"
+        )
+        self.assertIn(mqtt_client.ACK_KEY_PREFIX + self.msg_id, cache)
+
+        mqtt_client._on_message(None, None, _ack(self.msg_id))
+
+        res = mqtt_client.delivery_status(self.msg_id)
+        self.assertEqual(res["status"], "acked")
+        self.assertEqual(res["sent"], cache.get(
+            mqtt_client.ACK_KEY_PREFIX + self.msg_id
+        )["sent"])
+
+    def test_long_poll_wakes_on_ack(self):
+        timer = threading.Timer(
+            0.1, mqtt_client._on_message, (None, None, _ack(self.msg_id))
+        )
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        res = mqtt_client.delivery_status(self.msg_id, wait=5)
+        self.assertEqual(res["status"], "acked")
+
+    def test_foreign_ack_is_stored_with_expiry(self):
+        with mock.patch.object(mqtt_client, "ACK_RETENTION", 0.01):
+            mqtt_client._on_message(None, None, _ack("foreign"))
+        threading.Event().wait(0.05)
+
+        self.assertIsNone(mqtt_client.delivery_status("foreign"))
+
+
+class DisplayPayloadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        publish = mock.patch.object(
+            mqtt_client._client, "publish",
+            return_value=SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS),
+        )
+        self.publish = publish.start()
+        self.addCleanup(publish.stop)
+
+    def _payload(self, product):
+        mqtt_client.publish_product_to_shelf(product, shelf=1)
+        return json.loads(self.publish.call_args[0][1])
+
+    def test_promo_price_only_for_active_promotion(self):
+        product = Product.objects.create(
+            name="Ser", price1=Decimal("12.00"), price2=Decimal("9.99"),
+            promo_active=True,
+        )
+        self.assertEqual(self._payload(product)["promo_price"], 9.99)
+
+        # zmiana ceny przesuwa price1 -> price2: to nie jest promocja
+        shift_price1(product, Decimal("13.00"))
+        product.save()
+        payload = self._payload(product)
+        self.assertEqual(payload["price"], 13.0)
+        self.assertNotIn("promo_price", payload)
@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from django.db import connection, connections
+from django.test import SimpleTestCase
+
+from app.leader import AdvisoryLeader
+
+
+class AdvisoryLeaderTests(SimpleTestCase):
+    databases = {"default"}
+
+    def _leader(self, name="test-leader"):
+        leader = AdvisoryLeader(name, on_elected=lambda: None)
+        self.addCleanup(leader.stop)
+        return leader
+
+    @unittest.skipUnless(
+        connection.vendor == "postgresql", "advisory locks are PostgreSQL-only"
+    )
+    def test_only_one_process_holds_the_lock(self):
+        first, second = self._leader(), self._leader()
+
+        self.assertTrue(first._try_acquire())
+        self.assertFalse(second._try_acquire())
+
+        first.stop()
+        self.assertTrue(second._try_acquire())
+
+    @unittest.skipIf(connection.vendor == "postgresql", "non-Postgres path")
+    def test_without_postgres_current_process_wins(self):
+        leader = self._leader()
+
+        self.assertTrue(leader._try_acquire())
+        self.assertTrue(leader.is_leader)
+
+    def test_lock_connection_bypasses_the_pool(self):
+        options = {**connections.settings["default"].get("OPTIONS", {}),
+                   "pool": {"min_size": 1}}
+        leader = self._leader()
+
+        with mock.patch.dict(
+            connections.settings["default"], {"OPTIONS": options}
+        ):
+            conn = leader._connect()
+            self.assertIn("pool", connections.settings["default"]["OPTIONS"])
+
+        self.assertNotIn("pool", conn.settings_dict["OPTIONS"])
+        conn.close()
@@ -0,0 +1,135 @@
+import json
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import paho.mqtt.client as mqtt
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from app import mqtt_client, shelf_stream
+
+ACL_FILE = settings.BASE_DIR.parent / "mosquitto" / "acl"
+
+
+def _acl(user):
+    """{wzorzec topicu: uprawnienia} użytkownika z pliku ACL mosquitto."""
+    rules, current = {}, None
+    for line in ACL_FILE.read_text().splitlines():
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        if parts[0] == "user":
+            current = parts[1]
+        elif parts[0] == "topic" and current == user:
+            access, pattern = (
+                ("readwrite", parts[1]) if len(parts) == 2 else parts[1:3]
+            )
+            rules[pattern] = access
+    return rules
+
+
+def _allowed(rules, topic, access):
+    def matches(pattern):
+        p, t = pattern.split("/"), topic.split("/")
+        return len(p) == len(t) and all(
+            a == "+" or a == b for a, b in zip(p, t)
+        )
+    return any(
+        matches(pattern) and granted in (access, "readwrite")
+        for pattern, granted in rules.items()
+    )
+
+
+class StreamFanoutTests(SimpleTestCase):
+
+    def setUp(self):
+        shelf_stream._broadcaster = None
+        self.addCleanup(setattr, shelf_stream, "_broadcaster", None)
+        mqtt_client._stream_source = None
+        self.addCleanup(setattr, mqtt_client, "_stream_source", None)
+
+    def _started(self):
+        publish = mock.patch.object(
+            mqtt_client._client, "publish",
+            return_value=SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS),
+        )
+        self.publish = publish.start()
+        self.addCleanup(publish.stop)
+        mqtt_client._started_evt.set()
+        self.addCleanup(mqtt_client._started_evt.clear)
+
+    def test_delta_goes_through_broker_once_above_deadband(self):
+        self._started()
+        sub = shelf_stream.get_broadcaster().subscribe()
+
+        mqtt_client.publish_shelf_delta(1, {"d1_mm": 400.0})
+        mqtt_client.publish_shelf_delta(1, {"d1_mm": 400.5})
+
+        self.publish.assert_called_once()
+        topic, payload = self.publish.call_args[0][:2]
+        self.assertEqual(topic, mqtt_client.STREAM_PREFIX + "1")
+        self.assertEqual(json.loads(payload), {"shelf": 1, "d1_mm": 400.0})
+        # lokalni subskrybenci dostają zdarzenie dopiero z brokera
+        self.assertEqual(sub.pop_all(), ([], 0))
+
+    def test_stream_source_is_created_once_across_threads(self):
+        self._started()
+        shelf_stream.get_broadcaster()
+        created = []
+        real = shelf_stream.ShelfBroadcaster
+
+        def slow_broadcaster(*args):
+            created.append(1)
+            threading.Event().wait(0.05)  # okno na wyścig
+            return real(*args)
+
+        start = threading.Barrier(8)
+
+        def publish():
+            start.wait()
+            mqtt_client.publish_shelf_delta(1, {"d1_mm": 400.0})
+
+        threads = [threading.Thread(target=publish) for _ in range(8)]
+        with mock.patch.object(
+            shelf_stream, "ShelfBroadcaster", side_effect=slow_broadcaster
+        ):
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(len(created), 1)
+        # jeden filtr progu: ta sama wartość poszła do brokera raz
+        self.publish.assert_called_once()
+
+    def test_stream_message_reaches_local_subscribers(self):
+        sub = shelf_stream.get_broadcaster().subscribe(shelves={2})
+        msg = SimpleNamespace(
+            topic=mqtt_client.STREAM_PREFIX + "2",
+            payload=json.dumps({"shelf": 2, "d2_mm": 530.0}).encode(),
+        )
+
+        with mock.patch.object(mqtt_client, "_save_telemetry") as save:
+            mqtt_client._on_message(None, None, msg)
+
+        save.assert_not_called()
+        events, _ = sub.pop_all()
+        self.assertEqual([e["d2_mm"] for e in events], [530.0])
+
+
+@unittest.skipUnless(ACL_FILE.exists(), "brak mosquitto/acl (obraz aplikacji)")
+class BrokerAclTests(SimpleTestCase):
+    """mosquitto.conf wymusza acl_file: bez wpisu broker po cichu odrzuca."""
+
+    def test_backend_may_use_stream_topic(self):
+        rules = _acl("backend")
+        shelf_topic = mqtt_client.STREAM_PREFIX + "1"
+
+        self.assertTrue(_allowed(rules, shelf_topic, "write"))
+        self.assertTrue(_allowed(rules, shelf_topic, "read"))
+        self.assertIn(mqtt_client.STREAM_TOPIC, rules)
+        self.assertTrue(
+            _allowed(rules, f"{mqtt_client.BASE}/shelf/1/display/cmd", "write")
+        )
@@ -0,0 +1,63 @@
+import json
+
+from django.test import SimpleTestCase
+
+from app.telemetry_codec import (
+    decode, encode_binary, parse_number, parse_values,
+)
+
+
+class TelemetryCodecTests(SimpleTestCase):
+
+    def test_parse_number_accepts_units_and_commas(self):
+        cases = {
+            "571 mm": 571.0, "3,6 g": 3.6, " 42 ": 42.0, "-5": -5.0,
+            7: 7.0, 1.5: 1.5, "abc": None, "nan": None, None: None,
+            # tylko -?cyfry[.cyfry], jak dawny regex
+            "1e5": 1.0, "1_000": 1.0, "1e999": 1.0, "inf": None,
+            float("inf"): None, float("nan"): None, 10 ** 400: None,
+            ".5": 5.0, "-.5 g": 5.0, "+5": 5.0, "5.": 5.0, "--5": -5.0,
+            "1.2.3": 1.2, "²5": 5.0, "9" * 400: None, True: 1.0,
+        }
+        for raw, expected in cases.items():
+            self.assertEqual(parse_number(raw), expected, raw)
+
+    def test_json_payload(self):
+        reading = decode(json.dumps({
+            "device": "esp32-1", "ts": "2025-10-18T12:00:00Z", "shelf": "2",
+            "d1_mm": "571 mm", "weight_kg": "1,5", "status": "ok",
+            "extra": {"nested": 1},
+        }).encode())
+
+        self.assertEqual(reading.shelf, 2)
+        self.assertEqual(reading.device, "esp32-1")
+        self.assertEqual(reading.values, {"d1_mm": 571.0, "weight_kg": 1.5})
+        self.assertIsNone(reading.msg_id)
+
+    def test_binary_payload_round_trip(self):
+        values = {"d1_mm": 470.3, "weight_g": 1600}
+        payload = encode_binary(values, shelf=3, ts=1760000000)
+
+        self.assertLess(len(payload), len(json.dumps(values)))
+        reading = decode(payload)
+        self.assertEqual(reading.values, {"d1_mm": 470.3, "weight_g": 1600.0})
+        self.assertEqual((reading.shelf, reading.ts), (3, 1760000000))
+
+        self.assertIsNone(decode(encode_binary({"d1": 1.0})).shelf)
+
+    def test_invalid_payloads_raise_value_error(self):
+        for payload in (b"", b"not json", b"[1, 2]",
+                        encode_binary({"d1_mm": 1.0})[:-2]):
+            with self.assertRaises(ValueError):
+                decode(payload)
+
+    def test_non_finite_json_values_are_dropped(self):
+        reading = decode(b'{"d1_mm": NaN, "d2_mm": Infinity, "weight_g": 5}')
+
+        self.assertEqual(reading.values, {"weight_g": 5.0})
+
+    def test_parse_values_skips_meta_keys(self):
+        self.assertEqual(
+            parse_values({"msg_id": "1", "shelf": 1, "d2": "530", "d1": None}),
+            {"d2": 530.0},
+        )
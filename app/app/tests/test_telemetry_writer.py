@@ -0,0 +1,130 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase
+
+from app import mqtt_client
+from app.deadband import PersistFilter
+from app.telemetry_writer import TelemetryWriter
+from db.models import ShelfState
+
+
+class TelemetryWriterTests(TestCase):
+
+    def test_coalesces_per_shelf_last_value_wins(self):
+        writer = TelemetryWriter(flush_interval=0.01, batch_size=100)
+        writer.submit(1, {"d1_mm": 400.0})
+        writer.submit(1, {"d1_mm": 410.0})
+        writer.submit(3, {"weight_g": 1500.0})
+
+        writer.drain()
+
+        self.assertEqual(ShelfState.objects.get(shelf=1).d1_mm, 410.0)
+        self.assertEqual(ShelfState.objects.get(shelf=3).weight_g, 1500.0)
+        stats = writer.stats()
+        self.assertEqual(stats["coalesced"], 1)
+        self.assertEqual(stats["flushed_rows"], 2)
+
+    def test_upsert_keeps_other_columns(self):
+        ShelfState.objects.create(shelf=2, d1_mm=100.0, d2_mm=200.0)
+        writer = TelemetryWriter()
+        writer.submit(2, {"d2_mm": 250.0})
+
+        writer.drain()
+
+        ss = ShelfState.objects.get(shelf=2)
+        self.assertEqual(ss.d2_mm, 250.0)
+        self.assertEqual(ss.d1_mm, 100.0)
+
+    def test_full_queue_drops_and_counts(self):
+        writer = TelemetryWriter(max_queue=1)
+        self.assertTrue(writer.submit(1, {"d1_mm": 1.0}))
+        self.assertFalse(writer.submit(1, {"d1_mm": 2.0}))
+
+        self.assertEqual(writer.stats()["dropped"], 1)
+
+    def test_sharded_writers_keep_per_shelf_order(self):
+        writer = TelemetryWriter(flush_interval=0.01, concurrency=2)
+        for value in (1.0, 2.0, 3.0):
+            writer.submit(1, {"d1_mm": value})
+            writer.submit(2, {"d2_mm": value * 10})
+
+        writer.drain()
+
+        self.assertEqual(ShelfState.objects.get(shelf=1).d1_mm, 3.0)
+        self.assertEqual(ShelfState.objects.get(shelf=2).d2_mm, 30.0)
+        self.assertEqual(writer.stats()["queue_size"], 0)
+        self.assertEqual(len(writer.flush_latencies()), 2)
+
+    def test_failed_flush_is_retried_once(self):
+        writer = TelemetryWriter()
+        writer.submit(1, {"d1_mm": 400.0})
+        real = ShelfState.objects.bulk_create
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection")
+            return real(*args, **kwargs)
+
+        with mock.patch.object(ShelfState.objects, "bulk_create", flaky):
+            writer.drain()
+
+        self.assertEqual(ShelfState.objects.get(shelf=1).d1_mm, 400.0)
+        self.assertEqual(writer.stats()["errors"], 1)
+        self.assertEqual(writer.stats()["lost_rows"], 0)
+
+    def test_window_lost_after_retry_is_logged_and_forgotten(self):
+        writer = TelemetryWriter()
+        writer.submit(3, {"weight_g": 1500.0})
+        persist_filter = PersistFilter({"g": 5.0})
+        persist_filter.should_persist(3, {"weight_g": 1500.0})
+
+        with mock.patch.object(
+            ShelfState.objects, "bulk_create",
+            side_effect=OperationalError("down"),
+        ), mock.patch(
+            "app.deadband.get_persist_filter", return_value=persist_filter
+        ), mock.patch("builtins.print") as log:
+            writer.drain()
+
+        self.assertFalse(ShelfState.objects.exists())
+        self.assertEqual(writer.stats()["errors"], 2)
+        self.assertEqual(writer.stats()["lost_rows"], 1)
+        self.assertIn("lost shelves=[3]", log.call_args[0][0])
+        self.assertTrue(
+            persist_filter.should_persist(3, {"weight_g": 1500.0})
+        )
+
+
+class EnqueueTests(SimpleTestCase):
+
+    def setUp(self):
+        writer = mock.patch.object(
+            mqtt_client, "_writer", TelemetryWriter(max_queue=1)
+        )
+        self.writer = writer.start()
+        self.addCleanup(writer.stop)
+        persist_filter = mock.patch.object(
+            mqtt_client, "get_persist_filter",
+            return_value=PersistFilter({"mm": 2.0}),
+        )
+        persist_filter.start()
+        self.addCleanup(persist_filter.stop)
+        mqtt_client._ingest_evt.set()
+        self.addCleanup(mqtt_client._ingest_evt.clear)
+
+    @mock.patch.object(mqtt_client, "publish_shelf_delta")
+    def test_dropped_reading_is_not_suppressed_later(self, _):
+        mqtt_client._enqueue(2, {"d1_mm": 100.0})
+        mqtt_client._enqueue(1, {"d1_mm": 400.0})  # kolejka pełna -> drop
+        self.assertEqual(self.writer.stats()["dropped"], 1)
+
+        self.writer._queues[0].get_nowait()
+        # ta sama wartość w progu: bez forget() nigdy nie trafiłaby do bazy
+        mqtt_client._enqueue(1, {"d1_mm": 400.5})
+
+        self.assertEqual(self.writer.stats()["enqueued"], 2)
+        self.assertEqual(self.writer._queues[0].get_nowait()[:2],
+                         (1, {"d1_mm": 400.5}))
@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# proces serwera www – app/apps.py startuje w nim klienta MQTT
+os.environ.setdefault('DJANGO_SERVER', 'wsgi')
 
 application = get_wsgi_application()
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Product, ShelfState
+from .models import (
+    User, Product, PriceHistory, ShelfState, ShelfCalibration, SensorChannel,
+)
 
 
 @admin.register(User)
@@ -48,34 +50,64 @@ class ProductAdmin(admin.ModelAdmin):
                 'country_of_origin',
                 'price1',
                 'price2',
+                'promo_active',
                 'price3',
                 'shelf_number',
             )
         }),
     )
 
-    # helper do powiązania z ShelfState
-    def _get_shelfstate(self, obj):
-        if not obj.shelf_number:
-            return None
-        try:
-            return ShelfState.objects.get(shelf=obj.shelf_number)
-        except ShelfState.DoesNotExist:
-            return None
+    # d1_mm/d2_mm/weight_g doklejane po pobraniu strony listy jednym
+    # zapytaniem o ShelfState (ProductQuerySet.attach_telemetry)
+    def get_queryset(self, request):
+        return super().get_queryset(request).attach_telemetry()
+
+    # historia cen / Omnibus i publiczny katalog (cache + ETag) jak po
+    # zapisie przez API
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self._record_prices(obj, form, change)
+        self._invalidate()
+
+    def _record_prices(self, obj, form, change):
+        from .prices import record_price_changes
+        changes = []
+        if not change or 'price1' in form.changed_data:
+            changes.append((obj.pk, PriceHistory.KIND_REGULAR, obj.price1))
+        promo_changed = 'promo_active' in form.changed_data or (
+            obj.promo_active and 'price2' in form.changed_data
+        )
+        if promo_changed:
+            changes.append((
+                obj.pk, PriceHistory.KIND_PROMO,
+                obj.price2 if obj.promo_active else None,
+            ))
+        if changes:
+            record_price_changes(changes)
+            obj.refresh_from_db(fields=['lowest_price_30d'])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._invalidate()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        self._invalidate()
+
+    def _invalidate(self):
+        from products.cache import bump_catalogue_version
+        bump_catalogue_version()
 
     def telemetry_d1(self, obj):
-        ss = self._get_shelfstate(obj)
-        return ss.d1_mm if ss else None
+        return getattr(obj, "d1_mm", None)
     telemetry_d1.short_description = "d1 (mm)"
 
     def telemetry_d2(self, obj):
-        ss = self._get_shelfstate(obj)
-        return ss.d2_mm if ss else None
+        return getattr(obj, "d2_mm", None)
     telemetry_d2.short_description = "d2 (mm)"
 
     def telemetry_weight(self, obj):
-        ss = self._get_shelfstate(obj)
-        return ss.weight_g if ss else None
+        return getattr(obj, "weight_g", None)
     telemetry_weight.short_description = "weight (g)"
 
 
@@ -83,3 +115,58 @@ class ProductAdmin(admin.ModelAdmin):
 class ShelfStateAdmin(admin.ModelAdmin):
     list_display = ('shelf', 'd1_mm', 'd2_mm', 'weight_g', 'updated_at')
     ordering = ('shelf',)
+
+
+@admin.register(ShelfCalibration)
+class ShelfCalibrationAdmin(admin.ModelAdmin):
+    list_display = (
+        'shelf', 'empty_distance_mm', 'unit_depth_mm',
+        'unit_weight_g', 'tare_g', 'low_units', 'updated_at',
+    )
+    ordering = ('shelf',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self._invalidate()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._invalidate()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        self._invalidate()
+
+    def _invalidate(self):
+        from products.availability import invalidate_calibrations
+        from products.cache import bump_catalogue_version
+        invalidate_calibrations()
+        bump_catalogue_version()
+
+
+@admin.register(SensorChannel)
+class SensorChannelAdmin(admin.ModelAdmin):
+    list_display = (
+        'store', 'device', 'key', 'shelf', 'field', 'unit', 'is_active',
+    )
+    list_filter = ('store', 'field', 'is_active')
+    search_fields = ('device', 'key')
+    ordering = ('store', 'device', 'id')
+
+    # rejestr w tym procesie odświeżamy od razu; pozostałe procesy
+    # (np. mqtt_worker) po SENSOR_REGISTRY_TTL
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self._invalidate()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self._invalidate()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        self._invalidate()
+
+    def _invalidate(self):
+        from .channels import invalidate_channels
+        invalidate_channels()
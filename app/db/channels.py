@@ -0,0 +1,166 @@
+# db/channels.py
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .models import SensorChannel
+
+# limit zapamiętanych topiców (nieznane urządzenia też są zapamiętywane)
+TOPIC_CACHE_SIZE = 10000
+# po nieudanym odświeżeniu kolejna próba za tyle s (do tego czasu
+# obowiązuje poprzednia zawartość rejestru)
+RELOAD_RETRY = 5.0
+
+
+class Channel(NamedTuple):
+    """Kanał w pamięci: klucz w payloadzie -> półka i kolumna ShelfState."""
+    key: str
+    shelf: int
+    field: str
+    scale: float
+
+
+class ChannelRegistry:
+    """
+    Rejestr kanałów (SensorChannel) w pamięci procesu, ładowany jednym
+    zapytaniem i odświeżany po TTL albo invalidate(). Topic wiadomości
+    jest mapowany na krotkę kanałów przez słownik, więc dispatch to
+    jedno wyszukanie na wiadomość, niezależnie od liczby półek.
+    """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._ready = False
+        self._by_device = {}   # (store, device) -> (Channel, ...)
+        self._by_shelf = {}    # shelf -> (Channel, ...)
+        self._shelf_store = {}  # shelf -> store
+        self._topics = {}      # topic -> ((Channel, ...), shelf | None)
+
+    def load(self):
+        by_device, by_shelf, shelf_store = {}, {}, {}
+        for c in SensorChannel.objects.filter(is_active=True).order_by("id"):
+            ch = Channel(c.key, c.shelf, c.field, c.scale)
+            by_device.setdefault((c.store, c.device), []).append(ch)
+            by_shelf.setdefault(c.shelf, []).append(ch)
+            shelf_store.setdefault(c.shelf, c.store)
+        with self._lock:
+            self._by_device = {k: tuple(v) for k, v in by_device.items()}
+            self._by_shelf = {k: tuple(v) for k, v in by_shelf.items()}
+            self._shelf_store = shelf_store
+            self._topics = {}
+            self._loaded_at = time.monotonic()
+            self._ready = True
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def is_stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at >= self.ttl
+
+    def _ensure(self):
+        if not self.is_stale():
+            return
+        try:
+            self.load()
+        except Exception as e:
+            if not self._ready:
+                raise
+            # np. restart bazy: zostajemy przy poprzednich kanałach,
+            # zamiast odrzucać każdą wiadomość do czasu restartu procesu
+            print("[TELEM] channel registry reload failed:", e)
+            with self._lock:
+                self._loaded_at = (
+                    time.monotonic() - self.ttl + min(self.ttl, RELOAD_RETRY)
+                )
+
+    # ---------- wyszukiwanie ----------
+    def for_topic(self, topic: str):
+        """
+        (kanały, półka z topicu albo None) dla
+        <store>/device/<id>/telemetry i <store>/shelf/<n>/telemetry.
+        """
+        self._ensure()
+        hit = self._topics.get(topic)
+        if hit is not None:
+            return hit
+
+        hit = ((), None)
+        parts = topic.split("/")
+        if len(parts) == 4 and parts[3] == "telemetry":
+            store, kind, ident = parts[0], parts[1], parts[2]
+            if kind == "device":
+                channels = self._by_device.get((store, ident))
+                if channels is None:
+                    channels = self._by_device.get(
+                        (store, SensorChannel.ANY_DEVICE), ()
+                    )
+                hit = (channels, None)
+            elif kind == "shelf" and ident.isdigit():
+                shelf = int(ident)
+                hit = (self._by_shelf.get(shelf, ()), shelf)
+
+        with self._lock:
+            if len(self._topics) >= TOPIC_CACHE_SIZE:
+                self._topics = {}
+            self._topics[topic] = hit
+        return hit
+
+    def for_shelf(self, shelf: int):
+        self._ensure()
+        return self._by_shelf.get(shelf, ())
+
+    def store_for_shelf(self, shelf: int):
+        self._ensure()
+        return self._shelf_store.get(shelf)
+
+    def shelves(self):
+        self._ensure()
+        return self._by_shelf.keys()
+
+    def stores(self):
+        self._ensure()
+        return {store for store, _ in self._by_device}
+
+    @staticmethod
+    def decode(channels, values: dict, shelf=None) -> dict:
+        """
+        {półka: {kolumna: wartość}} z odczytów {klucz: float}
+        (app.telemetry_codec.parse_values). Przy kilku kluczach na tę samą
+        kolumnę wygrywa pierwszy kanał (kolejność rejestracji).
+        """
+        out = {}
+        for key, ch_shelf, field, scale in channels:
+            if shelf is not None and ch_shelf != shelf:
+                continue
+            value = values.get(key)
+            if value is None:
+                continue
+            fields = out.get(ch_shelf)
+            if fields is None:
+                out[ch_shelf] = {field: value * scale}
+            elif field not in fields:
+                fields[field] = value * scale
+        return out
+
+
+_registry = None
+_init_lock = threading.Lock()
+
+
+def get_registry() -> ChannelRegistry:
+    global _registry
+    if _registry is None:
+        with _init_lock:
+            if _registry is None:
+                _registry = ChannelRegistry(ttl=settings.SENSOR_REGISTRY_TTL)
+    return _registry
+
+
+def invalidate_channels():
+    get_registry().invalidate()
@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from db.models import Product
+
+# (nazwa, CONN_MAX_AGE, CONN_HEALTH_CHECKS)
+MODES = [
+    ("per-request", 0, False),
+    ("persistent", 600, False),
+    ("persistent+health", 600, True),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Narzut nawiązywania połączenia z bazą: symuluje N żądań "
+        "(close_old_connections na początku i końcu, jak sygnały "
+        "request_started/finished) z jednym typowym zapytaniem, dla "
+        "CONN_MAX_AGE=0 oraz połączeń trwałych z/bez health checków."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        saved = (
+            settings_dict.get("CONN_MAX_AGE", 0),
+            settings_dict.get("CONN_HEALTH_CHECKS", False),
+        )
+        if settings_dict.get("OPTIONS", {}).get("pool"):
+            self.stdout.write("DB_POOL is on: per-request mode uses the pool.")
+        try:
+            for name, max_age, health in MODES:
+                settings_dict["CONN_MAX_AGE"] = max_age
+                settings_dict["CONN_HEALTH_CHECKS"] = health
+                connection.close()
+                self._run(name, options["requests"])
+        finally:
+            settings_dict["CONN_MAX_AGE"], \
+                settings_dict["CONN_HEALTH_CHECKS"] = saved
+            connection.close()
+
+    def _run(self, name, n):
+        timings = []
+        for _ in range(n):
+            start = time.perf_counter()
+            close_old_connections()
+            Product.objects.filter(is_active=True).order_by("id").first()
+            close_old_connections()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        p99 = timings[min(n - 1, int(n * 0.99))]
+        self.stdout.write(
+            f"{name:<18} p50={statistics.median(timings) * 1000:6.2f} ms "
+            f"p99={p99 * 1000:6.2f} ms "
+            f"total={sum(timings):6.2f} s"
+        )
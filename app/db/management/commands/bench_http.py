@@ -0,0 +1,60 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Obciążenie działającego serwera (runserver/gunicorn/uvicorn): "
+        "dla każdego poziomu współbieżności wysyła --requests żądań GET "
+        "i raportuje req/s oraz p50/p99. Do porównania konfiguracji "
+        "workerów (patrz README)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://localhost:8000/api/products/product_view/",
+        )
+        parser.add_argument("--token", default="",
+                            help="token API dla endpointów pracownika")
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 8, 32, 64]
+        )
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+
+        def fetch(_):
+            req = urllib.request.Request(options["url"], headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as res:
+                    res.read()
+                    ok = res.status < 400
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return time.perf_counter() - start, ok
+
+        for concurrency in options["concurrency"]:
+            n = options["requests"]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as pool:
+                results = list(pool.map(fetch, range(n)))
+            wall = time.perf_counter() - start
+
+            timings = sorted(t for t, _ in results)
+            failed = sum(1 for _, ok in results if not ok)
+            p99 = timings[min(n - 1, int(n * 0.99))]
+            self.stdout.write(
+                f"c={concurrency:<4} rps={n / wall:8.1f} "
+                f"p50={statistics.median(timings) * 1000:7.1f} ms "
+                f"p99={p99 * 1000:7.1f} ms failed={failed}"
+            )
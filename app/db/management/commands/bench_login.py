@@ -0,0 +1,110 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from db.models import User
+
+PREFIX = "bench-login-"
+PASSWORD = "bench-pass-123"
+PATH = "/api/users/token/"
+
+
+class Command(BaseCommand):
+    help = (
+        "Symulacja logowania na początku zmiany: N kont loguje się "
+        "równolegle, raport p50/p99 czasu odpowiedzi. Domyślnie w procesie "
+        "(django.test.Client), z --url przeciw działającemu serwerowi. "
+        "Konta testowe są usuwane po pomiarze."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=300)
+        parser.add_argument("--concurrency", type=int, default=30)
+        parser.add_argument(
+            "--url", default="",
+            help="np. http://localhost:8000 (domyślnie w procesie)",
+        )
+        parser.add_argument(
+            "--by", choices=["email", "username"], default="email"
+        )
+
+    def handle(self, *args, **options):
+        n = options["users"]
+        # jeden hash dla wszystkich kont – seed nie mierzy hashera
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            [
+                User(
+                    email=f"{PREFIX}{i}@example.com",
+                    username=f"{PREFIX}{i}",
+                    password=password,
+                    is_employee=True,
+                )
+                for i in range(n)
+            ],
+            batch_size=1000,
+        )
+        try:
+            identifiers = [
+                f"{PREFIX}{i}@example.com" if options["by"] == "email"
+                else f"{PREFIX}{i}"
+                for i in range(n)
+            ]
+            login = self._remote(options["url"]) if options["url"] \
+                else self._local
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                results = list(pool.map(login, identifiers))
+            wall = time.perf_counter() - start
+        finally:
+            Token.objects.filter(user__username__startswith=PREFIX).delete()
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+        timings = sorted(t for t, ok in results)
+        failed = sum(1 for _, ok in results if not ok)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f"logins={n} concurrency={options['concurrency']} "
+            f"failed={failed} wall={wall:.2f} s "
+            f"rate={n / wall:.0f}/s\n"
+            f"p50={statistics.median(timings) * 1000:.1f} ms "
+            f"p99={p99 * 1000:.1f} ms max={timings[-1] * 1000:.1f} ms"
+        )
+
+    def _local(self, identifier):
+        start = time.perf_counter()
+        res = Client().post(
+            PATH,
+            {"identifier": identifier, "password": PASSWORD},
+            content_type="application/json",
+        )
+        return time.perf_counter() - start, res.status_code == 200
+
+    def _remote(self, base_url):
+        url = base_url.rstrip("/") + PATH
+
+        def login(identifier):
+            body = json.dumps(
+                {"identifier": identifier, "password": PASSWORD}
+            ).encode()
+            req = urllib.request.Request(
+                url, data=body, headers={"Content-Type": "application/json"}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as res:
+                    res.read()
+                    ok = res.status == 200
+            except urllib.error.URLError:
+                ok = False
+            return time.perf_counter() - start, ok
+
+        return login
@@ -0,0 +1,95 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from db.models import Product
+from products.filters import fulltext_search
+
+WORDS = [
+    "mleko", "ser", "masło", "chleb", "jogurt", "kawa", "herbata", "sok",
+    "woda", "makaron", "ryż", "mąka", "cukier", "sól", "pieprz", "jabłko",
+    "banan", "pomidor", "ogórek", "szynka", "kiełbasa", "czekolada",
+    "baton", "płatki", "musli", "olej", "ocet", "ketchup", "musztarda",
+]
+COUNTRIES = ["PL", "DE", "CZ", "IT", "ES", "FR", "NL", "UA"]
+TERMS = ["mleko", "mle", "ser żółty", "czekolada PL", "kiełb"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Porównuje wyszukiwanie ILIKE (stary SearchFilter) z pełnotekstowym "
+        "po search_vector na wygenerowanym katalogu. Wymaga PostgreSQL; "
+        "dane testowe są wycofywane po pomiarze."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("This benchmark needs PostgreSQL.")
+        try:
+            with transaction.atomic():
+                self._seed(options["size"])
+                with connection.cursor() as cur:
+                    cur.execute("ANALYZE db_product")
+                for term in TERMS:
+                    for label, fn in (("ilike", _ilike), ("fts", _fts)):
+                        self._run(term, label, fn, options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, size):
+        rnd = random.Random(42)
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=" ".join(rnd.sample(WORDS, 2)) + f" {i}",
+                    description=" ".join(rnd.sample(WORDS, 6)),
+                    country_of_origin=rnd.choice(COUNTRIES),
+                    price1="9.99",
+                )
+                for i in range(size)
+            ],
+            batch_size=5000,
+        )
+
+    def _run(self, term, label, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            qs = fn(term)
+            count = qs.count()
+            list(qs[:50])
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f"{term!r:<16} {label:<6} hits={count:<7} "
+            f"median={statistics.median(timings) * 1000:.1f} ms"
+        )
+
+
+def _ilike(term):
+    qs = Product.objects.all()
+    for word in term.split():
+        qs = qs.filter(
+            Q(name__icontains=word)
+            | Q(description__icontains=word)
+            | Q(country_of_origin__icontains=word)
+        )
+    return qs.order_by("id")
+
+
+def _fts(term):
+    return fulltext_search(Product.objects.all(), term).order_by(
+        "-search_rank", "id"
+    )
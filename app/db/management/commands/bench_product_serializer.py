@@ -0,0 +1,58 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework import serializers
+
+from db.models import Product
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Mikro-benchmark serializacji listy produktów: standardowy "
+        "ListSerializer DRF vs ProductListSerializer (bez bazy danych)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        products = []
+        for i in range(options["size"]):
+            p = Product(
+                id=i + 1,
+                name=f"bench-{i}",
+                description="",
+                country_of_origin="PL",
+                price1=Decimal("9.99"),
+                price2=Decimal("7.49") if i % 5 == 0 else None,
+                added_data=now,
+                shelf_number=(i % 4) or None,
+            )
+            p.d1_mm, p.d2_mm, p.weight_g = 470.0, None, None
+            products.append(p)
+
+        def drf_default():
+            return serializers.ListSerializer(
+                child=ProductSerializer()
+            ).to_representation(products)
+
+        def fast():
+            return ProductSerializer(many=True).to_representation(products)
+
+        for label, fn in (("drf", drf_default), ("fast", fast)):
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f"{options['size']:>7} products  {label:<5}  "
+                f"median={statistics.median(timings) * 1000:.1f} ms  "
+                f"min={min(timings) * 1000:.1f} ms"
+            )
@@ -0,0 +1,106 @@
+import asyncio
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.shelf_stream import ShelfBroadcaster
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan-out strumienia stanu półek: N subskrybentów-korutyn (jak klienci "
+        "SSE pod ASGI), wątek publikujący szumiące odczyty jak z MQTT. "
+        "Raport: czas publish (fan-out), opóźnienie dostarczenia p50/p99, "
+        "odsetek odczytów wyciętych przez deadband, zdarzenia odrzucone "
+        "u wolnych klientów."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, default=1000)
+        parser.add_argument("--readings", type=int, default=3000)
+        parser.add_argument("--rate", type=float, default=500.0,
+                            help="odczyty/s z wątku publikującego")
+        parser.add_argument("--buffer", type=int, default=100)
+        parser.add_argument("--deadband-mm", type=float, default=2.0)
+        parser.add_argument(
+            "--slow", type=float, default=0.1,
+            help="ułamek klientów, którzy nie czytają (test buforów)",
+        )
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options))
+
+    async def _run(self, o):
+        broadcaster = ShelfBroadcaster(
+            {"mm": o["deadband_mm"], "g": o["deadband_mm"] * 2.5}
+        )
+        loop = asyncio.get_running_loop()
+        latencies = []
+        slow_subs = []
+        tasks = []
+        done = asyncio.Event()
+
+        async def consumer(sub, wake):
+            while not done.is_set():
+                await wake.wait()
+                wake.clear()
+                events, _ = sub.pop_all()
+                now = time.time()
+                latencies.extend(now - e["ts"] for e in events)
+
+        n_slow = int(o["subscribers"] * o["slow"])
+        for i in range(o["subscribers"]):
+            if i < n_slow:
+                slow_subs.append(broadcaster.subscribe(maxlen=o["buffer"]))
+                continue
+            wake = asyncio.Event()
+            sub = broadcaster.subscribe(
+                maxlen=o["buffer"],
+                wake=lambda w=wake: loop.call_soon_threadsafe(w.set),
+            )
+            tasks.append(asyncio.create_task(consumer(sub, wake)))
+
+        publish_times = []
+
+        def publisher():
+            rnd = random.Random(1)
+            values = {1: 470.0, 2: 530.0, 3: 1600.0}
+            fields = {1: "d1_mm", 2: "d2_mm", 3: "weight_g"}
+            interval = 1.0 / o["rate"]
+            for i in range(o["readings"]):
+                shelf = i % 3 + 1
+                values[shelf] += rnd.gauss(0, o["deadband_mm"])
+                start = time.perf_counter()
+                broadcaster.publish(shelf, {fields[shelf]: values[shelf]})
+                publish_times.append(time.perf_counter() - start)
+                time.sleep(interval)
+
+        start = time.perf_counter()
+        await asyncio.to_thread(publisher)
+        await asyncio.sleep(0.2)
+        wall = time.perf_counter() - start
+        done.set()
+        for t in tasks:
+            t.cancel()
+
+        stats = broadcaster.stats()
+        publish_times.sort()
+        latencies.sort()
+
+        def pct(values, q):
+            return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+        self.stdout.write(
+            f"subscribers={o['subscribers']} (slow={n_slow}) "
+            f"readings={stats['published']} wall={wall:.1f} s\n"
+            f"deadband suppressed={stats['suppressed']} "
+            f"({stats['suppressed'] / max(stats['published'], 1):.0%}) "
+            f"events={stats['events']} deliveries={stats['delivered']}\n"
+            f"publish p50={pct(publish_times, 0.5):.2f} ms "
+            f"p99={pct(publish_times, 0.99):.2f} ms\n"
+            f"delivery p50={pct(latencies, 0.5) if latencies else 0:.2f} ms "
+            f"p99={pct(latencies, 0.99) if latencies else 0:.2f} ms\n"
+            f"slow clients: buffered<={o['buffer']} "
+            f"dropped={sum(s.dropped for s in slow_subs)}"
+        )
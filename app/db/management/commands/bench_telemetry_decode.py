@@ -0,0 +1,156 @@
+import json
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.telemetry_codec import decode, encode_binary
+from db.channels import get_registry
+
+
+def _legacy_num(v):
+    # dawne _num z app/mqtt_client.py, do porównania
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    s = str(v).replace(",", ".")
+    m = re.search(r"-?\d+(\.\d+)?", s)
+    return float(m.group(0)) if m else None
+
+
+def _legacy(topic, payload):
+    """Dawna ścieżka: json + split topicu + regex na każde pole."""
+    data = json.loads(payload.decode("utf-8"))
+    parts = topic.split("/")
+    try:
+        shelf = int(parts[parts.index("shelf") + 1])
+    except Exception:
+        shelf = None
+    d1 = _legacy_num(data.get("d1_mm") or data.get("d1"))
+    d2 = _legacy_num(data.get("d2_mm") or data.get("d2"))
+    wg = _legacy_num(data.get("weight_g"))
+    if wg is None and data.get("weight_kg") is not None:
+        wk = _legacy_num(data.get("weight_kg"))
+        wg = wk * 1000.0 if wk is not None else None
+    out = {}
+    if d1 is not None and shelf in (None, 1):
+        out[1] = {"d1_mm": d1}
+    if d2 is not None and shelf in (None, 2):
+        out[2] = {"d2_mm": d2}
+    if wg is not None and shelf in (None, 3):
+        out[3] = {"weight_g": wg}
+    return out
+
+
+def _synthetic_corpus(size):
+    """Wiadomości jak z ESP: liczby, napisy z jednostkami, przecinki."""
+    rnd = random.Random(7)
+    corpus = []
+    for i in range(size):
+        data = {
+            "device": f"esp32-{i % 20}",
+            "ts": f"2025-10-18T12:{i // 60 % 60:02d}:{i % 60:02d}Z",
+        }
+        kind = i % 4
+        if kind == 0:
+            data.update(d1_mm=round(rnd.uniform(100, 600), 1),
+                        d2_mm=round(rnd.uniform(100, 600), 1),
+                        weight_g=round(rnd.uniform(0, 5000), 1))
+        elif kind == 1:
+            data.update(d1=f"{rnd.uniform(100, 600):.0f} mm",
+                        d2=f"{rnd.uniform(100, 600):.0f} mm",
+                        weight_kg=f"{rnd.uniform(0, 5):.3f}".replace(".", ","))
+        elif kind == 2:
+            data.update(d1_mm=str(rnd.randint(100, 600)),
+                        d2_mm=str(rnd.randint(100, 600)),
+                        weight_g=f"{rnd.uniform(0, 5000):.1f} g")
+        else:
+            shelf = rnd.randint(1, 3)
+            field = ("d1_mm", "d2_mm", "weight_g")[shelf - 1]
+            corpus.append((
+                f"store/shelf/{shelf}/telemetry",
+                json.dumps({**data, field: rnd.uniform(100, 600)}).encode(),
+            ))
+            continue
+        corpus.append((
+            f"store/device/{data['device']}/telemetry",
+            json.dumps(data).encode(),
+        ))
+    return corpus
+
+
+def _load_corpus(path):
+    """Plik z `mosquitto_sub -v -t '<store>/+/+/telemetry'`: topic payload."""
+    corpus = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            topic, _, payload = line.rstrip("\n").partition(" ")
+            if topic.endswith("/telemetry") and payload:
+                corpus.append((topic, payload.encode("utf-8")))
+    if not corpus:
+        raise CommandError(f"No telemetry messages in {path}.")
+    return corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Mikrobenchmark dekodowania telemetrii na korpusie wiadomości: dawna "
+        "ścieżka (json + regex na pole + hardkodowane półki) vs "
+        "app.telemetry_codec + rejestr kanałów, dla JSON i formatu "
+        "binarnego. Korpus: --corpus (zapis z mosquitto_sub -v) albo "
+        "wygenerowany."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", help="plik 'topic payload' na linię")
+        parser.add_argument("--size", type=int, default=20000,
+                            help="wielkość korpusu generowanego")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options["corpus"]:
+            corpus = _load_corpus(options["corpus"])
+        else:
+            corpus = _synthetic_corpus(options["size"])
+
+        registry = get_registry()
+
+        def dispatch(topic, payload):
+            reading = decode(payload)
+            channels, shelf = registry.for_topic(topic)
+            return registry.decode(
+                channels, reading.values,
+                shelf=reading.shelf if shelf is None else shelf,
+            )
+
+        binary = []
+        for topic, payload in corpus:
+            reading = decode(payload)
+            binary.append((topic, encode_binary(
+                reading.values, shelf=reading.shelf,
+            )))
+
+        variants = (
+            ("legacy", _legacy, corpus),
+            ("json", dispatch, corpus),
+            ("binary", dispatch, binary),
+        )
+        self.stdout.write(f"messages={len(corpus)} repeat={options['repeat']}")
+        # warianty na przemian w każdym powtórzeniu, wynik = najlepszy czas
+        timings = {label: [] for label, _, _ in variants}
+        for _ in range(options["repeat"]):
+            for label, fn, messages in variants:
+                start = time.perf_counter()
+                for topic, payload in messages:
+                    fn(topic, payload)
+                timings[label].append(time.perf_counter() - start)
+
+        for label, _, messages in variants:
+            best = min(timings[label])
+            size = sum(len(p) for _, p in messages) / len(messages)
+            self.stdout.write(
+                f"{label:<7} {best / len(messages) * 1e6:6.2f} us/msg "
+                f"{len(messages) / best:10.0f} msg/s  avg payload={size:.0f} B"
+            )
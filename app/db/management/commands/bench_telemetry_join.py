@@ -0,0 +1,72 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from db.models import Product, ShelfState
+from products.views import with_telemetry
+
+STRATEGIES = ("subquery", "map")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Porównuje strategie doklejania telemetrii do produktów "
+        "(subquery vs map). Dane testowe są wycofywane po pomiarze."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    self._seed(size)
+                    for strategy in STRATEGIES:
+                        self._run(size, strategy, options["repeat"])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _seed(self, size):
+        for shelf, defaults in (
+            (1, {"d1_mm": 470.0}),
+            (2, {"d2_mm": 530.0}),
+            (3, {"weight_g": 1600.0}),
+        ):
+            ShelfState.objects.update_or_create(shelf=shelf, defaults=defaults)
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"bench-{i}",
+                    price1="9.99",
+                    shelf_number=(i % 4) or None,
+                )
+                for i in range(size)
+            ],
+            batch_size=5000,
+        )
+
+    def _run(self, size, strategy, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            qs = Product.objects.filter(name__startswith="bench-")
+            rows = list(with_telemetry(qs, strategy))
+            for p in rows:
+                (p.d1_mm, p.d2_mm, p.weight_g)
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(
+            f"{size:>7} products  {strategy:<8}  "
+            f"median={statistics.median(timings) * 1000:.1f} ms  "
+            f"min={min(timings) * 1000:.1f} ms"
+        )
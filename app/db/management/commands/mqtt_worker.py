@@ -0,0 +1,111 @@
+import signal
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from app import mqtt_client
+from app.apps import MQTT_LEADER_RETRY
+from app.leader import AdvisoryLeader
+
+
+class Command(BaseCommand):
+    help = (
+        "Samodzielny proces ingestu telemetrii MQTT (bez serwera www). "
+        "W procesach www ustaw wtedy MQTT_INGEST=off. Domyślnie zapisuje "
+        "tylko jeden worker naraz (advisory lock), kolejne czekają w "
+        "rezerwie. SIGTERM/SIGINT: rozłączenie i zapis tego, co w kolejce."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=None,
+            help="wątki zapisujące do bazy (domyślnie TELEM_WRITERS)",
+        )
+        parser.add_argument("--flush-interval", type=float, default=None)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--report-interval", type=float, default=10.0,
+            help="co ile sekund wypisać przepustowość (0 = bez raportu)",
+        )
+        parser.add_argument(
+            "--no-leader", action="store_true",
+            help="zapisuj od razu, bez advisory locka",
+        )
+        parser.add_argument(
+            "--quiet", action="store_true",
+            help="bez logu każdej wiadomości telemetrii",
+        )
+
+    def handle(self, *args, **options):
+        if options["quiet"]:
+            mqtt_client.TELEM_LOG = False
+        mqtt_client.configure_writer(
+            concurrency=options["concurrency"],
+            flush_interval=options["flush_interval"],
+            batch_size=options["batch_size"],
+        )
+
+        stop_evt = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write(f"[MQTT] signal {signum}, shutting down...")
+            stop_evt.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        mqtt_client.start(ingest=options["no_leader"])
+        leader = None
+        if not options["no_leader"]:
+            leader = AdvisoryLeader(
+                "mqtt-ingest",
+                on_elected=mqtt_client.start_ingest,
+                on_lost=mqtt_client.stop_ingest,
+                retry=MQTT_LEADER_RETRY,
+            )
+            leader.start()
+
+        interval = options["report_interval"]
+        last = mqtt_client.telemetry_stats()
+        last_ts = time.monotonic()
+        while not stop_evt.wait(interval if interval > 0 else 1.0):
+            if interval > 0:
+                now = time.monotonic()
+                stats = mqtt_client.telemetry_stats()
+                self._report(last, stats, now - last_ts)
+                last, last_ts = stats, now
+
+        if leader is not None:
+            leader.stop()
+        mqtt_client.stop()
+        self.stdout.write(
+            f"[MQTT] worker stopped: {mqtt_client.telemetry_stats()}"
+        )
+
+    def _report(self, before, after, elapsed):
+        lat = sorted(mqtt_client.flush_latencies())
+        if lat:
+            p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+            latency = (
+                f"write p50={statistics.median(lat) * 1000:.1f} ms "
+                f"p99={p99 * 1000:.1f} ms"
+            )
+        else:
+            latency = "write -"
+
+        def rate(key):
+            return (after[key] - before[key]) / elapsed
+
+        self.stdout.write(
+            f"[TELEM] msgs={rate('messages'):.1f}/s "
+            f"readings={rate('enqueued'):.1f}/s "
+            f"rows={rate('flushed_rows'):.1f}/s "
+            f"deadband suppressed={rate('deadband_suppressed'):.1f}/s "
+            f"persisted={rate('deadband_persisted'):.1f}/s {latency} "
+            f"queue={after['queue_size']} "
+            f"dropped={after['dropped'] - before['dropped']} "
+            f"errors={after['errors'] - before['errors']} "
+            f"lost={after['lost_rows'] - before['lost_rows']}"
+        )
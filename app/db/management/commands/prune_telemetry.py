@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from db.models import ShelfRollup
+from db.telemetry import prune_readings, prune_rollups
+
+
+class Command(BaseCommand):
+    help = "Usuwa stare odczyty telemetrii i agregaty minutowe (paczkami)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--raw-days", type=int, default=7)
+        parser.add_argument("--minute-days", type=int, default=30)
+        parser.add_argument("--chunk-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        chunk = options["chunk_size"]
+        raw = prune_readings(timedelta(days=options["raw_days"]), chunk)
+        minute = prune_rollups(
+            ShelfRollup.BUCKET_MINUTE,
+            timedelta(days=options["minute_days"]),
+            chunk,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {raw} raw readings and {minute} minute rollups."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from db.prices import refresh_expiring
+
+
+class Command(BaseCommand):
+    help = (
+        "Przelicza Product.lowest_price_30d dla produktów, którym ceny "
+        "mogą wypadać z okna 30 dni. Uruchamiać raz dziennie."
+    )
+
+    def handle(self, *args, **options):
+        count = refresh_expiring()
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed lowest 30-day price for {count} products."
+        ))
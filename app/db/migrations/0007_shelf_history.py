@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0006_remove_product_distance_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShelfReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shelf', models.PositiveSmallIntegerField()),
+                ('ts', models.DateTimeField()),
+                ('value', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['shelf', 'ts'], name='shelfreading_shelf_ts')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShelfRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shelf', models.PositiveSmallIntegerField()),
+                ('bucket', models.CharField(choices=[('1m', '1 minute'), ('1h', '1 hour')], max_length=2)),
+                ('bucket_start', models.DateTimeField()),
+                ('min_value', models.FloatField()),
+                ('max_value', models.FloatField()),
+                ('sum_value', models.FloatField()),
+                ('count', models.PositiveIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('shelf', 'bucket', 'bucket_start'), name='shelfrollup_unique_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0008_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShelfCalibration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shelf', models.PositiveSmallIntegerField(unique=True)),
+                ('empty_distance_mm', models.FloatField(blank=True, null=True)),
+                ('unit_depth_mm', models.FloatField(blank=True, null=True)),
+                ('unit_weight_g', models.FloatField(blank=True, null=True)),
+                ('tare_g', models.FloatField(default=0)),
+                ('low_units', models.PositiveIntegerField(default=2)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
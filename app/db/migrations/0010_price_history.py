@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_history(apps, schema_editor):
+    # obecna price1 jako pierwszy wpis historii, od dnia dodania produktu
+    Product = apps.get_model('db', 'Product')
+    PriceHistory = apps.get_model('db', 'PriceHistory')
+    batch = []
+    for pk, price1, added in Product.objects.values_list('id', 'price1', 'added_data').iterator():
+        batch.append(PriceHistory(product_id=pk, kind='regular', price=price1, changed_at=added))
+        if len(batch) >= 2000:
+            PriceHistory.objects.bulk_create(batch)
+            batch = []
+    PriceHistory.objects.bulk_create(batch)
+    Product.objects.update(lowest_price_30d=models.F('price1'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0009_shelfcalibration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='lowest_price_30d',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('regular', 'Regular'), ('promo', 'Promotion')], max_length=10)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('changed_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='db.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'kind', 'changed_at'], name='pricehistory_product_kind_ts'), models.Index(fields=['changed_at'], name='pricehistory_ts')],
+            },
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
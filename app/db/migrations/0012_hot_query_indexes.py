@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0011_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['added_data', 'id'], name='product_added_id'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['shelf_number', 'is_active'], name='product_shelf_active'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglistitem',
+            index=models.Index(fields=['user', 'product'], name='shoppinglist_user_product'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:39
+
+from django.db import migrations, models
+
+
+def merge_duplicates(apps, schema_editor):
+    # duplikaty (user, product) łączymy w najstarszy wiersz, sumując ilości
+    ShoppingListItem = apps.get_model('db', 'ShoppingListItem')
+    dupes = (
+        ShoppingListItem.objects.values('user_id', 'product_id')
+        .annotate(n=models.Count('id'), total=models.Sum('quantity'), keep=models.Min('id'))
+        .filter(n__gt=1)
+    )
+    for d in dupes:
+        ShoppingListItem.objects.filter(pk=d['keep']).update(quantity=d['total'])
+        ShoppingListItem.objects.filter(
+            user_id=d['user_id'], product_id=d['product_id'],
+        ).exclude(pk=d['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='shoppinglistitem',
+            name='shoppinglist_user_product',
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='shoppinglist_unique_item'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:51
+
+import os
+
+from django.db import migrations, models
+
+# dotychczasowe, zaszyte w kodzie mapowanie jednego ESP: półka 1 -> d1,
+# 2 -> d2, 3 -> waga; klucze w kolejności pierwszeństwa
+LEGACY_CHANNELS = [
+    ('d1_mm', 1, 'd1_mm', 'mm'),
+    ('d1', 1, 'd1_mm', 'mm'),
+    ('d2_mm', 2, 'd2_mm', 'mm'),
+    ('d2', 2, 'd2_mm', 'mm'),
+    ('weight_g', 3, 'weight_g', 'g'),
+    ('weight_kg', 3, 'weight_g', 'kg'),
+]
+
+
+def seed_legacy(apps, schema_editor):
+    SensorChannel = apps.get_model('db', 'SensorChannel')
+    store = os.environ.get('MQTT_BASE', 'store')
+    SensorChannel.objects.bulk_create([
+        SensorChannel(store=store, device='*', key=key, shelf=shelf, field=field, unit=unit)
+        for key, shelf, field, unit in LEGACY_CHANNELS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0013_shoppinglist_unique_item'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorChannel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store', models.CharField(default='store', max_length=50)),
+                ('device', models.CharField(default='*', max_length=100)),
+                ('key', models.CharField(max_length=50)),
+                ('shelf', models.PositiveSmallIntegerField(db_index=True)),
+                ('field', models.CharField(choices=[('d1_mm', 'distance 1 (mm)'), ('d2_mm', 'distance 2 (mm)'), ('weight_g', 'weight (g)')], max_length=10)),
+                ('unit', models.CharField(choices=[('mm', 'mm'), ('cm', 'cm'), ('g', 'g'), ('kg', 'kg')], max_length=5)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['store', 'device', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'device', 'key'), name='sensorchannel_unique')],
+            },
+        ),
+        migrations.RunPython(seed_legacy, migrations.RunPython.noop),
+    ]
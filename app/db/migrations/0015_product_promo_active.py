@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+def seed_promo_active(apps, schema_editor):
+    # promocja trwa, jeśli ostatnia zmiana ceny to ustawienie promocji
+    # (po niej zmiana price1 przesunęła price2, a zdjęcie promocji to NULL)
+    Product = apps.get_model('db', 'Product')
+    PriceHistory = apps.get_model('db', 'PriceHistory')
+    latest = PriceHistory.objects.filter(
+        product_id=models.OuterRef('pk'),
+    ).order_by('-changed_at', '-id')
+    Product.objects.filter(price2__isnull=False).annotate(
+        last_kind=models.Subquery(latest.values('kind')[:1]),
+        last_price=models.Subquery(latest.values('price')[:1]),
+    ).filter(
+        last_kind='promo', last_price__isnull=False,
+    ).update(promo_active=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0014_sensor_channels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='promo_active',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(seed_promo_active, migrations.RunPython.noop),
+    ]
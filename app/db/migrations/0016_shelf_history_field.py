@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:12
+
+from django.db import migrations, models
+
+
+def backfill_field(apps, schema_editor):
+    # dotychczasowa historia nie rozróżniała kolumn: przypisujemy ją tylko
+    # półkom z jedną kolumną w kanałach, reszta zostaje z field=''
+    SensorChannel = apps.get_model('db', 'SensorChannel')
+    fields = {}
+    for shelf, field in SensorChannel.objects.values_list('shelf', 'field').distinct():
+        fields.setdefault(shelf, set()).add(field)
+    for shelf, names in fields.items():
+        if len(names) != 1:
+            continue
+        (field,) = names
+        for name in ('ShelfReading', 'ShelfRollup'):
+            apps.get_model('db', name).objects.filter(shelf=shelf).update(field=field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0015_product_promo_active'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='shelfrollup',
+            name='shelfrollup_unique_bucket',
+        ),
+        migrations.RemoveIndex(
+            model_name='shelfreading',
+            name='shelfreading_shelf_ts',
+        ),
+        migrations.AddField(
+            model_name='shelfreading',
+            name='field',
+            field=models.CharField(default='', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shelfrollup',
+            name='field',
+            field=models.CharField(default='', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_field, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='shelfreading',
+            index=models.Index(fields=['shelf', 'field', 'ts'], name='shelfreading_shelf_field_ts'),
+        ),
+        migrations.AddConstraint(
+            model_name='shelfrollup',
+            constraint=models.UniqueConstraint(fields=('shelf', 'field', 'bucket', 'bucket_start'), name='shelfrollup_unique_field_bucket'),
+        ),
+    ]
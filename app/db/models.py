@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -46,6 +48,45 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
+class ProductQuerySet(models.QuerySet):
+    """
+    attach_telemetry() dokleja d1_mm/d2_mm/weight_g z ShelfState po
+    pobraniu wyników: jedno zapytanie o wszystkie półki zamiast
+    podzapytań per wiersz (półek jest kilka, produktów tysiące).
+    """
+    _attach_telemetry = False
+
+    def attach_telemetry(self):
+        clone = self._chain()
+        clone._attach_telemetry = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._attach_telemetry = self._attach_telemetry
+        return clone
+
+    def _fetch_all(self):
+        fetched = self._result_cache is None
+        super()._fetch_all()
+        if fetched and self._attach_telemetry:
+            attach_shelf_telemetry(self._result_cache)
+
+
+def attach_shelf_telemetry(products):
+    shelves = {
+        shelf: (d1, d2, wg)
+        for shelf, d1, d2, wg in ShelfState.objects.values_list(
+            "shelf", "d1_mm", "d2_mm", "weight_g"
+        )
+    }
+    empty = (None, None, None)
+    for p in products:
+        if not isinstance(p, Product):
+            continue
+        p.d1_mm, p.d2_mm, p.weight_g = shelves.get(p.shelf_number, empty)
+
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -55,8 +96,14 @@ class Product(models.Model):
     price1 = models.DecimalField(max_digits=10, decimal_places=2)
     price2 = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     price3 = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    # price2 jest ceną promocyjną tylko przy promo_active; po zmianie price1
+    # (shift_price1) trzyma poprzednią cenę regularną
+    promo_active = models.BooleanField(default=False)
+    # najniższa cena z ostatnich 30 dni (Omnibus), utrzymywana przez db/prices.py
+    lowest_price_30d = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
 
     added_data = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     is_active = models.BooleanField(default=True)
 
     # KTO dodał
@@ -71,10 +118,58 @@ class Product(models.Model):
     # ⬇⬇⬇ KLUCZOWE: przypisana półka do produktu (1..3)
     shelf_number = models.PositiveSmallIntegerField(null=True, blank=True)
 
+    # tsvector z name/country_of_origin/description, utrzymywany triggerem
+    # w bazie (migracja 0011), więc działa też dla bulk_create/update()
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="product_search_gin"),
+            # cursor paginacja po added_data (z id jako rozstrzygnięciem)
+            models.Index(fields=["added_data", "id"], name="product_added_id"),
+            # filtr dostępności / bulk promocje po półce
+            models.Index(
+                fields=["shelf_number", "is_active"],
+                name="product_shelf_active",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class PriceHistory(models.Model):
+    """Każda zmiana ceny produktu (regularnej albo promocyjnej)."""
+    KIND_REGULAR = "regular"
+    KIND_PROMO = "promo"
+    KIND_CHOICES = [
+        (KIND_REGULAR, "Regular"),
+        (KIND_PROMO, "Promotion"),
+    ]
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="price_history"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # NULL przy kind=promo oznacza koniec promocji
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["product", "kind", "changed_at"],
+                name="pricehistory_product_kind_ts",
+            ),
+            models.Index(fields=["changed_at"], name="pricehistory_ts"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.kind}={self.price}@{self.changed_at}"
+
+
 class ShoppingListItem(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -85,8 +180,19 @@ class ShoppingListItem(models.Model):
     quantity = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "product"], name="shoppinglist_unique_item"
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.user.username}: {self.product.name} x {self.quantity}"
+        # bez dociągania user/product (np. w logach i adminie)
+        return (
+            f"user={self.user_id}: product={self.product_id} "
+            f"x {self.quantity}"
+        )
 
 
 class ShelfState(models.Model):
@@ -98,3 +204,137 @@ class ShelfState(models.Model):
 
     def __str__(self):
         return f"ShelfState(shelf={self.shelf})"
+
+
+class ShelfReading(models.Model):
+    """Surowa historia odczytów półki (append-only)."""
+    shelf = models.PositiveSmallIntegerField()
+    # kolumna ShelfState (d1_mm/d2_mm/weight_g) – półka może mieć kilka
+    field = models.CharField(max_length=10)
+    ts = models.DateTimeField()
+    value = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["shelf", "field", "ts"],
+                name="shelfreading_shelf_field_ts",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"ShelfReading(shelf={self.shelf}, {self.field}, ts={self.ts})"
+        )
+
+
+class ShelfRollup(models.Model):
+    """Agregaty odczytów w kubełkach czasowych, liczone przyrostowo."""
+    BUCKET_MINUTE = "1m"
+    BUCKET_HOUR = "1h"
+    BUCKET_CHOICES = [
+        (BUCKET_MINUTE, "1 minute"),
+        (BUCKET_HOUR, "1 hour"),
+    ]
+
+    shelf = models.PositiveSmallIntegerField()
+    field = models.CharField(max_length=10)
+    bucket = models.CharField(max_length=2, choices=BUCKET_CHOICES)
+    bucket_start = models.DateTimeField()
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+    sum_value = models.FloatField()
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["shelf", "field", "bucket", "bucket_start"],
+                name="shelfrollup_unique_field_bucket",
+            ),
+        ]
+
+    @property
+    def avg_value(self):
+        return self.sum_value / self.count if self.count else None
+
+    def __str__(self):
+        return (
+            f"ShelfRollup(shelf={self.shelf}, {self.field}, "
+            f"{self.bucket}@{self.bucket_start})"
+        )
+
+
+class ShelfCalibration(models.Model):
+    """
+    Kalibracja półki do liczenia dostępności:
+      - czujnik odległości: empty_distance_mm (odczyt przy pustej półce)
+        i unit_depth_mm (ile mm zajmuje jedna sztuka),
+      - waga: unit_weight_g (+ tare_g, czyli waga pustej półki).
+    """
+    shelf = models.PositiveSmallIntegerField(unique=True)
+    empty_distance_mm = models.FloatField(null=True, blank=True)
+    unit_depth_mm = models.FloatField(null=True, blank=True)
+    unit_weight_g = models.FloatField(null=True, blank=True)
+    tare_g = models.FloatField(default=0)
+    low_units = models.PositiveIntegerField(default=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ShelfCalibration(shelf={self.shelf})"
+
+
+class SensorChannel(models.Model):
+    """
+    Rejestr kanałów czujników: (sklep, urządzenie, klucz w payloadzie)
+    -> półka i kolumna ShelfState. store to prefiks topicu MQTT
+    (<store>/device/<device>/telemetry), device="*" pasuje do każdego
+    urządzenia sklepu bez własnych wpisów. Numery półek są globalne
+    (ShelfState.shelf), więc różne sklepy używają rozłącznych numerów.
+    """
+    FIELD_CHOICES = [
+        ("d1_mm", "distance 1 (mm)"),
+        ("d2_mm", "distance 2 (mm)"),
+        ("weight_g", "weight (g)"),
+    ]
+    UNIT_CHOICES = [("mm", "mm"), ("cm", "cm"), ("g", "g"), ("kg", "kg")]
+    # jednostka odczytu -> (jednostka kolumny, mnożnik)
+    UNIT_SCALE = {
+        "mm": ("mm", 1.0), "cm": ("mm", 10.0),
+        "g": ("g", 1.0), "kg": ("g", 1000.0),
+    }
+    FIELD_UNIT = {"d1_mm": "mm", "d2_mm": "mm", "weight_g": "g"}
+    ANY_DEVICE = "*"
+
+    store = models.CharField(max_length=50, default="store")
+    device = models.CharField(max_length=100, default=ANY_DEVICE)
+    key = models.CharField(max_length=50)
+    shelf = models.PositiveSmallIntegerField(db_index=True)
+    field = models.CharField(max_length=10, choices=FIELD_CHOICES)
+    unit = models.CharField(max_length=5, choices=UNIT_CHOICES)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["store", "device", "key"], name="sensorchannel_unique"
+            ),
+        ]
+        ordering = ["store", "device", "id"]
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if self.UNIT_SCALE[self.unit][0] != self.FIELD_UNIT[self.field]:
+            raise ValidationError(
+                {"unit": f"Unit {self.unit} does not fit {self.field}."}
+            )
+
+    @property
+    def scale(self) -> float:
+        return self.UNIT_SCALE[self.unit][1]
+
+    def __str__(self):
+        return (
+            f"{self.store}/{self.device}:{self.key} -> "
+            f"shelf {self.shelf}.{self.field}"
+        )
@@ -0,0 +1,90 @@
+# db/prices.py
+from datetime import timedelta
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import PriceHistory, Product
+
+LOWEST_WINDOW = timedelta(days=30)
+REFRESH_CHUNK = 1000
+
+
+def record_price_changes(changes, now=None):
+    """
+    Zapisuje zmiany cen [(product_id, kind, price), ...] do PriceHistory
+    i przelicza Product.lowest_price_30d tylko dla dotkniętych produktów.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    now = now or timezone.now()
+    PriceHistory.objects.bulk_create(
+        [
+            PriceHistory(product_id=pk, kind=kind, price=price, changed_at=now)
+            for pk, kind, price in changes
+        ],
+        batch_size=REFRESH_CHUNK,
+    )
+    refresh_lowest_prices({pk for pk, _, _ in changes}, now=now)
+
+
+def refresh_lowest_prices(product_ids, now=None):
+    """
+    Przelicza najniższą cenę z okna 30 dni dla podanych produktów.
+    Liczą się wpisy z okna oraz ceny obowiązujące na jego początku
+    (ostatni wpis każdego rodzaju sprzed okna) i bieżąca price1.
+    Dwa zapytania do historii + jeden bulk_update na paczkę produktów.
+    """
+    now = now or timezone.now()
+    cutoff = now - LOWEST_WINDOW
+    ids = list(product_ids)
+
+    for i in range(0, len(ids), REFRESH_CHUNK):
+        chunk = ids[i:i + REFRESH_CHUNK]
+        products = Product.objects.only(
+            "id", "price1", "lowest_price_30d"
+        ).in_bulk(chunk)
+        lows = {pk: p.price1 for pk, p in products.items()}
+
+        def take(pk, price):
+            if price is not None and pk in lows and price < lows[pk]:
+                lows[pk] = price
+
+        for pk, price in PriceHistory.objects.filter(
+            product_id__in=chunk, changed_at__gte=cutoff
+        ).values_list("product_id", "price"):
+            take(pk, price)
+
+        latest_before = PriceHistory.objects.filter(
+            product_id=OuterRef("product_id"),
+            kind=OuterRef("kind"),
+            changed_at__lt=cutoff,
+        ).order_by("-changed_at", "-id").values("id")[:1]
+        for pk, price in PriceHistory.objects.filter(
+            product_id__in=chunk,
+            changed_at__lt=cutoff,
+            id=Subquery(latest_before),
+        ).values_list("product_id", "price"):
+            take(pk, price)
+
+        dirty = []
+        for pk, p in products.items():
+            if p.lowest_price_30d != lows[pk]:
+                p.lowest_price_30d = lows[pk]
+                dirty.append(p)
+        Product.objects.bulk_update(dirty, ["lowest_price_30d"])
+
+
+def refresh_expiring(now=None):
+    """
+    Produkty, którym wpis może właśnie wypaść z okna 30 dni
+    (zmiana ceny w ciągu ostatnich 31 dni). Do uruchamiania raz dziennie.
+    """
+    now = now or timezone.now()
+    ids = PriceHistory.objects.filter(
+        changed_at__gte=now - LOWEST_WINDOW - timedelta(days=1)
+    ).values_list("product_id", flat=True).distinct()
+    ids = list(ids)
+    refresh_lowest_prices(ids, now=now)
+    return len(ids)
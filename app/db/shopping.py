@@ -0,0 +1,133 @@
+# db/shopping.py
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, ShoppingListItem
+
+
+# pola produktu w odpowiedzi listy zakupów (ProductShortSerializer)
+PRODUCT_FIELDS = ("id", "name", "picture", "price1")
+
+# górna granica quantity (kolumna integer w Postgresie)
+MAX_QUANTITY = 2147483647
+
+
+def add_items(user_id, items):
+    """
+    Dodaje produkty do listy zakupów jednym INSERT ... SELECT ... ON CONFLICT
+    (user, product) DO UPDATE SET quantity = quantity + n.
+    items: [(product_id, quantity), ...]; powtórzenia są sumowane (suma
+    obcinana do MAX_QUANTITY), nieistniejące produkty pomijane (brak ich
+    w wyniku).
+    Zwraca {product_id: (item, created)}: pozycja z upsertu z dołączonym
+    produktem (PRODUCT_FIELDS) i czy wiersz został utworzony.
+    W Postgresie upsert i produkty to jedno zapytanie (CTE).
+    """
+    merged = {}
+    for product_id, qty in items:
+        merged[product_id] = min(merged.get(product_id, 0) + qty, MAX_QUANTITY)
+    if not merged:
+        return {}
+
+    table = ShoppingListItem._meta.db_table
+    products = Product._meta.db_table
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    values = ", ".join(["(%s, %s)"] * len(merged))
+    params = [user_id, now]
+    for product_id, qty in merged.items():
+        params.extend([product_id, qty])
+
+    postgres = connection.vendor == "postgresql"
+    # xmax = 0 tylko dla wiersza wstawionego (nie zaktualizowanego);
+    # SQLite nie ma xmax – nowy wiersz ma created_at z tego zapytania
+    created = "(xmax = 0)" if postgres else "(created_at = %s)"
+    upsert = (
+        f"INSERT INTO {table} (user_id, product_id, quantity, created_at) "
+        f"SELECT %s, p.id, v.column2, %s FROM (VALUES {values}) AS v "
+        f"JOIN {products} p ON p.id = v.column1 WHERE TRUE "
+        "ON CONFLICT (user_id, product_id) DO UPDATE SET "
+        # suma bez przepełnienia integer (DataError -> 500)
+        f"quantity = CASE WHEN {table}.quantity > "
+        f"{MAX_QUANTITY} - EXCLUDED.quantity THEN {MAX_QUANTITY} "
+        f"ELSE {table}.quantity + EXCLUDED.quantity END "
+        f"RETURNING id, product_id, quantity, {created} AS created"
+    )
+    if postgres:
+        columns = ", ".join(f"p.{name}" for name in PRODUCT_FIELDS[1:])
+        sql = (
+            f"WITH item AS ({upsert}) "
+            f"SELECT item.*, {columns} FROM item "
+            f"JOIN {products} p ON p.id = item.product_id"
+        )
+    else:
+        sql = upsert
+        params.append(now)
+
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+
+    if postgres:
+        product_rows = {row[1]: row[4:] for row in rows}
+    else:
+        product_rows = {
+            p[0]: p[1:] for p in Product.objects.filter(
+                pk__in=[row[1] for row in rows]
+            ).values_list(*PRODUCT_FIELDS)
+        }
+
+    out = {}
+    for row in rows:
+        item_id, product_id, qty, is_new = row[:4]
+        item = ShoppingListItem.from_db(
+            connection.alias, ["id", "user_id", "product_id", "quantity"],
+            [item_id, user_id, product_id, qty],
+        )
+        item.product = Product.from_db(
+            connection.alias, PRODUCT_FIELDS,
+            [product_id, *product_rows[product_id]],
+        )
+        out[product_id] = (item, bool(is_new))
+    return out
+
+
+def basket_summary(user_id):
+    """
+    Podsumowanie listy zakupów jednym zapytaniem agregującym:
+    liczba pozycji, sztuk, suma po cenach bieżących (price2, jeśli trwa
+    promocja – promo_active, inaczej price1), suma regularna i oszczędność.
+    """
+    money = DecimalField(max_digits=12, decimal_places=2)
+    zero = Decimal("0.00")
+    # samo price2 nie wystarczy: po zmianie ceny trzyma poprzednią regularną
+    current_price = Case(
+        When(
+            Q(product__promo_active=True, product__price2__isnull=False),
+            then=F("product__price2"),
+        ),
+        default=F("product__price1"),
+    )
+    row = ShoppingListItem.objects.filter(user_id=user_id).aggregate(
+        items=Count("id"),
+        units=Coalesce(Sum("quantity"), 0),
+        total=Sum(
+            F("quantity") * current_price,
+            output_field=money,
+        ),
+        regular_total=Sum(
+            F("quantity") * F("product__price1"), output_field=money
+        ),
+    )
+    total = Decimal(row["total"] or zero).quantize(zero)
+    regular = Decimal(row["regular_total"] or zero).quantize(zero)
+    return {
+        "items": row["items"],
+        "units": row["units"],
+        "total": total,
+        "regular_total": regular,
+        "savings": regular - total,
+    }
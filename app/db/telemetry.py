@@ -0,0 +1,115 @@
+# db/telemetry.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ShelfReading, ShelfRollup
+
+UPSERT_CHUNK = 1000
+
+BUCKET_SECONDS = {
+    ShelfRollup.BUCKET_MINUTE: 60,
+    ShelfRollup.BUCKET_HOUR: 3600,
+}
+
+
+def bucket_start(ts, bucket: str):
+    step = BUCKET_SECONDS[bucket]
+    epoch = int(ts.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % step, tz=dt_timezone.utc)
+
+
+def _rollup_upsert_sql(rows: int) -> str:
+    table = ShelfRollup._meta.db_table
+    # LEAST/GREATEST w Postgresie, wieloargumentowe MIN/MAX w SQLite
+    least, greatest = (
+        ("LEAST", "GREATEST") if connection.vendor == "postgresql"
+        else ("MIN", "MAX")
+    )
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * rows)
+    return (
+        f"INSERT INTO {table} "
+        "(shelf, field, bucket, bucket_start, "
+        "min_value, max_value, sum_value, count) "
+        f"VALUES {values} "
+        "ON CONFLICT (shelf, field, bucket, bucket_start) DO UPDATE SET "
+        f"min_value = {least}({table}.min_value, EXCLUDED.min_value), "
+        f"max_value = {greatest}({table}.max_value, EXCLUDED.max_value), "
+        f"sum_value = {table}.sum_value + EXCLUDED.sum_value, "
+        f"count = {table}.count + EXCLUDED.count"
+    )
+
+
+def record_readings(readings):
+    """
+    Dopisuje odczyty (shelf, field, ts, value) do historii i aktualizuje
+    agregaty 1m/1h osobno dla każdej kolumny półki. Agregaty są najpierw
+    liczone w pamięci, więc na cały batch przypada jeden INSERT do
+    historii i jeden upsert agregatów.
+    """
+    readings = [r for r in readings if r[3] is not None]
+    if not readings:
+        return
+
+    acc = {}
+    for shelf, field, ts, value in readings:
+        for bucket in BUCKET_SECONDS:
+            key = (shelf, field, bucket, bucket_start(ts, bucket))
+            a = acc.get(key)
+            if a is None:
+                acc[key] = [value, value, value, 1]
+            else:
+                a[0] = min(a[0], value)
+                a[1] = max(a[1], value)
+                a[2] += value
+                a[3] += 1
+
+    rows = list(acc.items())
+    with transaction.atomic():
+        ShelfReading.objects.bulk_create(
+            [
+                ShelfReading(shelf=s, field=f, ts=ts, value=v)
+                for s, f, ts, v in readings
+            ],
+            batch_size=UPSERT_CHUNK,
+        )
+        with connection.cursor() as cur:
+            for i in range(0, len(rows), UPSERT_CHUNK):
+                chunk = rows[i:i + UPSERT_CHUNK]
+                params = []
+                for (shelf, field, bucket, start), agg in chunk:
+                    start = connection.ops.adapt_datetimefield_value(start)
+                    params.extend([shelf, field, bucket, start, *agg])
+                cur.execute(_rollup_upsert_sql(len(chunk)), params)
+
+
+def prune_readings(older_than: timedelta, chunk_size=10000) -> int:
+    """
+    Usuwa surowe odczyty starsze niż `older_than` paczkami po
+    `chunk_size` (jeden DELETE ... WHERE id IN (...) na paczkę).
+    """
+    return _prune_chunks(
+        ShelfReading.objects.filter(ts__lt=timezone.now() - older_than),
+        chunk_size,
+    )
+
+
+def prune_rollups(bucket: str, older_than: timedelta, chunk_size=10000) -> int:
+    return _prune_chunks(
+        ShelfRollup.objects.filter(
+            bucket=bucket, bucket_start__lt=timezone.now() - older_than
+        ),
+        chunk_size,
+    )
+
+
+def _prune_chunks(qs, chunk_size) -> int:
+    model = qs.model
+    total = 0
+    while True:
+        ids = list(qs.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return total
+        deleted, _ = model.objects.filter(id__in=ids).delete()
+        total += deleted
@@ -0,0 +1,123 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from db.models import (
+    PriceHistory, Product, ShelfCalibration, ShelfState, User,
+)
+from products import cache as catalogue_cache
+
+URL = reverse("admin:db_product_changelist")
+
+
+class ProductAdminChangelistTests(TestCase):
+
+    def setUp(self):
+        admin = User.objects.create_superuser(
+            "admin@example.com", "admin", "pass12345"
+        )
+        self.client.force_login(admin)
+        ShelfState.objects.create(shelf=1, d1_mm=420.0)
+        ShelfState.objects.create(shelf=3, weight_g=1500.0)
+
+    def _add_products(self, n):
+        Product.objects.bulk_create([
+            Product(
+                name=f"produkt {i}", price1=Decimal("1.00"),
+                shelf_number=(i % 4) or None,
+            )
+            for i in range(n)
+        ])
+
+    def _queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(URL)
+        self.assertEqual(res.status_code, 200)
+        return len(ctx), res
+
+    def test_constant_queries_regardless_of_page_size(self):
+        self._add_products(5)
+        few, _ = self._queries()
+        self._add_products(95)
+        many, res = self._queries()
+
+        self.assertEqual(few, many)
+        self.assertContains(res, "420.0")
+        self.assertContains(res, "1500.0")
+
+
+class ProductAdminCatalogueTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_superuser(
+            "admin@example.com", "admin", "pass12345"
+        )
+        self.client.force_login(admin)
+        self.product = Product.objects.create(
+            name="Mleko", price1=Decimal("3.49")
+        )
+
+    def test_edit_and_delete_bump_catalogue_version(self):
+        before = catalogue_cache.catalogue_version()
+        res = self.client.post(
+            reverse("admin:db_product_change", args=[self.product.pk]),
+            {"name": "Mleko 2%", "price1": "3.49", "country_of_origin": ""},
+        )
+        self.assertEqual(res.status_code, 302)
+        edited = catalogue_cache.catalogue_version()
+        self.assertNotEqual(edited, before)
+
+        self.client.post(
+            reverse("admin:db_product_delete", args=[self.product.pk]),
+            {"post": "yes"},
+        )
+        self.assertFalse(Product.objects.exists())
+        self.assertNotEqual(catalogue_cache.catalogue_version(), edited)
+
+    def test_price_edit_is_recorded_in_history(self):
+        self.client.post(
+            reverse("admin:db_product_change", args=[self.product.pk]),
+            {
+                "name": "Mleko", "price1": "2.99", "price2": "2.49",
+                "promo_active": "on", "country_of_origin": "",
+            },
+        )
+
+        history = PriceHistory.objects.filter(product=self.product)
+        self.assertEqual(
+            sorted(history.values_list("kind", "price")),
+            [
+                (PriceHistory.KIND_PROMO, Decimal("2.49")),
+                (PriceHistory.KIND_REGULAR, Decimal("2.99")),
+            ],
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.lowest_price_30d, Decimal("2.49"))
+
+
+class ShelfCalibrationAdminTests(TestCase):
+
+    def test_bulk_delete_bumps_catalogue_version(self):
+        cache.clear()
+        admin = User.objects.create_superuser(
+            "admin@example.com", "admin", "pass12345"
+        )
+        self.client.force_login(admin)
+        calib = ShelfCalibration.objects.create(shelf=1, unit_depth_mm=50.0)
+        before = catalogue_cache.catalogue_version()
+
+        self.client.post(
+            reverse("admin:db_shelfcalibration_changelist"),
+            {
+                "action": "delete_selected", "_selected_action": [calib.pk],
+                "post": "yes",
+            },
+        )
+
+        self.assertFalse(ShelfCalibration.objects.exists())
+        self.assertNotEqual(catalogue_cache.catalogue_version(), before)
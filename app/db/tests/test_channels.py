@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from app import mqtt_client
+from app.telemetry_codec import decode, parse_values
+from db.channels import ChannelRegistry, invalidate_channels
+from db.models import SensorChannel, ShelfState
+
+
+class ChannelRegistryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # kanały sklepu "store" (półki 1-3) zakłada migracja 0014
+        SensorChannel.objects.bulk_create([
+            SensorChannel(store="krk", device="esp-7", key="dist",
+                          shelf=101, field="d1_mm", unit="cm"),
+            SensorChannel(store="krk", device="esp-7", key="kg",
+                          shelf=102, field="weight_g", unit="kg"),
+            SensorChannel(store="krk", device="esp-8", key="dist",
+                          shelf=103, field="d1_mm", unit="mm",
+                          is_active=False),
+        ])
+
+    def setUp(self):
+        self.registry = ChannelRegistry(ttl=60)
+
+    def _decode(self, topic, data, shelf=None):
+        channels, topic_shelf = self.registry.for_topic(topic)
+        return self.registry.decode(
+            channels, parse_values(data), shelf=topic_shelf or shelf
+        )
+
+    def test_legacy_device_topic_maps_three_shelves(self):
+        values = self._decode(
+            "store/device/esp32-1/telemetry",
+            {"d1_mm": "571 mm", "d2": 530, "weight_kg": "1,5"},
+        )
+        self.assertEqual(values, {
+            1: {"d1_mm": 571.0},
+            2: {"d2_mm": 530.0},
+            3: {"weight_g": 1500.0},
+        })
+
+    def test_shelf_topic_and_payload_shelf_restrict_output(self):
+        data = {"d1_mm": 400, "d2_mm": 500}
+        self.assertEqual(
+            self._decode("store/shelf/2/telemetry", data),
+            {2: {"d2_mm": 500.0}},
+        )
+        self.assertEqual(
+            self._decode("store/device/x/telemetry", data, shelf=1),
+            {1: {"d1_mm": 400.0}},
+        )
+
+    def test_first_key_wins_zero_is_a_value(self):
+        values = self._decode(
+            "store/device/x/telemetry", {"d1_mm": 0, "d1": 420}
+        )
+        self.assertEqual(values, {1: {"d1_mm": 0.0}})
+
+    def test_second_store_with_units_and_inactive_channel(self):
+        self.assertEqual(
+            self._decode("krk/device/esp-7/telemetry", {"dist": 42, "kg": 2}),
+            {101: {"d1_mm": 420.0}, 102: {"weight_g": 2000.0}},
+        )
+        self.assertEqual(
+            self._decode("krk/device/esp-8/telemetry", {"dist": 42}), {}
+        )
+        self.assertEqual(
+            self._decode("nowhere/device/esp-7/telemetry", {"dist": 42}), {}
+        )
+        self.assertEqual(self.registry.store_for_shelf(101), "krk")
+        self.assertNotIn(103, self.registry.shelves())
+
+    def test_topic_lookup_is_memoised_until_invalidate(self):
+        topic = "krk/device/esp-7/telemetry"
+        self.registry.for_topic(topic)
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                self.registry.for_topic(topic)
+
+        SensorChannel.objects.filter(device="esp-7").update(shelf=201)
+        self.registry.invalidate()
+        channels, _ = self.registry.for_topic(topic)
+        self.assertEqual({c.shelf for c in channels}, {201})
+
+    def test_failed_reload_keeps_previous_channels(self):
+        topic = "krk/device/esp-7/telemetry"
+        self.registry.for_topic(topic)
+        self.registry.invalidate()
+
+        with mock.patch.object(
+            self.registry, "load", side_effect=OperationalError("db gone")
+        ):
+            channels, _ = self.registry.for_topic(topic)
+        self.assertEqual({c.shelf for c in channels}, {101, 102})
+        # następna próba dopiero po RELOAD_RETRY
+        self.assertFalse(self.registry.is_stale())
+
+    def test_mqtt_thread_closes_old_connections_before_reload(self):
+        self.registry.invalidate()
+        reading = decode(b'{"dist": 42}')
+        with mock.patch("db.channels.get_registry",
+                        return_value=self.registry), \
+                mock.patch("django.db.close_old_connections") as close, \
+                mock.patch.object(mqtt_client, "_enqueue") as enqueue:
+            mqtt_client._save_telemetry("krk/device/esp-7/telemetry", reading)
+            mqtt_client._save_telemetry("krk/device/esp-7/telemetry", reading)
+
+        close.assert_called_once_with()
+        enqueue.assert_called_with(101, {"d1_mm": 420.0})
+
+    def test_unit_must_fit_field(self):
+        channel = SensorChannel(key="w", shelf=5, field="weight_g", unit="cm")
+        with self.assertRaises(ValidationError):
+            channel.clean()
+
+
+class TelemetryEndpointChannelTests(TestCase):
+
+    def setUp(self):
+        SensorChannel.objects.create(
+            store="krk", device="esp-7", key="kg",
+            shelf=102, field="weight_g", unit="kg",
+        )
+        invalidate_channels()
+        self.addCleanup(invalidate_channels)
+
+    def test_post_uses_registered_channels(self):
+        url = reverse("products:telemetry-list")
+        res = APIClient().post(url, {"shelf": 102, "kg": 1.2}, format="json")
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(ShelfState.objects.get(shelf=102).weight_g, 1200.0)
+
+        res = APIClient().post(url, {"shelf": 104, "kg": 1}, format="json")
+        self.assertEqual(res.status_code, 400)
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from db.models import PriceHistory, Product
+from db.prices import record_price_changes, refresh_lowest_prices
+
+REGULAR = PriceHistory.KIND_REGULAR
+PROMO = PriceHistory.KIND_PROMO
+
+
+class LowestPriceTests(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Kawa", price1=Decimal("20.00")
+        )
+        self.now = timezone.now()
+
+    def _lowest(self):
+        self.product.refresh_from_db()
+        return self.product.lowest_price_30d
+
+    def test_promo_inside_window_is_lowest(self):
+        record_price_changes(
+            [(self.product.pk, PROMO, Decimal("15.00"))],
+            now=self.now - timedelta(days=3),
+        )
+        record_price_changes(
+            [(self.product.pk, PROMO, None)], now=self.now - timedelta(days=1)
+        )
+        self.assertEqual(self._lowest(), Decimal("15.00"))
+
+    def test_price_in_effect_at_window_start_counts(self):
+        record_price_changes(
+            [(self.product.pk, REGULAR, Decimal("12.00"))],
+            now=self.now - timedelta(days=40),
+        )
+        Product.objects.filter(pk=self.product.pk).update(price1="20.00")
+        record_price_changes(
+            [(self.product.pk, REGULAR, Decimal("20.00"))],
+            now=self.now - timedelta(days=10),
+        )
+        refresh_lowest_prices([self.product.pk], now=self.now)
+        self.assertEqual(self._lowest(), Decimal("12.00"))
+
+        refresh_lowest_prices(
+            [self.product.pk], now=self.now + timedelta(days=25)
+        )
+        self.assertEqual(self._lowest(), Decimal("20.00"))
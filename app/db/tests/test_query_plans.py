@@ -0,0 +1,200 @@
+import json
+import unittest
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from db.models import Product, ShelfState, ShoppingListItem, User
+
+# tabele, na których sekwencyjny skan oznacza brakujący indeks
+LARGE_TABLES = {
+    "db_product",
+    "db_shoppinglistitem",
+    "db_pricehistory",
+    "db_shelfreading",
+    "db_shelfrollup",
+    "db_user",
+    "authtoken_token",
+}
+
+PRODUCTS = 5000
+USERS = 50
+
+
+def _nodes(plan):
+    """Wszystkie węzły drzewa planu (EXPLAIN FORMAT JSON)."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _seq_scans(plan):
+    """Nazwy tabel ze 'Seq Scan' w drzewie planu."""
+    return [
+        node.get("Relation Name")
+        for node in _nodes(plan) if node.get("Node Type") == "Seq Scan"
+    ]
+
+
+def _indexes(plan):
+    """Nazwy indeksów użytych w drzewie planu."""
+    return {
+        node["Index Name"] for node in _nodes(plan) if "Index Name" in node
+    }
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "EXPLAIN plans are PostgreSQL-specific"
+)
+class QueryPlanTests(TestCase):
+    """
+    Gorące zapytania wykonujemy przez API, przechwytujemy SQL i puszczamy
+    przez EXPLAIN z enable_seqscan=off: planner wybierze wtedy Seq Scan
+    tylko, jeśli nie ma żadnego indeksu, który da się użyć.
+
+    Sam brak Seq Scan niewiele mówi – zamiast niego planner przejdzie
+    cały *_pkey z predykatem w Filter. Dlatego zapytania, dla których
+    powstały konkretne indeksy, sprawdzamy po nazwie indeksu w planie.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(
+            "employee@example.com", "employee", "pass12345", is_employee=True
+        )
+        users = User.objects.bulk_create([
+            User(email=f"u{i}@example.com", username=f"u{i}", password="!")
+            for i in range(USERS)
+        ])
+        products = Product.objects.bulk_create(
+            [
+                Product(
+                    name=f"produkt {i}",
+                    price1=Decimal("9.99"),
+                    shelf_number=(i % 4) or None,
+                )
+                for i in range(PRODUCTS)
+            ],
+            batch_size=1000,
+        )
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(user=u, product=products[j], quantity=1)
+            for i, u in enumerate(users)
+            for j in range(i, PRODUCTS, USERS * 2)
+        ])
+        for shelf, field in ((1, "d1_mm"), (2, "d2_mm"), (3, "weight_g")):
+            ShelfState.objects.create(shelf=shelf, **{field: 100.0})
+        cls.shopper = users[0]
+        cls.product = products[0]
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE")
+
+    def setUp(self):
+        with connection.cursor() as cur:
+            cur.execute("SET LOCAL enable_seqscan = off")
+
+    def _plans(self, call):
+        """[(sql, plan)] zapytań wykonanych przez call()."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = call()
+        self.assertLess(res.status_code, 400)
+
+        plans = []
+        for q in ctx.captured_queries:
+            sql = q["sql"]
+            if not sql.lstrip().upper().startswith(
+                ("SELECT", "UPDATE", "DELETE", "INSERT")
+            ):
+                continue
+            with connection.cursor() as cur:
+                cur.execute("EXPLAIN (FORMAT JSON) " + sql)
+                raw = cur.fetchone()[0]
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+            plans.append((sql, plan["Plan"]))
+        return plans
+
+    def _assert_no_seq_scans(self, call):
+        for sql, plan in self._plans(call):
+            scans = set(_seq_scans(plan)) & LARGE_TABLES
+            self.assertFalse(scans, f"Seq Scan on {scans} in:\n{sql}")
+
+    def _assert_uses_index(self, call, index):
+        plans = self._plans(call)
+        used = set().union(*(_indexes(plan) for _, plan in plans))
+        self.assertIn(
+            index, used,
+            f"{index} not used (indexes: {sorted(used)}) in:\n"
+            + "\n".join(sql for sql, _ in plans),
+        )
+
+    def test_public_listing(self):
+        client = APIClient()
+        url = reverse("products:product_view")
+        self._assert_no_seq_scans(lambda: client.get(url, {"page_size": 50}))
+        self._assert_no_seq_scans(
+            lambda: client.get(url, {"ordering": "-added_data"})
+        )
+
+    def test_employee_listing_with_ordering(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+        url = reverse("products:product-list")
+        self._assert_no_seq_scans(
+            lambda: client.get(url, {"ordering": "added_data"})
+        )
+        self._assert_no_seq_scans(
+            lambda: client.get(url, {"availability": "unknown"})
+        )
+
+    def test_shopping_list_lookup(self):
+        client = APIClient()
+        client.force_authenticate(self.shopper)
+        url = "/api/shopping/shopping-list/"
+        self._assert_no_seq_scans(
+            lambda: client.post(
+                url, {"product": self.product.pk, "quantity": 1},
+                format="json",
+            )
+        )
+        self._assert_no_seq_scans(lambda: client.get(url))
+
+    def test_telemetry_upsert(self):
+        client = APIClient()
+        url = reverse("products:telemetry-list")
+        self._assert_no_seq_scans(
+            lambda: client.post(url, {"shelf": 1, "d1_mm": 420}, format="json")
+        )
+
+    def test_cursor_ordering_uses_added_data_index(self):
+        cache.clear()
+        client = APIClient()
+        url = reverse("products:product_view")
+        self._assert_uses_index(
+            lambda: client.get(url, {"ordering": "-added_data"}),
+            "product_added_id",
+        )
+
+    def test_search_uses_gin_index(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+        url = reverse("products:product-list")
+        self._assert_uses_index(
+            lambda: client.get(url, {"search": str(PRODUCTS - 1)}),
+            "product_search_gin",
+        )
+
+    def test_bulk_promotion_by_shelf_uses_shelf_index(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+        url = reverse("products:product-bulk-promotion")
+        self._assert_uses_index(
+            lambda: client.post(
+                url, {"shelf": 1, "percent": 10}, format="json"
+            ),
+            "product_shelf_active",
+        )
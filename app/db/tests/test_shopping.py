@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from db.models import Product, ShoppingListItem, User
+from db.shopping import add_items
+
+
+class AddItemsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            "klient@example.com", "klient", "pass12345"
+        )
+        self.milk = Product.objects.create(
+            name="Mleko", price1=Decimal("3.50")
+        )
+        self.bread = Product.objects.create(
+            name="Chleb", price1=Decimal("5.00")
+        )
+
+    def test_insert_then_increment(self):
+        first = add_items(self.user.id, [(self.milk.pk, 2)])
+        second = add_items(self.user.id, [(self.milk.pk, 3)])
+
+        self.assertTrue(first[self.milk.pk][1])
+        item, created = second[self.milk.pk]
+        self.assertFalse(created)
+        self.assertEqual(item.quantity, 5)
+        self.assertEqual(item.product.name, "Mleko")
+        self.assertEqual(ShoppingListItem.objects.count(), 1)
+
+    def test_existing_zero_quantity_row_is_not_created(self):
+        ShoppingListItem.objects.create(
+            user=self.user, product=self.milk, quantity=0
+        )
+        result = add_items(self.user.id, [(self.milk.pk, 2)])
+
+        item, created = result[self.milk.pk]
+        self.assertFalse(created)
+        self.assertEqual(item.quantity, 2)
+
+    def test_unknown_products_are_skipped(self):
+        result = add_items(self.user.id, [(self.milk.pk, 1), (999999, 1)])
+
+        self.assertEqual(list(result), [self.milk.pk])
+
+    def test_bulk_merges_repeated_products(self):
+        result = add_items(
+            self.user.id,
+            [(self.milk.pk, 1), (self.bread.pk, 2), (self.milk.pk, 4)],
+        )
+
+        self.assertEqual(result[self.milk.pk][0].quantity, 5)
+        self.assertEqual(result[self.bread.pk][0].quantity, 2)
+        self.assertEqual(
+            ShoppingListItem.objects.filter(user=self.user).count(), 2
+        )
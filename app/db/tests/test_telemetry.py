@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from db.models import ShelfReading, ShelfRollup
+from db.telemetry import record_readings, prune_readings
+
+
+class ShelfHistoryTests(TestCase):
+
+    def test_rollups_are_maintained_incrementally(self):
+        ts = datetime(2025, 10, 18, 12, 30, 15, tzinfo=timezone.utc)
+        record_readings([
+            (1, "d1_mm", ts, 400.0),
+            (1, "d1_mm", ts + timedelta(seconds=5), 420.0),
+        ])
+        record_readings([(1, "d1_mm", ts + timedelta(minutes=2), 380.0)])
+
+        self.assertEqual(ShelfReading.objects.filter(shelf=1).count(), 3)
+        hour = ShelfRollup.objects.get(shelf=1, bucket=ShelfRollup.BUCKET_HOUR)
+        self.assertEqual(hour.bucket_start, ts.replace(minute=0, second=0))
+        self.assertEqual(hour.count, 3)
+        self.assertEqual(hour.min_value, 380.0)
+        self.assertEqual(hour.max_value, 420.0)
+        self.assertAlmostEqual(hour.avg_value, 400.0)
+        minutes = ShelfRollup.objects.filter(bucket=ShelfRollup.BUCKET_MINUTE)
+        self.assertEqual(minutes.count(), 2)
+
+    def test_fields_of_one_shelf_have_separate_rollups(self):
+        ts = datetime(2025, 10, 18, 12, 30, 15, tzinfo=timezone.utc)
+        record_readings([
+            (1, "d1_mm", ts, 470.0),
+            (1, "weight_g", ts, 1600.0),
+        ])
+
+        hours = ShelfRollup.objects.filter(
+            shelf=1, bucket=ShelfRollup.BUCKET_HOUR
+        )
+        self.assertEqual(
+            {r.field: (r.min_value, r.max_value, r.count) for r in hours},
+            {"d1_mm": (470.0, 470.0, 1), "weight_g": (1600.0, 1600.0, 1)},
+        )
+        self.assertEqual(
+            ShelfReading.objects.filter(shelf=1, field="weight_g").count(), 1
+        )
+
+    def test_prune_deletes_old_rows_in_chunks(self):
+        old = datetime.now(timezone.utc) - timedelta(days=10)
+        record_readings(
+            [(2, "d2_mm", old + timedelta(seconds=i), 1.0) for i in range(5)]
+        )
+        record_readings([(2, "d2_mm", datetime.now(timezone.utc), 1.0)])
+
+        deleted = prune_readings(timedelta(days=7), chunk_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(ShelfReading.objects.count(), 1)
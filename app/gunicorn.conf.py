@@ -0,0 +1,38 @@
+# gunicorn.conf.py – produkcyjny profil serwera (zamiast runserver)
+#
+#   gunicorn -c gunicorn.conf.py app.wsgi                       # WSGI
+#   GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+#       gunicorn -c gunicorn.conf.py app.asgi                   # ASGI
+#
+# Dobór liczby workerów – patrz README ("Serwer produkcyjny").
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# API jest I/O-bound (Postgres, cache), więc domyślnie 2*CPU+1 procesów
+workers = int(
+    os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)
+)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# wątki na worker (tylko gthread); long-poll display-status trzyma wątek
+# do MQTT_ACK_TIMEOUT sekund, więc przy wielu handheldach warto >1
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+# recykling workerów ogranicza wycieki pamięci; jitter, żeby nie
+# restartowały się wszystkie naraz (lock MQTT przejmuje wtedy inny worker)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(
+    os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200")
+)
+
+# bez preload: AppConfig.ready() (klient MQTT, wątki) ma ruszyć w każdym
+# workerze po forku, a nie w masterze
+preload_app = False
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
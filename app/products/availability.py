@@ -0,0 +1,107 @@
+# app/products/availability.py
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from db.models import ShelfCalibration, ShelfState
+from .cache import catalogue_version
+
+EMPTY = "empty"
+LOW = "low"
+OK = "ok"
+UNKNOWN = "unknown"
+STATUSES = (EMPTY, LOW, OK, UNKNOWN)
+
+_calib_lock = threading.Lock()
+_calib = {"loaded_at": 0.0, "version": None, "data": None}
+
+
+def get_calibrations() -> dict:
+    """
+    Kalibracje {shelf: ShelfCalibration} trzymane w pamięci procesu (TTL)
+    i ważne tylko dla bieżącej wersji katalogu: zmiana kalibracji podbija
+    wspólną wersję (admin), więc pozostałe workery przeładują je, zanim
+    zapiszą w cache render pod nową wersją.
+    """
+    version = catalogue_version()
+    with _calib_lock:
+        fresh = (
+            time.monotonic() - _calib["loaded_at"]
+            < settings.SHELF_CALIBRATION_TTL
+        )
+        if (_calib["data"] is not None and fresh
+                and _calib["version"] == version):
+            return _calib["data"]
+    data = {c.shelf: c for c in ShelfCalibration.objects.all()}
+    with _calib_lock:
+        _calib["data"] = data
+        _calib["version"] = version
+        _calib["loaded_at"] = time.monotonic()
+    return data
+
+
+def invalidate_calibrations():
+    with _calib_lock:
+        _calib["data"] = None
+
+
+def evaluate(calib, d1_mm, d2_mm, weight_g):
+    """(status, szacowana liczba sztuk) dla jednego odczytu półki."""
+    if calib is None:
+        return None, None
+
+    units = None
+    if calib.unit_weight_g and weight_g is not None:
+        units = (weight_g - calib.tare_g) / calib.unit_weight_g
+    else:
+        distance = d1_mm if d1_mm is not None else d2_mm
+        if (distance is not None and calib.unit_depth_mm
+                and calib.empty_distance_mm is not None):
+            units = (calib.empty_distance_mm - distance) / calib.unit_depth_mm
+
+    if units is None:
+        return None, None
+    # mały margines na szum czujnika przed zaokrągleniem w dół
+    units = max(0, math.floor(units + 0.1))
+    if units == 0:
+        return EMPTY, 0
+    if units <= calib.low_units:
+        return LOW, units
+    return OK, units
+
+
+def annotate_availability(products):
+    """
+    Liczy dostępność dla całej listy w jednym przebiegu. Wszystkie produkty
+    z tej samej półki dzielą odczyt, więc wynik liczony jest raz na
+    (półka, odczyt), a reszta to odczyt ze słownika.
+    """
+    calibs = get_calibrations()
+    memo = {}
+    for p in products:
+        key = (
+            p.shelf_number,
+            getattr(p, "d1_mm", None),
+            getattr(p, "d2_mm", None),
+            getattr(p, "weight_g", None),
+        )
+        result = memo.get(key)
+        if result is None:
+            result = evaluate(calibs.get(key[0]), *key[1:])
+            memo[key] = result
+        p._availability = result
+    return products
+
+
+def shelves_by_status() -> dict:
+    """{status: [shelf, ...]} wg bieżących ShelfState (jedno zapytanie)."""
+    calibs = get_calibrations()
+    out = {s: [] for s in STATUSES}
+    for shelf, d1, d2, wg in ShelfState.objects.values_list(
+        "shelf", "d1_mm", "d2_mm", "weight_g"
+    ):
+        status, _ = evaluate(calibs.get(shelf), d1, d2, wg)
+        out[status or UNKNOWN].append(shelf)
+    return out
@@ -0,0 +1,294 @@
+# app/products/bulk.py
+import csv
+import json
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+from rest_framework import serializers
+
+from db.models import PriceHistory, Product
+from db.prices import record_price_changes
+from .serializers import repricing_changes, shift_price1
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+IMPORT_CHUNK = 500
+MAX_REPORTED_ERRORS = 100
+
+EXPORT_FIELDS = [
+    "id", "name", "description", "country_of_origin",
+    "price1", "price2", "price3", "promo_active", "lowest_price_30d",
+    "is_active", "shelf_number", "added_data", "updated_at",
+]
+# pola, które import może ustawić (price2/price3 tylko przez przesunięcie)
+IMPORT_FIELDS = [
+    "name", "description", "country_of_origin", "is_active", "shelf_number",
+]
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    name = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    country_of_origin = serializers.CharField(
+        max_length=100, required=False, allow_blank=True
+    )
+    price1 = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+    is_active = serializers.BooleanField(required=False)
+    shelf_number = serializers.IntegerField(
+        min_value=0, max_value=32767, required=False, allow_null=True
+    )
+
+    def to_internal_value(self, data):
+        # pusta komórka CSV ("") / null w NDJSON to brak wartości tylko tam,
+        # gdzie pole pustego nie przyjmuje (id, name, price1, is_active,
+        # shelf_number); pusty opis czy kraj czyści pole
+        fields = self.fields
+        data = {
+            k: v for k, v in data.items()
+            if not (
+                k in fields
+                and (v == "" and not getattr(fields[k], "allow_blank", False)
+                     or v is None and not fields[k].allow_null)
+            )
+        }
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if attrs.get("id") is None:
+            if "name" not in attrs or "price1" not in attrs:
+                raise serializers.ValidationError(
+                    "New products require 'name' and 'price1'."
+                )
+        return attrs
+
+
+def iter_rows(lines, fmt):
+    """(numer wiersza, dict) z iteratora linii (bytes lub str)."""
+    lines = (
+        line.decode("utf-8-sig") if isinstance(line, bytes) else line
+        for line in lines
+    )
+    if fmt == CSV:
+        for n, row in enumerate(csv.DictReader(lines), start=2):
+            yield n, row
+        return
+
+    for n, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield n, row if isinstance(row, dict) else {"__invalid__": line}
+
+
+def import_rows(rows, user=None, chunk_size=IMPORT_CHUNK):
+    """
+    Import strumieniowy: wiersze walidowane są paczkami po chunk_size,
+    każda paczka zapisywana w osobnej transakcji (bulk_create dla nowych,
+    bulk_update dla istniejących z przesunięciem cen jak w
+    ProductSerializer.update). Błędne wiersze są pomijane i raportowane.
+    """
+    summary = {
+        "rows": 0, "created": 0, "updated": 0, "error_count": 0, "errors": [],
+    }
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, user, summary)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, user, summary)
+    return summary
+
+
+def _error(summary, line, detail):
+    if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+        summary["errors"].append({"line": line, "detail": detail})
+    summary["error_count"] += 1
+
+
+def _import_chunk(chunk, user, summary):
+    summary["rows"] += len(chunk)
+    valid = []
+    for line, row in chunk:
+        if "__invalid__" in row:
+            _error(summary, line, "Invalid JSON object")
+            continue
+        ser = ProductImportRowSerializer(data=row)
+        if not ser.is_valid():
+            _error(summary, line, ser.errors)
+            continue
+        valid.append((line, ser.validated_data))
+
+    ids = [d["id"] for _, d in valid if d.get("id") is not None]
+    existing = Product.objects.in_bulk(ids)
+    now = timezone.now()
+
+    to_create, to_update, repriced = [], [], []
+    for line, data in valid:
+        pk = data.pop("id", None)
+        if pk is None:
+            to_create.append(Product(dodany_przez=user, **data))
+            continue
+        product = existing.get(pk)
+        if product is None:
+            _error(summary, line, f"Unknown product id {pk}")
+            continue
+        was_promo = product.promo_active
+        if "price1" in data and shift_price1(product, data.pop("price1")):
+            repriced.extend(repricing_changes(product, was_promo))
+        for field, value in data.items():
+            setattr(product, field, value)
+        product.updated_at = now
+        to_update.append(product)
+
+    with transaction.atomic():
+        Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(
+            to_update,
+            IMPORT_FIELDS
+            + ["price1", "price2", "price3", "promo_active", "updated_at"],
+        )
+        record_price_changes([
+            *((p.pk, PriceHistory.KIND_REGULAR, p.price1) for p in to_create),
+            *repriced,
+        ])
+    summary["created"] += len(to_create)
+    summary["updated"] += len(to_update)
+
+
+class _Echo:
+    """Bufor dla csv.writer: zwraca zapisany wiersz zamiast go trzymać."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(fmt, queryset=None, chunk_size=2000):
+    """Generator kolejnych linii eksportu (CSV lub NDJSON)."""
+    qs = queryset if queryset is not None else Product.objects.all()
+    values = qs.order_by("id").values_list(*EXPORT_FIELDS).iterator(
+        chunk_size=chunk_size
+    )
+
+    if fmt == CSV:
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in values:
+            yield writer.writerow(_plain(v) for v in row)
+        return
+
+    for row in values:
+        yield json.dumps(
+            dict(zip(EXPORT_FIELDS, (_plain(v) for v in row))),
+            ensure_ascii=False,
+        ) + "\n"
+
+
+def _plain(v):
+    if v is None or isinstance(v, (bool, int, str)):
+        return v
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    return str(v)
+
+
+class BulkPromotionSerializer(serializers.Serializer):
+    """
+    {"ids": [...], "country": "PL", "shelf": 1, "search": "mleko",
+     "price": "4.99" | "percent": 20 | "clear": true, "publish": false}
+    Co najmniej jeden filtr jest wymagany, żeby nie przecenić całego sklepu
+    przez pomyłkę (dla całego sklepu: "all": true).
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False
+    )
+    country = serializers.CharField(required=False)
+    shelf = serializers.IntegerField(required=False)
+    search = serializers.CharField(required=False)
+    all = serializers.BooleanField(required=False, default=False)
+
+    price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False
+    )
+    percent = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100,
+        required=False,
+    )
+    clear = serializers.BooleanField(required=False, default=False)
+    publish = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        filters = ("ids", "country", "shelf", "search")
+        if not attrs["all"] and not any(f in attrs for f in filters):
+            raise serializers.ValidationError(
+                "Provide a filter (ids/country/shelf/search) or 'all': true."
+            )
+        modes = [m for m in ("price", "percent") if m in attrs]
+        if attrs["clear"]:
+            modes.append("clear")
+        if len(modes) != 1:
+            raise serializers.ValidationError(
+                "Provide exactly one of 'price', 'percent' or 'clear'."
+            )
+        return attrs
+
+
+def promotion_queryset(attrs):
+    qs = Product.objects.all()
+    if "ids" in attrs:
+        qs = qs.filter(id__in=attrs["ids"])
+    if "country" in attrs:
+        qs = qs.filter(country_of_origin__iexact=attrs["country"])
+    if "shelf" in attrs:
+        qs = qs.filter(shelf_number=attrs["shelf"])
+    for term in attrs.get("search", "").split():
+        qs = qs.filter(
+            Q(name__icontains=term)
+            | Q(description__icontains=term)
+            | Q(country_of_origin__icontains=term)
+        )
+    return qs
+
+
+def apply_promotion(attrs) -> int:
+    """
+    Jeden UPDATE ... SET price2 = ... dla wszystkich pasujących produktów.
+    percent liczony w SQL od price1, zaokrąglony do groszy.
+    """
+    qs = promotion_queryset(attrs)
+    now = timezone.now()
+    if attrs["clear"]:
+        price2 = None
+    elif "price" in attrs:
+        price2 = attrs["price"]
+    else:
+        factor = (Decimal(100) - attrs["percent"]) / Decimal(100)
+        price2 = Round(
+            F("price1") * Value(factor, output_field=DecimalField()), 2
+        )
+
+    with transaction.atomic():
+        updated = qs.update(
+            price2=price2, promo_active=not attrs["clear"], updated_at=now
+        )
+        if updated:
+            record_price_changes(
+                (
+                    (pk, PriceHistory.KIND_PROMO, p2)
+                    for pk, p2 in qs.values_list("id", "price2")
+                ),
+                now=now,
+            )
+    return updated
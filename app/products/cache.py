@@ -0,0 +1,70 @@
+# app/products/cache.py
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = "catalogue:version"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+
+def _cache():
+    return caches[settings.CATALOGUE_CACHE_ALIAS]
+
+
+def _incr(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def cache_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def catalogue_version() -> int:
+    c = _cache()
+    version = c.get(VERSION_KEY)
+    if version is None:
+        # start od znacznika czasu, żeby po utracie klucza nie trafić
+        # w stare wpisy z tym samym numerem wersji
+        c.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = c.get(VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Unieważnia cały publiczny katalog (wywoływać po każdym zapisie)."""
+    c = _cache()
+    try:
+        c.incr(VERSION_KEY)
+    except ValueError:
+        c.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def catalogue_entry(request):
+    """Zwraca (klucz cache, ETag) dla danego URL-a przy bieżącej wersji."""
+    version = catalogue_version()
+    path_hash = hashlib.md5(
+        request.get_full_path().encode("utf-8")
+    ).hexdigest()[:16]
+    key = f"catalogue:{version}:{path_hash}"
+    return key, f'"{version}-{path_hash}"'
+
+
+def get_cached(key):
+    body = _cache().get(key)
+    _incr("hits" if body is not None else "misses")
+    return body
+
+
+def set_cached(key, body: bytes):
+    _cache().set(key, body, timeout=settings.CATALOGUE_CACHE_TIMEOUT)
+
+
+def count_not_modified():
+    _incr("not_modified")
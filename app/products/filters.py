@@ -0,0 +1,91 @@
+# app/products/filters.py
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from . import availability
+
+
+class UpdatedSinceFilter(BaseFilterBackend):
+    """?since=<ISO datetime> – tylko produkty zmienione po tej chwili."""
+    param = "since"
+
+    def filter_queryset(self, request, queryset, view):
+        raw = request.query_params.get(self.param)
+        if not raw:
+            return queryset
+        since = parse_datetime(raw)
+        if since is None:
+            raise ValidationError({self.param: "Invalid datetime"})
+        return queryset.filter(updated_at__gt=since)
+
+
+class AvailabilityFilter(BaseFilterBackend):
+    """
+    ?availability=empty,low,ok,unknown – dostępność liczona jest per półka,
+    więc filtr sprowadza się do shelf_number IN (...) w SQL.
+    """
+    param = "availability"
+
+    def filter_queryset(self, request, queryset, view):
+        raw = request.query_params.get(self.param)
+        if not raw:
+            return queryset
+        wanted = {s.strip() for s in raw.split(",") if s.strip()}
+        if not wanted <= set(availability.STATUSES):
+            raise ValidationError({
+                self.param: f"Allowed: {', '.join(availability.STATUSES)}"
+            })
+
+        by_status = availability.shelves_by_status()
+        shelves = [s for st in wanted for s in by_status[st]]
+        q = Q(shelf_number__in=shelves)
+        if availability.UNKNOWN in wanted:
+            known = [
+                s for st, lst in by_status.items()
+                if st != availability.UNKNOWN for s in lst
+            ]
+            q |= Q(shelf_number__isnull=True) | ~Q(shelf_number__in=known)
+        return queryset.filter(q)
+
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    ?search=... po Product.search_vector (GIN) zamiast ILIKE '%term%'.
+    Każde słowo dopasowywane prefiksowo (mle -> mleko), wszystkie muszą
+    wystąpić; wynik adnotowany search_rank i domyślnie wg niego sortowany
+    (patrz ProductCursorPagination). PRODUCT_SEARCH_BACKEND=ilike wraca
+    do zwykłego SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if settings.PRODUCT_SEARCH_BACKEND != "fts":
+            return super().filter_queryset(request, queryset, view)
+        if not getattr(view, "search_fields", None):
+            return queryset
+
+        return fulltext_search(
+            queryset, " ".join(self.get_search_terms(request))
+        )
+
+
+def fulltext_search(queryset, text):
+    words = _TERM_RE.findall(text)
+    if not words:
+        return queryset
+    query = SearchQuery(
+        " & ".join(f"{w}:*" for w in words),
+        search_type="raw",
+        config="simple",
+    )
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F("search_vector"), query)
+    )
@@ -0,0 +1,63 @@
+# app/products/pagination.py
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.settings import api_settings
+
+# klucze niezmienne po utworzeniu produktu – tylko po nich kursor jest
+# stabilny (name/price1/updated_at zmieniają się w trakcie przeglądania)
+CURSOR_ORDERING_FIELDS = {"id", "added_data", "search_rank"}
+
+
+class ProductPageNumberPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) paginacja listy produktów.
+    Kolejność: ?ordering=id|-id|added_data|-added_data (domyślnie id),
+    zawsze z id jako rozstrzygnięciem remisów,
+    rozmiar strony: ?page_size=N, maksymalnie max_page_size.
+    Przy wyszukiwaniu pełnotekstowym bez ?ordering sortujemy wg trafności.
+    Inne kolejności (?ordering=name, price1, ...) dostają zwykłą
+    paginację numerami stron (ProductPageNumberPagination).
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "id"
+
+    fallback = None
+
+    def get_ordering(self, request, queryset, view):
+        ordering_param = api_settings.ORDERING_PARAM
+        if ("search_rank" in queryset.query.annotations
+                and ordering_param not in request.query_params):
+            return ("-search_rank", "id")
+        ordering = super().get_ordering(request, queryset, view)
+        if any(o.lstrip("-") == "id" for o in ordering):
+            return ordering
+        return (*ordering, "-id" if ordering[0].startswith("-") else "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.get_ordering(request, queryset, view)
+        if ordering[0].lstrip("-") in CURSOR_ORDERING_FIELDS:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.fallback = ProductPageNumberPagination()
+        page = self.fallback.paginate_queryset(
+            queryset.order_by(*ordering), request, view
+        )
+        self.display_page_controls = self.fallback.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.fallback is not None:
+            return self.fallback.to_html()
+        return super().to_html()
@@ -1,11 +1,98 @@
 # app/products/serializers.py
 from decimal import Decimal, InvalidOperation
+from django.db import models
 from rest_framework import serializers
-from db.models import Product, ShelfState
+from db.models import Product, PriceHistory, ShelfState, ShelfRollup
+from db.prices import record_price_changes
+from .availability import annotate_availability
+
+
+def _to_decimal(v):
+    try:
+        return Decimal(str(v))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def shift_price1(instance, new_price) -> bool:
+    """
+    Zmiana ceny z przesunięciem historii: price1 -> price2 -> price3.
+    price2 staje się poprzednią ceną regularną, więc promocja się kończy.
+    Zwraca True, jeśli cena faktycznie się zmieniła (instancja niezapisana).
+    """
+    new_p = _to_decimal(new_price)
+    old_p = _to_decimal(instance.price1)
+    if new_p is None or old_p is None or new_p == old_p:
+        return False
+    instance.price3 = instance.price2
+    instance.price2 = instance.price1
+    instance.price1 = new_p
+    instance.promo_active = False
+    return True
+
+
+def repricing_changes(instance, ended_promo: bool):
+    """
+    Wpisy historii po shift_price1: nowa cena regularna i, jeśli przesunięcie
+    zakończyło trwającą promocję, jej koniec (promo=None) – inaczej ostatnia
+    promocja sprzed okna 30 dni liczyłaby się do lowest_price_30d bez końca.
+    """
+    changes = [(instance.pk, PriceHistory.KIND_REGULAR, instance.price1)]
+    if ended_promo:
+        changes.append((instance.pk, PriceHistory.KIND_PROMO, None))
+    return changes
+
+
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Szybka ścieżka dla list produktów (many=True).
+
+    Zamiast pełnego Serializer.to_representation per wiersz (get_attribute,
+    SkipField, wywołania SerializerMethodField przez getattr na każdym
+    polu) plan pól budujemy raz na całą listę, a potem dla każdego obiektu
+    robimy tylko getattr + to_representation. JSON jest identyczny
+    z ProductSerializer(obj).data.
+    """
+
+    def _build_plan(self):
+        child = self.child
+        plan = []
+        for field in child._readable_fields:
+            if isinstance(field, serializers.SerializerMethodField):
+                plan.append((field.field_name, None,
+                             getattr(child, field.method_name)))
+            elif len(field.source_attrs) == 1:
+                plan.append((field.field_name, field.source,
+                             field.to_representation))
+            else:
+                return None
+        return plan
+
+    def to_representation(self, data):
+        plan = self._build_plan()
+        if plan is None:
+            # zagnieżdżone źródła (a.b) – zwykła ścieżka DRF
+            return super().to_representation(data)
+
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        data = annotate_availability(list(data))
+        rows = []
+        for obj in data:
+            row = {}
+            for name, source, fmt in plan:
+                if source is None:
+                    row[name] = fmt(obj)
+                    continue
+                value = getattr(obj, source, None)
+                row[name] = None if value is None else fmt(value)
+            rows.append(row)
+        return rows
 
 
 class ProductSerializer(serializers.ModelSerializer):
     availability = serializers.SerializerMethodField(read_only=True)
+    estimated_units = serializers.SerializerMethodField(read_only=True)
     d1_mm = serializers.SerializerMethodField(read_only=True)
     d2_mm = serializers.SerializerMethodField(read_only=True)
     weight_g = serializers.SerializerMethodField(read_only=True)
@@ -14,22 +101,33 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             "id", "name", "description", "picture", "country_of_origin",
-            "availability",
+            "availability", "estimated_units",
             "d1_mm", "d2_mm", "weight_g",
-            "price1", "price2", "price3", "is_active", "added_data",
-            "shelf_number",
+            "price1", "price2", "price3", "promo_active", "lowest_price_30d",
+            "is_active", "added_data", "shelf_number",
         ]
         read_only_fields = [
-            "id", "added_data", "availability", "price2", "price3",
+            "id", "added_data", "availability", "estimated_units",
+            "price2", "price3", "promo_active", "lowest_price_30d",
             "d1_mm", "d2_mm", "weight_g",
         ]
+        list_serializer_class = ProductListSerializer
+
+    def _availability(self, obj):
+        # listy liczą to hurtem w ProductListSerializer
+        if not hasattr(obj, "_availability"):
+            annotate_availability([obj])
+        return obj._availability
 
     def get_availability(self, obj):
         """
-        Pola telemetryczne są adnotowane w queryset.
-        Tutaj zwracamy None, bo frontend sam liczy dostępność z d1/d2/weight_g.
+        empty/low/ok wg kalibracji półki (ShelfCalibration) i telemetrii
+        adnotowanej w queryset; None gdy brak kalibracji lub odczytu.
         """
-        return None
+        return self._availability(obj)[0]
+
+    def get_estimated_units(self, obj):
+        return self._availability(obj)[1]
 
     def get_d1_mm(self, obj):
         return getattr(obj, "d1_mm", None)
@@ -41,29 +139,44 @@ class ProductSerializer(serializers.ModelSerializer):
         return getattr(obj, "weight_g", None)
 
     # --- logika cen ---
-    def _to_decimal(self, v):
-        try:
-            return Decimal(str(v))
-        except (InvalidOperation, TypeError, ValueError):
-            return None
+    def create(self, validated_data):
+        instance = super().create(validated_data)
+        record_price_changes(
+            [(instance.pk, PriceHistory.KIND_REGULAR, instance.price1)]
+        )
+        instance.refresh_from_db(fields=["lowest_price_30d"])
+        return instance
 
     def update(self, instance, validated_data):
         validated_data.pop("price2", None)
         validated_data.pop("price3", None)
 
+        changed = False
+        was_promo = instance.promo_active
         if "price1" in validated_data:
-            new_p = self._to_decimal(validated_data.get("price1"))
-            old_p = self._to_decimal(instance.price1)
-            if new_p is not None and old_p is not None and new_p != old_p:
-                instance.price3 = instance.price2
-                instance.price2 = instance.price1
-                instance.price1 = new_p
+            if shift_price1(instance, validated_data.get("price1")):
                 validated_data.pop("price1", None)
+                changed = True
 
-        return super().update(instance, validated_data)
+        instance = super().update(instance, validated_data)
+        if changed:
+            record_price_changes(repricing_changes(instance, was_promo))
+            instance.refresh_from_db(fields=["lowest_price_30d"])
+        return instance
 
 class ShelfStateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShelfState
         fields = ["shelf", "d1_mm", "d2_mm", "weight_g", "updated_at"]
         read_only_fields = ["updated_at"]
+
+
+class ShelfRollupSerializer(serializers.ModelSerializer):
+    avg_value = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ShelfRollup
+        fields = [
+            "shelf", "field", "bucket", "bucket_start",
+            "min_value", "max_value", "avg_value", "count",
+        ]
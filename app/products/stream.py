@@ -0,0 +1,153 @@
+# app/products/stream.py
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from app.shelf_stream import get_broadcaster
+from db.models import ShelfState
+from .serializers import ShelfStateSerializer
+
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _snapshot(shelves):
+    qs = ShelfState.objects.order_by("shelf")
+    if shelves:
+        qs = qs.filter(shelf__in=shelves)
+    return _sse("snapshot", ShelfStateSerializer(qs, many=True).data)
+
+
+def _drain(sub):
+    events, dropped = sub.pop_all()
+    if dropped:
+        # klient nie nadążał – powinien odświeżyć stan (np. ponownie
+        # połączyć się i dostać snapshot)
+        yield _sse("overflow", {"dropped": dropped})
+    for e in events:
+        yield _sse("shelf", e, event_id=e["seq"])
+
+
+def _parse_shelves(request):
+    raw = request.GET.get("shelf", "")
+    return {int(s) for s in raw.split(",") if s.strip().isdigit()}
+
+
+def _subscribe(shelves, wake):
+    return get_broadcaster().subscribe(
+        maxlen=settings.SHELF_STREAM_BUFFER, shelves=shelves, wake=wake
+    )
+
+
+# liczba strumieni pod WSGI w tym procesie (każdy trzyma wątek workera)
+_sync_lock = threading.Lock()
+_sync_clients = 0
+
+
+def _acquire_sync_slot() -> bool:
+    global _sync_clients
+    with _sync_lock:
+        if _sync_clients >= settings.SHELF_STREAM_WSGI_MAX:
+            return False
+        _sync_clients += 1
+        return True
+
+
+def _release_sync_slot():
+    global _sync_clients
+    with _sync_lock:
+        _sync_clients -= 1
+
+
+class _SyncStream:
+    """
+    Strumień WSGI; close() (serwer woła je także, gdy klient rozłączy się
+    przed pierwszym zdarzeniem) zwalnia miejsce w limicie.
+    """
+
+    def __init__(self, shelves):
+        self._events = _sync_events(shelves)
+        self._closed = False
+
+    def __iter__(self):
+        return self._events
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._events.close()
+            _release_sync_slot()
+
+
+def _sync_events(shelves):
+    # WSGI: jeden wątek workera na klienta (gthread)
+    wake = threading.Event()
+    sub = _subscribe(shelves, wake.set)
+    try:
+        yield _snapshot(shelves)
+        while True:
+            if not wake.wait(settings.SHELF_STREAM_KEEPALIVE):
+                yield ": keep-alive\n\n"
+                continue
+            wake.clear()
+            yield from _drain(sub)
+    finally:
+        get_broadcaster().unsubscribe(sub)
+
+
+async def _async_events(shelves):
+    # ASGI: klient to tylko korutyna; wątek paho budzi ją przez pętlę
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    sub = _subscribe(shelves, lambda: loop.call_soon_threadsafe(wake.set))
+    try:
+        yield await sync_to_async(_snapshot)(shelves)
+        while True:
+            try:
+                await asyncio.wait_for(
+                    wake.wait(), settings.SHELF_STREAM_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            wake.clear()
+            for chunk in _drain(sub):
+                yield chunk
+    finally:
+        get_broadcaster().unsubscribe(sub)
+
+
+@require_GET
+def shelf_stream(request):
+    """
+    GET /api/products/shelf-stream/?shelf=1,3 – Server-Sent Events.
+    Najpierw "snapshot" (stan półek z bazy), potem "shelf" z polami,
+    które zmieniły się o więcej niż deadband; "overflow", gdy bufor
+    klienta się przepełnił. Pełna skalowalność pod ASGI (app/asgi.py);
+    pod WSGI najwyżej SHELF_STREAM_WSGI_MAX klientów na proces, żeby
+    strumienie nie zajęły wszystkich wątków API (potem 503).
+    """
+    shelves = _parse_shelves(request)
+    if isinstance(request, ASGIRequest):
+        events = _async_events(shelves)
+    elif _acquire_sync_slot():
+        events = _SyncStream(shelves)
+    else:
+        return JsonResponse(
+            {"detail": "Too many shelf streams on this worker; "
+                       "use the ASGI server."},
+            status=503, headers={"Retry-After": "10"},
+        )
+    return StreamingHttpResponse(
+        events,
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
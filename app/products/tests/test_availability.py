@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from db.models import Product, ShelfCalibration, ShelfState
+from products import availability
+from products import cache as catalogue_cache
+
+PRODUCT_VIEW_URL = reverse("products:product_view")
+
+
+class AvailabilityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        availability.invalidate_calibrations()
+        self.client = APIClient()
+        ShelfCalibration.objects.create(
+            shelf=1, empty_distance_mm=500.0, unit_depth_mm=50.0, low_units=2,
+        )
+        ShelfCalibration.objects.create(
+            shelf=3, unit_weight_g=400.0, tare_g=100.0,
+        )
+        ShelfState.objects.create(shelf=1, d1_mm=400.0)
+        ShelfState.objects.create(shelf=3, weight_g=100.0)
+        for name, shelf in (("Mleko", 1), ("Mąka", 3), ("Sól", None)):
+            Product.objects.create(
+                name=name, price1=Decimal("1.00"), shelf_number=shelf,
+            )
+
+    def test_listing_reports_status_and_units(self):
+        res = self.client.get(PRODUCT_VIEW_URL)
+
+        rows = {r["name"]: r for r in res.json()["results"]}
+        self.assertEqual(rows["Mleko"]["availability"], availability.LOW)
+        self.assertEqual(rows["Mleko"]["estimated_units"], 2)
+        self.assertEqual(rows["Mąka"]["availability"], availability.EMPTY)
+        self.assertIsNone(rows["Sól"]["availability"])
+
+    def test_filter_by_availability(self):
+        res = self.client.get(PRODUCT_VIEW_URL, {"availability": "empty"})
+        names = [r["name"] for r in res.json()["results"]]
+        self.assertEqual(names, ["Mąka"])
+
+        res = self.client.get(PRODUCT_VIEW_URL, {"availability": "unknown"})
+        names = [r["name"] for r in res.json()["results"]]
+        self.assertEqual(names, ["Sól"])
+
+    def test_invalid_status_is_rejected(self):
+        res = self.client.get(PRODUCT_VIEW_URL, {"availability": "plenty"})
+        self.assertEqual(res.status_code, 400)
+
+    def test_other_worker_sees_calibration_change_with_new_version(self):
+        self.client.get(PRODUCT_VIEW_URL)
+        # zmiana w innym procesie: lokalny cache kalibracji nie jest
+        # unieważniany, widzimy tylko nową wersję katalogu
+        ShelfCalibration.objects.filter(shelf=1).update(low_units=0)
+        catalogue_cache.bump_catalogue_version()
+
+        res = self.client.get(PRODUCT_VIEW_URL)
+        rows = {r["name"]: r for r in res.json()["results"]}
+        self.assertEqual(rows["Mleko"]["availability"], availability.OK)
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from db.models import Product, User
+from products.bulk import ProductImportRowSerializer
+
+IMPORT_URL = reverse("products:product-bulk-import")
+
+
+class ProductImportTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        employee = User.objects.create_user(
+            "pracownik@example.com", "pracownik", "pass12345",
+            is_employee=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(employee)
+        self.product = Product.objects.create(
+            name="Ser", description="żółty", country_of_origin="PL",
+            price1=Decimal("12.00"), shelf_number=2,
+        )
+
+    def _import(self, body, content_type="text/csv"):
+        res = self.client.generic(
+            "POST", IMPORT_URL, body.encode("utf-8"), content_type
+        )
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def test_empty_cells_skip_only_fields_without_blanks(self):
+        row = ProductImportRowSerializer(data={
+            "id": "1", "name": "", "price1": "", "is_active": "",
+            "shelf_number": "", "description": "", "country_of_origin": "",
+        })
+
+        self.assertTrue(row.is_valid(), row.errors)
+        self.assertEqual(
+            row.validated_data,
+            {"id": 1, "description": "", "country_of_origin": ""},
+        )
+
+    def test_csv_body_update_clears_blank_text_and_keeps_the_rest(self):
+        summary = self._import(
+            "id,name,description,country_of_origin,price1,shelf_number\n"
+            f"{self.product.pk},,,,,\n"
+        )
+
+        self.assertEqual((summary["updated"], summary["error_count"]), (1, 0))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, "Ser")
+        self.assertEqual(self.product.description, "")
+        self.assertEqual(self.product.country_of_origin, "")
+        self.assertEqual(self.product.price1, Decimal("12.00"))
+        self.assertEqual(self.product.shelf_number, 2)
+
+    def test_ndjson_null_clears_shelf(self):
+        summary = self._import(
+            f'{{"id": {self.product.pk}, "shelf_number": null, '
+            '"description": null}\n'
+            '{"name": "Mleko", "price1": "3.49"}\n',
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual((summary["created"], summary["updated"]), (1, 1))
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.shelf_number)
+        self.assertEqual(self.product.description, "żółty")
@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from db.models import Product
+from products import cache as catalogue_cache
+
+PRODUCT_VIEW_URL = reverse("products:product_view")
+
+
+class CatalogueCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Product.objects.create(name="Mleko", price1="3.49")
+
+    def test_second_request_is_served_from_cache(self):
+        before = catalogue_cache.cache_stats()
+        self.client.get(PRODUCT_VIEW_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(PRODUCT_VIEW_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["results"][0]["name"], "Mleko")
+        after = catalogue_cache.cache_stats()
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+    def test_etag_returns_304_until_version_bump(self):
+        etag = self.client.get(PRODUCT_VIEW_URL)["ETag"]
+
+        res = self.client.get(PRODUCT_VIEW_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        catalogue_cache.bump_catalogue_version()
+        res = self.client.get(PRODUCT_VIEW_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
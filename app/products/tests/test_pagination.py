@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from db.models import Product, User
+
+MANAGE_URL = reverse("products:product-list")
+
+
+class ProductPaginationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        employee = User.objects.create_user(
+            "pracownik@example.com", "pracownik", "pass12345",
+            is_employee=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(employee)
+        # jednakowe ceny: kolejność między stronami rozstrzyga id
+        for i in range(5):
+            Product.objects.create(name=f"P{i}", price1=Decimal("1.00"))
+
+    def _pages(self, params):
+        names, url, first = [], MANAGE_URL, None
+        while url:
+            res = self.client.get(url, params if url == MANAGE_URL else None)
+            self.assertEqual(res.status_code, 200)
+            first = first or res.json()
+            names += [p["name"] for p in res.json()["results"]]
+            url = res.json()["next"]
+        return first, names
+
+    def test_stable_ordering_uses_cursor(self):
+        first, names = self._pages({"ordering": "-added_data", "page_size": 2})
+
+        self.assertNotIn("count", first)
+        self.assertEqual(names, ["P4", "P3", "P2", "P1", "P0"])
+
+    def test_mutable_ordering_falls_back_to_pages(self):
+        first, names = self._pages({"ordering": "price1", "page_size": 2})
+
+        self.assertEqual(first["count"], 5)
+        self.assertEqual(names, ["P0", "P1", "P2", "P3", "P4"])
@@ -0,0 +1,65 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from db.models import PriceHistory, Product, ShelfState
+from db.prices import record_price_changes, refresh_lowest_prices
+from products.serializers import ProductSerializer
+from products.views import with_telemetry
+
+
+class ProductListSerializerTests(TestCase):
+
+    def test_fast_list_matches_per_object_serializer(self):
+        ShelfState.objects.create(shelf=1, d1_mm=470.0)
+        ShelfState.objects.create(shelf=3, weight_g=1600.0)
+        Product.objects.create(name="Mleko", price1=Decimal("3.49"))
+        Product.objects.create(
+            name="Ser", description="żółty", country_of_origin="PL",
+            price1=Decimal("12.00"), price2=Decimal("9.99"),
+            shelf_number=1, picture="products/ser.png",
+        )
+        Product.objects.create(
+            name="Mąka", price1=Decimal("4.10"), shelf_number=3,
+        )
+        products = list(with_telemetry(Product.objects.order_by("id")))
+
+        fast = ProductSerializer(products, many=True).data
+        slow = [ProductSerializer(p).data for p in products]
+
+        render = JSONRenderer().render
+        self.assertEqual(render(fast), render(slow))
+        self.assertEqual(json.loads(render(fast))[1]["d1_mm"], 470.0)
+
+
+class RepricingTests(TestCase):
+
+    def test_price_change_ends_promo_in_history(self):
+        now = timezone.now()
+        product = Product.objects.create(
+            name="Kawa", price1=Decimal("20.00"),
+            price2=Decimal("9.99"), promo_active=True,
+        )
+        record_price_changes(
+            [(product.pk, PriceHistory.KIND_PROMO, Decimal("9.99"))],
+            now=now - timedelta(days=40),
+        )
+
+        ser = ProductSerializer(
+            product, data={"price1": "18.00"}, partial=True
+        )
+        ser.is_valid(raise_exception=True)
+        ser.save()
+        # zmiana ceny 35 dni temu: promocja 9.99 skończyła się przed oknem
+        PriceHistory.objects.filter(
+            changed_at__gte=now - timedelta(days=1)
+        ).update(changed_at=now - timedelta(days=35))
+        refresh_lowest_prices([product.pk], now=now)
+
+        product.refresh_from_db()
+        self.assertFalse(product.promo_active)
+        self.assertEqual(product.lowest_price_30d, Decimal("18.00"))
@@ -0,0 +1,82 @@
+import json
+
+from django.test import TestCase, override_settings
+
+from app import shelf_stream
+from app.shelf_stream import ShelfBroadcaster
+from db.models import ShelfState
+
+
+class ShelfBroadcasterTests(TestCase):
+
+    def setUp(self):
+        self.broadcaster = ShelfBroadcaster({"mm": 2.0, "g": 5.0})
+
+    def test_deadband_suppresses_small_changes(self):
+        sub = self.broadcaster.subscribe()
+        self.broadcaster.publish(1, {"d1_mm": 400.0})
+        self.broadcaster.publish(1, {"d1_mm": 401.0})
+        self.broadcaster.publish(1, {"d1_mm": 402.5})
+
+        events, _ = sub.pop_all()
+        self.assertEqual([e["d1_mm"] for e in events], [400.0, 402.5])
+        self.assertEqual(self.broadcaster.stats()["suppressed"], 1)
+
+    def test_bounded_buffer_drops_oldest(self):
+        sub = self.broadcaster.subscribe(maxlen=2)
+        for value in (100.0, 200.0, 300.0):
+            self.broadcaster.publish(3, {"weight_g": value})
+
+        events, dropped = sub.pop_all()
+        self.assertEqual([e["weight_g"] for e in events], [200.0, 300.0])
+        self.assertEqual(dropped, 1)
+
+    def test_shelf_filter(self):
+        sub = self.broadcaster.subscribe(shelves={2})
+        self.broadcaster.publish(1, {"d1_mm": 400.0})
+        self.broadcaster.publish(2, {"d2_mm": 500.0})
+
+        events, _ = sub.pop_all()
+        self.assertEqual([e["shelf"] for e in events], [2])
+
+
+@override_settings(SHELF_STREAM_KEEPALIVE=0.5)
+class ShelfStreamViewTests(TestCase):
+
+    def setUp(self):
+        shelf_stream._broadcaster = None
+        self.addCleanup(setattr, shelf_stream, "_broadcaster", None)
+        ShelfState.objects.create(shelf=1, d1_mm=400.0)
+
+    def test_snapshot_then_deltas(self):
+        res = self.client.get("/api/products/shelf-stream/?shelf=1")
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        stream = iter(res.streaming_content)
+
+        snapshot = next(stream).decode()
+        self.assertTrue(snapshot.startswith("event: snapshot"))
+
+        self.client.post(
+            "/api/products/telemetry/", {"shelf": 1, "d1_mm": 420},
+            content_type="application/json",
+        )
+        delta = next(stream).decode()
+        self.assertIn("event: shelf", delta)
+        data = json.loads(delta.split("data: ", 1)[1])
+        self.assertEqual(data["d1_mm"], 420.0)
+        res.close()
+
+    @override_settings(SHELF_STREAM_WSGI_MAX=1)
+    def test_wsgi_streams_are_capped_per_process(self):
+        url = "/api/products/shelf-stream/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res["Retry-After"], "10")
+
+        first.close()
+        again = self.client.get(url)
+        self.assertEqual(again.status_code, 200)
+        again.close()
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 from products import views
+from products.stream import shelf_stream
 
 app_name = "products"
 
@@ -13,6 +14,7 @@ router.register(r"telemetry", views.TelemetryViewSet, basename="telemetry")  # 
 
 urlpatterns = [
     path("product_view/", views.ProductListView.as_view(), name="product_view"),  # public
+    path("shelf-stream/", shelf_stream, name="shelf_stream"),  # public, SSE
     path("", include(router.urls)),  # /api/products/manage/... i /api/products/telemetry/...
 ]
 
@@ -1,21 +1,51 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
 from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import (
-    generics, viewsets, authentication, filters, parsers, status, permissions, mixins
+    generics, viewsets, filters, parsers, status, permissions, mixins
 )
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from db.models import Product, ShelfState
-from .serializers import ProductSerializer, ShelfStateSerializer
+from db.channels import get_registry
+from db.models import Product, PriceHistory, ShelfState, ShelfRollup
+from users.authentication import CachedTokenAuthentication
+from app.deadband import get_persist_filter
+from app.telemetry_codec import parse_shelf, parse_values
+from db.prices import record_price_changes
+from db.telemetry import record_readings
+from .serializers import (
+    ProductSerializer, ShelfStateSerializer, ShelfRollupSerializer
+)
 from .permissions import IsEmployee
+from .filters import (
+    UpdatedSinceFilter, AvailabilityFilter, ProductSearchFilter
+)
+from .pagination import ProductCursorPagination
+from . import cache as catalogue_cache
+from . import bulk
 
 
-def with_telemetry(qs):
+def with_telemetry(qs, strategy=None):
     """
     Dołącza wartości z ShelfState wg Product.shelf_number.
     Półka 1 -> d1_mm, półka 2 -> d2_mm, półka 3 -> weight_g.
     Jeśli produkt nie ma shelf_number lub brak rekordu — pola będą NULL.
+
+    strategy (domyślnie settings.PRODUCT_TELEMETRY_STRATEGY):
+      "map"      – jedno zapytanie o ShelfState, wartości doklejane w Pythonie
+      "subquery" – adnotacja skorelowanymi podzapytaniami
     """
+    strategy = strategy or settings.PRODUCT_TELEMETRY_STRATEGY
+    if strategy == "map":
+        return qs.attach_telemetry()
+
     ss = ShelfState.objects.filter(shelf=OuterRef("shelf_number"))
     return qs.annotate(
         d1_mm=Subquery(ss.values("d1_mm")[:1]),
@@ -29,21 +59,63 @@ class ProductListView(generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
     authentication_classes = []
+    pagination_class = ProductCursorPagination
+
+    filter_backends = [
+        UpdatedSinceFilter, AvailabilityFilter,
+        ProductSearchFilter, filters.OrderingFilter,
+    ]
+    ordering_fields = ["id", "added_data", "updated_at"]
+    search_fields = (
+        ["name", "description", "country_of_origin"]
+        if settings.PRODUCT_PUBLIC_SEARCH else []
+    )
 
     def get_queryset(self):
         return with_telemetry(Product.objects.all())
 
+    def list(self, request, *args, **kwargs):
+        """
+        Gotowy JSON trzymany w cache pod kluczem (wersja katalogu, URL).
+        ETag zależy tylko od wersji i URL-a, więc 304 nie wymaga
+        sięgania do cache ani bazy.
+        """
+        if request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        key, etag = catalogue_cache.catalogue_entry(request)
+        if etag in request.headers.get("If-None-Match", ""):
+            catalogue_cache.count_not_modified()
+            return HttpResponse(status=304, headers={"ETag": etag})
+
+        body = catalogue_cache.get_cached(key)
+        if body is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = JSONRenderer().render(response.data)
+            catalogue_cache.set_cached(key, body)
+
+        return HttpResponse(
+            body, content_type="application/json", headers={"ETag": etag}
+        )
+
 
 class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all().order_by("id")
     serializer_class = ProductSerializer
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsEmployee]
 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = ProductCursorPagination
+
+    filter_backends = [
+        UpdatedSinceFilter, AvailabilityFilter,
+        ProductSearchFilter, filters.OrderingFilter,
+    ]
     search_fields = ["name", "description", "country_of_origin"]
-    ordering_fields = ["name", "price1", "added_data"]
+    ordering_fields = ["id", "name", "price1", "added_data", "updated_at"]
     parser_classes = [parsers.JSONParser, parsers.MultiPartParser, parsers.FormParser]
 
     def get_queryset(self):
@@ -54,7 +126,14 @@ class ProductViewSet(viewsets.ModelViewSet):
         product = self.get_object()
         if request.method.lower() == "delete":
             product.price2 = None
-            product.save(update_fields=["price2"])
+            product.promo_active = False
+            product.save(
+                update_fields=["price2", "promo_active", "updated_at"]
+            )
+            record_price_changes(
+                [(product.pk, PriceHistory.KIND_PROMO, None)]
+            )
+            catalogue_cache.bump_catalogue_version()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         price = request.data.get("price")
@@ -74,9 +153,150 @@ class ProductViewSet(viewsets.ModelViewSet):
         else:
             return Response({"detail": "Provide 'price' or 'percent'."}, status=400)
 
-        product.save(update_fields=["price2"])
+        product.promo_active = True
+        product.save(update_fields=["price2", "promo_active", "updated_at"])
+        product.refresh_from_db(fields=["price2"])
+        record_price_changes(
+            [(product.pk, PriceHistory.KIND_PROMO, product.price2)]
+        )
+        product.refresh_from_db(fields=["lowest_price_30d"])
+        catalogue_cache.bump_catalogue_version()
         return Response(self.get_serializer(product).data, status=200)
 
+    def perform_create(self, serializer):
+        serializer.save()
+        catalogue_cache.bump_catalogue_version()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        catalogue_cache.bump_catalogue_version()
+
+    @action(detail=False, methods=["post"], url_path="bulk-promotion")
+    def bulk_promotion(self, request):
+        """
+        Promocja/przecena wielu produktów jednym UPDATE-em, opcjonalnie
+        z jedną paczką komend na wyświetlacze półek ("publish": true).
+        """
+        ser = bulk.BulkPromotionSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        attrs = ser.validated_data
+
+        started = time.perf_counter()
+        updated = bulk.apply_promotion(attrs)
+        catalogue_cache.bump_catalogue_version()
+
+        published = []
+        if attrs["publish"] and updated:
+            published = self._publish_shelves(bulk.promotion_queryset(attrs))
+
+        return Response({
+            "updated": updated,
+            "published": published,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+
+    def _publish_shelves(self, qs):
+        """Jedna komenda na półkę (ostatnio zmieniony produkt z półki)."""
+        from app import mqtt_client
+
+        per_shelf = {}
+        shelves = list(get_registry().shelves())
+        for product in qs.filter(shelf_number__in=shelves).order_by(
+            "shelf_number", "updated_at", "id"
+        ):
+            per_shelf[product.shelf_number] = product
+
+        out = []
+        for shelf, product in per_shelf.items():
+            try:
+                res = mqtt_client.publish_product_to_shelf(
+                    product, shelf=shelf
+                )
+                out.append({"shelf": shelf, **res})
+            except Exception as e:
+                print("[MQTT] error in bulk publish:", e)
+                out.append({"shelf": shelf, "status": "error"})
+        return out
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        """
+        Import CSV/NDJSON: plik w polu 'file' (multipart, typ po rozszerzeniu)
+        albo surowe body z Content-Type text/csv lub application/x-ndjson.
+        Wiersz z 'id' = aktualizacja, bez 'id' = nowy produkt.
+        """
+        content_type = request.content_type or ""
+        if content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                return Response({"detail": "Missing 'file'"}, status=400)
+            name = upload.name.lower()
+            fmt = bulk.CSV if name.endswith(".csv") else bulk.NDJSON
+            lines = upload
+        else:
+            if "csv" in content_type:
+                fmt = bulk.CSV
+            elif "ndjson" in content_type or "jsonl" in content_type:
+                fmt = bulk.NDJSON
+            else:
+                return Response(
+                    {"detail": "Use text/csv or application/x-ndjson"},
+                    status=415,
+                )
+            # czytamy strumień linia po linii, bez ładowania całego body
+            lines = request.stream or ()
+
+        summary = bulk.import_rows(
+            bulk.iter_rows(lines, fmt), user=request.user
+        )
+        if summary["created"] or summary["updated"]:
+            catalogue_cache.bump_catalogue_version()
+        return Response(summary, status=200)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def bulk_export(self, request):
+        """?type=csv|ndjson – eksport strumieniowy całej tabeli."""
+        fmt = request.query_params.get("type", bulk.CSV)
+        if fmt not in (bulk.CSV, bulk.NDJSON):
+            return Response({"detail": "Invalid type"}, status=400)
+        content_type = (
+            "text/csv" if fmt == bulk.CSV else "application/x-ndjson"
+        )
+        response = StreamingHttpResponse(
+            bulk.export_rows(fmt), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="products.{fmt}"'
+        )
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        msg_id = getattr(self, "display_msg_id", None)
+        if msg_id:
+            # status dostarczenia: GET manage/display-status/<msg_id>/
+            response["X-Display-Msg-Id"] = msg_id
+        return response
+
+    @action(
+        detail=False, methods=["get"],
+        url_path=r"display-status/(?P<msg_id>[0-9a-f-]+)",
+    )
+    def display_status(self, request, msg_id=None):
+        """?wait=N – long-poll do N sekund (max MQTT_ACK_TIMEOUT)."""
+        from app import mqtt_client
+
+        try:
+            wait = float(request.query_params.get("wait", 0))
+        except (TypeError, ValueError):
+            return Response({"detail": "Invalid wait"}, status=400)
+        wait = min(max(wait, 0.0), mqtt_client.ACK_TIMEOUT)
+
+        res = mqtt_client.delivery_status(msg_id, wait=wait)
+        if res is None:
+            return Response({"detail": "Unknown msg_id"}, status=404)
+        return Response(res)
+
     def perform_update(self, serializer):
         product = serializer.save()
         shelf_raw = self.request.query_params.get("shelf")
@@ -88,17 +308,20 @@ class ProductViewSet(viewsets.ModelViewSet):
         except (TypeError, ValueError):
             shelf = None
 
-        if shelf in (1, 2, 3):
-            if product.shelf_number != shelf:
-                product.shelf_number = shelf
-                product.save(update_fields=["shelf_number"])
+        has_shelf = shelf is not None and shelf in get_registry().shelves()
+        if has_shelf and product.shelf_number != shelf:
+            product.shelf_number = shelf
+            product.save(update_fields=["shelf_number", "updated_at"])
+        catalogue_cache.bump_catalogue_version()
 
+        if has_shelf:
             try:
                 from app import mqtt_client
-                ack = mqtt_client.publish_product_to_shelf(
-                    product, shelf=shelf, retain=False, timeout=10.0
+                res = mqtt_client.publish_product_to_shelf(
+                    product, shelf=shelf
                 )
-                print("[MQTT] publish ack:", ack)
+                self.display_msg_id = res["msg_id"]
+                print("[MQTT] publish:", res)
             except Exception as e:
                 print("[MQTT] error in perform_update:", e)
         else:
@@ -106,33 +329,26 @@ class ProductViewSet(viewsets.ModelViewSet):
 
 
 # --------- TELEMETRIA ----------
-def _num(v):
-    """czyści stringi typu '571 mm'/'3.6 g' → float; None jeśli brak."""
-    if v is None:
-        return None
-    if isinstance(v, (int, float)):
-        return float(v)
-    s = str(v).replace(",", ".")
-    import re
-    m = re.search(r"-?\d+(\.\d+)?", s)
-    return float(m.group(0)) if m else None
-
-
 class TelemetryViewSet(mixins.CreateModelMixin,
                        mixins.UpdateModelMixin,
                        mixins.ListModelMixin,
                        viewsets.GenericViewSet):
     """
     POST /api/products/telemetry/ – upsert ostatniego stanu PÓŁKI.
-    Mapowanie:
-      - shelf=1 -> używamy tylko d1_mm
-      - shelf=2 -> używamy tylko d2_mm
-      - shelf=3 -> używamy tylko weight_g
+    Mapowanie klucz -> kolumna wg kanałów półki (db.SensorChannel),
+    domyślnie:
+      - shelf=1 -> d1_mm (lub d1)
+      - shelf=2 -> d2_mm (lub d2)
+      - shelf=3 -> weight_g (lub weight_kg)
 
     Przykłady payloadu:
       {"shelf":1, "d1_mm":470}
       {"shelf":2, "d2_mm":530}
       {"shelf":3, "weight_g":1600}
+
+    GET /api/products/telemetry/history/?shelf=1&field=d1_mm&bucket=1h&since=...
+      – agregaty min/max/avg/count z ShelfRollup (domyślnie ostatnie 24h),
+        osobno dla każdej kolumny półki.
     """
     queryset = ShelfState.objects.all()
     serializer_class = ShelfStateSerializer
@@ -140,28 +356,56 @@ class TelemetryViewSet(mixins.CreateModelMixin,
     authentication_classes = []
 
     def create(self, request, *args, **kwargs):
-        shelf = _num(request.data.get("shelf"))
+        shelf = parse_shelf(request.data.get("shelf"))
         if shelf is None:
             return Response({"detail": "Field 'shelf' is required"}, status=400)
-        shelf = int(shelf)
-
-        d1 = _num(request.data.get("d1_mm") or request.data.get("d1"))
-        d2 = _num(request.data.get("d2_mm") or request.data.get("d2"))
-        wg = _num(request.data.get("weight_g"))
-        if wg is None and request.data.get("weight_kg") is not None:
-            wk = _num(request.data.get("weight_kg"))
-            wg = wk * 1000.0 if wk is not None else None
-            
-        defaults = {}
-        if shelf == 1 and d1 is not None:
-            defaults["d1_mm"] = d1
-        elif shelf == 2 and d2 is not None:
-            defaults["d2_mm"] = d2
-        elif shelf == 3 and wg is not None:
-            defaults["weight_g"] = wg
 
+        registry = get_registry()
+        defaults = registry.decode(
+            registry.for_shelf(shelf), parse_values(request.data), shelf=shelf
+        ).get(shelf)
         if not defaults:
             return Response({"detail": "Provide value for the selected shelf"}, status=400)
 
+        from app import mqtt_client
+        mqtt_client.publish_shelf_delta(shelf, defaults)
+        # zmiana w granicach progu i świeży zapis -> bez zapisu do bazy
+        if not get_persist_filter().should_persist(shelf, defaults):
+            return Response(
+                {"shelf": shelf, **defaults, "persisted": False}, status=202
+            )
+
         obj, _ = ShelfState.objects.update_or_create(shelf=shelf, defaults=defaults)
+        record_readings(
+            [(shelf, f, obj.updated_at, v) for f, v in defaults.items()]
+        )
+        catalogue_cache.bump_catalogue_version()
         return Response(ShelfStateSerializer(obj).data, status=201)
+
+    @action(detail=False, methods=["get"])
+    def history(self, request):
+        bucket = request.query_params.get("bucket", ShelfRollup.BUCKET_HOUR)
+        if bucket not in dict(ShelfRollup.BUCKET_CHOICES):
+            return Response({"detail": "Invalid bucket"}, status=400)
+
+        since_raw = request.query_params.get("since")
+        until_raw = request.query_params.get("until")
+        since = parse_datetime(since_raw) if since_raw else None
+        until = parse_datetime(until_raw) if until_raw else None
+        if (since_raw and since is None) or (until_raw and until is None):
+            return Response({"detail": "Invalid datetime"}, status=400)
+        if since is None:
+            since = timezone.now() - timedelta(hours=24)
+
+        qs = ShelfRollup.objects.filter(bucket=bucket, bucket_start__gte=since)
+        if until is not None:
+            qs = qs.filter(bucket_start__lt=until)
+        shelf = parse_shelf(request.query_params.get("shelf"))
+        if shelf is not None:
+            qs = qs.filter(shelf=shelf)
+        field = request.query_params.get("field")
+        if field:
+            qs = qs.filter(field=field)
+
+        qs = qs.order_by("shelf", "field", "bucket_start")
+        return Response(ShelfRollupSerializer(qs, many=True).data)
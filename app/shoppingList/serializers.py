@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from db.models import ShoppingListItem, Product
+from db.shopping import MAX_QUANTITY
 
 class ProductShortSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,4 +12,39 @@ class ShoppingListItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ShoppingListItem
-        fields = ['id', 'product', 'quantity']
\ No newline at end of file
+        fields = ['id', 'product', 'quantity']
+
+
+class AddItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(
+        min_value=1, max_value=MAX_QUANTITY, default=1
+    )
+
+
+class BulkAddSerializer(serializers.Serializer):
+    """
+    {"items": [{"product": 1, "quantity": 2}, ...]}
+    Synchronizacja koszyka offline.
+    """
+    items = AddItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        ids = {i["product"] for i in items}
+        known = set(
+            Product.objects.filter(id__in=ids).values_list("id", flat=True)
+        )
+        missing = sorted(ids - known)
+        if missing:
+            raise serializers.ValidationError(
+                f"Unknown product ids: {missing}"
+            )
+        return items
+
+
+class ShoppingSummarySerializer(serializers.Serializer):
+    items = serializers.IntegerField()
+    units = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    regular_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    savings = serializers.DecimalField(max_digits=12, decimal_places=2)
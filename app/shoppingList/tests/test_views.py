@@ -0,0 +1,129 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from db.models import Product, ShoppingListItem, User
+from db.shopping import MAX_QUANTITY
+from products.serializers import ProductSerializer
+
+URL = "/api/shopping/shopping-list/"
+
+
+class ShoppingListViewTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            "klient@example.com", "klient", "pass12345"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _add(self, price1, quantity, price2=None):
+        product = Product.objects.create(
+            name="Produkt", price1=Decimal(price1),
+            price2=Decimal(price2) if price2 else None,
+            promo_active=bool(price2),
+        )
+        ShoppingListItem.objects.create(
+            user=self.user, product=product, quantity=quantity
+        )
+        return product
+
+    def test_list_query_count_does_not_grow(self):
+        self._add("1.00", 1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(URL)
+        for _ in range(10):
+            self._add("1.00", 1)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(URL)
+
+        self.assertEqual(len(res.data), 11)
+        self.assertEqual(len(many), len(few))
+
+    def test_create_returns_201_then_200_with_merged_quantity(self):
+        product = Product.objects.create(name="Mleko", price1=Decimal("3.50"))
+
+        first = self.client.post(URL, {"product": product.pk, "quantity": 2})
+        second = self.client.post(URL, {"product": product.pk, "quantity": 3})
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(second.data["quantity"], 5)
+        self.assertEqual(second.data["product"]["name"], "Mleko")
+
+    def test_merged_quantity_is_capped_instead_of_overflowing(self):
+        product = Product.objects.create(name="Mleko", price1=Decimal("3.50"))
+        ShoppingListItem.objects.create(
+            user=self.user, product=product, quantity=MAX_QUANTITY - 1
+        )
+
+        res = self.client.post(URL, {"product": product.pk, "quantity": 5})
+        bulk = self.client.post(URL + "bulk/", {"items": [
+            {"product": product.pk, "quantity": MAX_QUANTITY},
+            {"product": product.pk, "quantity": MAX_QUANTITY},
+        ]}, format="json")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["quantity"], MAX_QUANTITY)
+        self.assertEqual(bulk.status_code, 200)
+        self.assertEqual(bulk.data[0]["quantity"], MAX_QUANTITY)
+
+    def test_quantity_above_integer_range_is_rejected(self):
+        product = Product.objects.create(name="Mleko", price1=Decimal("3.50"))
+
+        res = self.client.post(
+            URL, {"product": product.pk, "quantity": MAX_QUANTITY + 1}
+        )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("quantity", res.data)
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_create_with_unknown_product_is_rejected(self):
+        res = self.client.post(URL, {"product": 999999, "quantity": 1})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_summary_uses_promo_price(self):
+        self._add("10.00", 2, price2="7.50")
+        self._add("3.00", 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(URL + "summary/")
+
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(res.data["items"], 2)
+        self.assertEqual(res.data["units"], 3)
+        self.assertEqual(res.data["total"], "18.00")
+        self.assertEqual(res.data["regular_total"], "23.00")
+        self.assertEqual(res.data["savings"], "5.00")
+
+    def test_summary_ignores_previous_price_after_repricing(self):
+        product = self._add("10.00", 2)
+        # zmiana ceny przez serializer: price1 -> price2 (10.00), to nie
+        # jest promocja, liczy się nowa cena regularna
+        ser = ProductSerializer(
+            product, data={"price1": "12.00"}, partial=True
+        )
+        ser.is_valid(raise_exception=True)
+        ser.save()
+        product.refresh_from_db()
+        self.assertEqual(product.price2, Decimal("10.00"))
+
+        res = self.client.get(URL + "summary/")
+
+        self.assertEqual(res.data["total"], "24.00")
+        self.assertEqual(res.data["regular_total"], "24.00")
+        self.assertEqual(res.data["savings"], "0.00")
+
+    def test_summary_of_empty_list(self):
+        res = self.client.get(URL + "summary/")
+
+        self.assertEqual(res.data["items"], 0)
+        self.assertEqual(res.data["total"], "0.00")
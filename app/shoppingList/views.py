@@ -1,34 +1,76 @@
 from rest_framework.response import Response
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from db.models import ShoppingListItem
+from db.shopping import add_items, basket_summary
+from users.authentication import CachedTokenAuthentication
 from rest_framework import viewsets
-from .serializers import ShoppingListItemSerializer
+from .serializers import (
+    AddItemSerializer, BulkAddSerializer, ShoppingListItemSerializer,
+    ShoppingSummarySerializer,
+)
 
 
 class ShoppingListItemViewSet(viewsets.ModelViewSet):
     serializer_class = ShoppingListItemSerializer
-    authentication_classes = [authentication.TokenAuthentication] 
+    authentication_classes = [CachedTokenAuthentication] 
     permission_classes = [permissions.IsAuthenticated]
     
 
     def get_queryset(self):
-        return ShoppingListItem.objects.filter(user=self.request.user)
+        # product jest zagnieżdżony w odpowiedzi – bez select_related
+        # każda pozycja to osobne zapytanie
+        return (
+            ShoppingListItem.objects.filter(user=self.request.user)
+            .select_related("product")
+            .order_by("id")
+        )
 
     def create(self, request, *args, **kwargs):
-        user = request.user
-        product_id = request.data.get("product")
-        quantity = int(request.data.get("quantity", 1))
-        existing_item = ShoppingListItem.objects.filter(user=user, product_id=product_id).first()
+        # jeden INSERT ... ON CONFLICT DO UPDATE (z produktem w RETURNING)
+        # zamiast sprawdzenia produktu, zapisu i ponownego odczytu
+        data = AddItemSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        product_id = data.validated_data["product"]
 
-        if existing_item:
-            existing_item.quantity += quantity
-            existing_item.save()
-            serializer = self.get_serializer(existing_item)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        else:
-            serializer = self.get_serializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save(user=user, product_id=product_id)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        result = add_items(request.user.id, [
+            (product_id, data.validated_data["quantity"]),
+        ])
+        if product_id not in result:
+            raise ValidationError({"product": ["Unknown product."]})
+        item, created = result[product_id]
+        serializer = self.get_serializer(item)
+        code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        return Response(serializer.data, status=code)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_add(self, request):
+        """
+        POST /api/shopping/shopping-list/bulk/
+        Dodaje wiele pozycji jednym upsertem; ilości dla istniejących
+        pozycji są sumowane. Zwraca zmienione pozycje.
+        """
+        ser = BulkAddSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        result = add_items(request.user.id, [
+            (i["product"], i["quantity"]) for i in ser.validated_data["items"]
+        ])
+        items = sorted(
+            (item for item, _ in result.values()), key=lambda i: i.id
+        )
+        return Response(
+            self.get_serializer(items, many=True).data,
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], url_path="summary")
+    def summary(self, request):
+        """
+        GET /api/shopping/shopping-list/summary/
+        Suma koszyka (z uwzględnieniem promocji price2) i liczba pozycji
+        liczone w bazie jednym zapytaniem.
+        """
+        data = basket_summary(request.user.id)
+        return Response(ShoppingSummarySerializer(data).data)
@@ -0,0 +1,110 @@
+# users/authentication.py
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+KEY_PREFIX = "authtoken:"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def cache_enabled() -> bool:
+    """
+    Cache tokenów tylko ze wspólnym backendem (Redis/Memcached): przy
+    pamięci procesu unieważnienie (wylogowanie, dezaktywacja) trafiłoby
+    tylko do workera, który je obsłużył. LocMem wyłącznie po jawnym
+    AUTH_TOKEN_CACHE_ALLOW_LOCAL (jeden proces, np. dev/testy).
+    """
+    if settings.AUTH_TOKEN_CACHE_TTL <= 0:
+        return False
+    if isinstance(_cache(), LocMemCache):
+        return settings.AUTH_TOKEN_CACHE_ALLOW_LOCAL
+    return True
+
+
+def _incr(key, n=1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def auth_cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
+
+
+def invalidate_tokens(keys):
+    """Usuwa z cache wpisy dla podanych kluczy tokenów."""
+    keys = [KEY_PREFIX + k for k in keys]
+    if keys:
+        _cache().delete_many(keys)
+        _incr("invalidations", len(keys))
+
+
+def _snapshot(user) -> dict:
+    """Kolumny użytkownika bez hasha hasła – to trafia do cache."""
+    return {
+        f.attname: getattr(user, f.attname)
+        for f in user._meta.concrete_fields
+        if f.attname != "password"
+    }
+
+
+def _from_snapshot(snapshot):
+    # kolumny spoza wpisu (password, nowe po migracji) zostają odroczone
+    model = get_user_model()
+    names = [
+        f.attname for f in model._meta.concrete_fields
+        if f.attname in snapshot
+    ]
+    return model.from_db(
+        router.db_for_read(model), names, [snapshot[n] for n in names]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication z cache klucz -> kolumny użytkownika (bez hasha
+    hasła) na AUTH_TOKEN_CACHE_TTL sekund: trafienie nie odpytuje bazy.
+    Wpisy są usuwane przy wylogowaniu (usunięcie tokenu) i przy każdym
+    zapisie użytkownika – patrz users/signals.py; zmiany z pominięciem
+    sygnałów (QuerySet.update) widać najpóźniej po TTL.
+    Wymaga wspólnego cache (cache_enabled()).
+    """
+
+    def authenticate_credentials(self, key):
+        if not cache_enabled():
+            return super().authenticate_credentials(key)
+
+        cache_key = KEY_PREFIX + key
+        snapshot = _cache().get(cache_key)
+        if snapshot is None:
+            _incr("misses")
+            user, token = super().authenticate_credentials(key)
+            _cache().set(
+                cache_key, _snapshot(user),
+                timeout=settings.AUTH_TOKEN_CACHE_TTL,
+            )
+            return user, token
+
+        _incr("hits")
+        if not snapshot.get("is_active"):
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        user = _from_snapshot(snapshot)
+        return user, self.get_model()(key=key, user=user)
@@ -0,0 +1,17 @@
+# users/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 z liczbą iteracji z PASSWORD_HASH_ITERATIONS. Hasła z inną
+    liczbą iteracji są przeliczane przy najbliższym logowaniu
+    (must_update), więc zmiana kosztu nie wymaga migracji.
+    Algorytm (nazwa w hashu) bez zmian – hashe są zgodne z domyślnym
+    hasherem Django.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS or super().iterations
@@ -1,4 +1,5 @@
-from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth import get_user_model
+from django.db.models import Q
 from django.utils.translation import gettext as _
 from rest_framework import serializers
 
@@ -44,22 +45,23 @@ class AuthTokenSerializer(serializers.Serializer):
         identifier = attrs.get('identifier')
         password = attrs.get('password')
 
-        user = None
+        # jedno zapytanie po email LUB username; przy kolizji (czyjś
+        # username równy czyjemuś emailowi) wygrywa dopasowanie po emailu
         UserModel = get_user_model()
-        try:
-            user_obj = UserModel.objects.get(email=identifier)
-        except UserModel.DoesNotExist:
-            try:
-                user_obj = UserModel.objects.get(username=identifier)
-            except UserModel.DoesNotExist:
-                user_obj = None
+        candidates = list(
+            UserModel.objects.filter(
+                Q(email=identifier) | Q(username=identifier)
+            )[:2]
+        )
+        candidates.sort(key=lambda u: u.email != identifier)
+        user = candidates[0] if candidates else None
 
-        if user_obj:
-            user = authenticate(
-                request=self.context.get('request'),
-                username=user_obj.email,
-                password=password
-            )
+        if user is None:
+            # jak ModelBackend: hashujemy i tak, żeby czas odpowiedzi
+            # nie zdradzał, czy konto istnieje
+            UserModel().set_password(password)
+        elif not (user.check_password(password) and user.is_active):
+            user = None
 
         if not user:
             raise serializers.ValidationError(_("Invalid credentials"), code='authorization')
@@ -0,0 +1,20 @@
+# users/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, **kwargs):
+    # zmiana hasła, dezaktywacja, edycja profilu – świeży user w cache
+    invalidate_tokens(
+        Token.objects.filter(user=instance).values_list("key", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from db.models import User
+from users.authentication import auth_cache_stats
+
+ME = "/api/users/me/"
+
+
+@override_settings(AUTH_TOKEN_CACHE_ALLOW_LOCAL=True)
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            "pracownik@example.com", "pracownik", "pass12345",
+            is_employee=True,
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_second_request_skips_token_lookup(self):
+        before = auth_cache_stats()
+        self.assertEqual(self.client.get(ME).status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(ME).status_code, 200)
+
+        after = auth_cache_stats()
+        self.assertEqual(len(ctx), 0)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+    def test_deactivation_invalidates(self):
+        self.client.get(ME)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(ME).status_code, 401)
+
+    def test_cache_holds_no_password_hash(self):
+        self.client.get(ME)
+
+        cached = cache.get(f"authtoken:{self.token.key}")
+        self.assertEqual(cached["id"], self.user.pk)
+        self.assertTrue(cached["is_employee"])
+        self.assertNotIn("password", cached)
+        self.assertNotIn(self.user.password, str(cached))
+
+    def test_profile_edit_is_seen_on_next_request(self):
+        self.client.get(ME)
+        self.user.first_name = "Nowe"
+        self.user.save()
+
+        res = self.client.get(ME)
+        self.assertEqual(res.data["first_name"], "Nowe")
+
+    def test_update_through_cached_user_keeps_password(self):
+        self.client.get(ME)
+        res = self.client.patch(ME, {"last_name": "Nowak"}, format="json")
+
+        self.assertEqual(res.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_name, "Nowak")
+        self.assertTrue(self.user.check_password("pass12345"))
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(ME)
+        self.user.delete()
+
+        self.assertEqual(self.client.get(ME).status_code, 401)
+
+    def test_logout_revokes_token(self):
+        self.client.get(ME)
+        res = self.client.post("/api/users/logout/")
+
+        self.assertEqual(res.status_code, 204)
+        self.assertEqual(self.client.get(ME).status_code, 401)
+
+
+class LocalCacheTests(TestCase):
+
+    def test_locmem_cache_is_not_used_across_workers(self):
+        cache.clear()
+        user = User.objects.create_user(
+            "klient@example.com", "klient", "pass12345"
+        )
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        self.assertEqual(client.get(ME).status_code, 200)
+        self.assertIsNone(cache.get(f"authtoken:{token.key}"))
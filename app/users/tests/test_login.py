@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from db.models import User
+
+URL = "/api/users/token/"
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            "anna@example.com", "anna", "pass12345"
+        )
+        self.client = APIClient()
+
+    def _login(self, identifier, password="pass12345"):
+        return self.client.post(
+            URL, {"identifier": identifier, "password": password}
+        )
+
+    def test_login_by_email_or_username(self):
+        self.assertEqual(self._login("anna@example.com").status_code, 200)
+        self.assertEqual(self._login("anna").status_code, 200)
+
+    def test_single_user_lookup(self):
+        self._login("anna")  # token już istnieje
+        with CaptureQueriesContext(connection) as ctx:
+            res = self._login("anna")
+
+        self.assertEqual(res.status_code, 200)
+        user_queries = [
+            q for q in ctx.captured_queries if '"db_user"' in q["sql"]
+        ]
+        self.assertEqual(len(user_queries), 1)
+
+    def test_wrong_password_and_inactive_user(self):
+        self.assertEqual(self._login("anna", "zlehaslo1").status_code, 400)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self._login("anna").status_code, 400)
+
+    def test_email_match_wins_over_username(self):
+        User.objects.create_user("other@example.com", "anna@example.com",
+                                 "innehaslo1")
+        self.assertEqual(self._login("anna@example.com").status_code, 200)
+
+    def test_hash_upgraded_to_configured_cost(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self._login("anna")
+        self.user.refresh_from_db()
+        self.assertIn("$2000$", self.user.password)